@@ -1,32 +1,75 @@
-from typing import Literal, List
+from typing import Literal, List, Optional, Dict, Any
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.security import decode_access_token
 from app.core.database import get_database, USERS_COLLECTION
+from app.core.config import settings
+from app.core.cache import TTLCache, MISSING
 from app.models.user import User
+from app.services.token_service import get_assigned_patients, invalidate_assignments, token_denylist
 from bson import ObjectId
+import hashlib
+import time
 
 # HTTP Bearer security scheme
 security = HTTPBearer()
 
+# Decoded JWT payloads keyed by token hash, kept until the token expires
+token_cache = TTLCache(
+    "token",
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.JWT_EXPIRE_MINUTES * 60
+)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> User:
+# Authenticated User objects keyed by user id
+user_cache = TTLCache(
+    "user",
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_cached_user(user_id: Optional[str]) -> None:
     """
-    Dependency to get the current authenticated user from JWT token.
+    Drop a user from the authentication cache.
+    
+    Call after any write that changes a user document, e.g. profile
+    updates or changes to assigned_patients.
+    """
+    if user_id:
+        user_cache.invalidate(user_id)
+        invalidate_assignments(user_id)
+
+
+def _decode_token_cached(token: str) -> Optional[Dict[str, Any]]:
+    """Decode a JWT, reusing the payload of previously seen tokens."""
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    payload = token_cache.get(token_key)
+    if payload is not MISSING:
+        return payload
+    
+    payload = decode_access_token(token)
+    if payload is not None:
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            token_cache.set(token_key, payload, ttl=remaining)
+    return payload
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """
+    Decode a JWT access token and check it has not been revoked.
     
     Args:
-        credentials: HTTP Authorization header with Bearer token
+        token: Encoded JWT
     
     Returns:
-        User: Current authenticated user
+        Token payload
     
     Raises:
-        HTTPException: If token is invalid or user not found
+        HTTPException: If token is invalid or revoked
     """
-    token = credentials.credentials
-    payload = decode_access_token(token)
+    payload = _decode_token_cached(token)
     
     if payload is None:
         raise HTTPException(
@@ -35,14 +78,68 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user_id: str = payload.get("user_id")
-    if user_id is None:
+    if payload.get("user_id") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if token_denylist.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+
+async def _user_from_claims(payload: Dict[str, Any]) -> User:
+    """Build the user from token claims; only assigned patients may need a query."""
+    assigned_patients = []
+    if payload["role"] in ("caregiver", "clinician"):
+        assigned_patients = await get_assigned_patients(payload["user_id"], payload["av"])
+    return User(
+        _id=payload["user_id"],
+        email=payload["email"],
+        full_name=payload["name"],
+        role=payload["role"],
+        hashed_password="",
+        assigned_patients=assigned_patients,
+        assignments_version=payload["av"],
+        token_version=payload.get("tv", 0)
+    )
+
+
+async def authenticate_token(token: str, full_record: bool = False) -> User:
+    """
+    Resolve a JWT access token to its user.
+    
+    With AUTH_TOKEN_MODE=claims, tokens carrying claims (see token_claims)
+    are authorized without reading the users collection; the returned
+    User then only has the identity, role and assigned patients. Pass
+    full_record=True where the complete profile is needed.
+    
+    Args:
+        token: Encoded JWT
+        full_record: Always load the stored user
+    
+    Returns:
+        User: Authenticated user
+    
+    Raises:
+        HTTPException: If token is invalid, revoked or user not found
+    """
+    payload = verify_token(token)
+    user_id: str = payload["user_id"]
+    
+    if settings.AUTH_TOKEN_MODE == "claims" and not full_record and "av" in payload:
+        return await _user_from_claims(payload)
+    
+    cached_user = user_cache.get(user_id)
+    if cached_user is not MISSING:
+        return _check_token_version(cached_user, payload)
+    
     # Fetch user from database
     db = get_database()
     user_data = await db[USERS_COLLECTION].find_one({"_id": ObjectId(user_id)})
@@ -57,7 +154,57 @@ async def get_current_user(
     # Convert ObjectId to string for Pydantic
     user_data["_id"] = str(user_data["_id"])
     
-    return User(**user_data)
+    user = User(**user_data)
+    user_cache.set(user_id, user)
+    return _check_token_version(user, payload)
+
+
+def _check_token_version(user: User, payload: Dict[str, Any]) -> User:
+    """Reject tokens issued before the user's tokens were last revoked."""
+    if payload.get("tv", 0) < user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    """
+    Dependency to get the current authenticated user from JWT token.
+    
+    Args:
+        credentials: HTTP Authorization header with Bearer token
+    
+    Returns:
+        User: Current authenticated user
+    
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    return await authenticate_token(credentials.credentials)
+
+
+async def get_current_user_record(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    """
+    Dependency to get the current user's stored record (full profile).
+    
+    Unlike get_current_user this always loads the user (through the user
+    cache), also when AUTH_TOKEN_MODE=claims.
+    """
+    return await authenticate_token(credentials.credentials, full_record=True)
+
+
+async def get_token_payload(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Dict[str, Any]:
+    """Dependency returning the verified payload of the caller's token."""
+    return verify_token(credentials.credentials)
 
 
 def require_role(allowed_roles: List[Literal["patient", "caregiver", "clinician"]]):
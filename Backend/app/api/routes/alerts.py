@@ -1,15 +1,35 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
-from app.schemas.alert import AlertCreate, AlertUpdate, AlertResponse, AlertStats
+from app.schemas.alert import (
+    AlertCreate,
+    AlertUpdate,
+    AlertResponse,
+    AlertStats,
+    AlertRuleCreate,
+    AlertRuleResponse,
+    AlertBulkUpdate,
+    AlertBulkResult,
+)
 from app.models.user import User
-from app.models.alert import Alert
-from app.api.deps import get_current_user
-from app.core.database import get_database, ALERTS_COLLECTION
+from app.models.alert import Alert, AlertRule
+from app.api.deps import get_current_user, require_caregiver_or_clinician
+from app.core.database import get_database, ALERTS_COLLECTION, ALERT_RULES_COLLECTION
+from app.services.alert_service import get_alert_counts, bulk_alert_query, mark_alerts_read, resolve_alerts
+from app.services.rule_engine import invalidate_rule_table
+from app.services.alert_suppression import forget_open_alert
+from app.services.dashboard_cache import dashboard_cache
+from app.core.metrics import ALERTS_CREATED
+from app.utils.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, keyset_filter, parse_fields
+from app.utils.json_response import FastJSONResponse, document_rows, response_shape
 from bson import ObjectId
 from datetime import datetime
 from typing import Optional, List
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
+# Fields that can be selected with `fields` on list endpoints
+ALERT_FIELDS = [field.alias or name for name, field in AlertResponse.model_fields.items()]
+ALERT_SHAPE = response_shape(AlertResponse)
+
 
 @router.get("", response_model=List[AlertResponse])
 async def get_alerts(
@@ -17,6 +37,8 @@ async def get_alerts(
     alert_type: Optional[str] = Query(None),
     is_read: Optional[bool] = Query(None),
     limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -24,9 +46,20 @@ async def get_alerts(
     
     - Patients see their own alerts
     - Caregivers/Clinicians see alerts for assigned patients
+    - Newest first; pass the X-Next-Cursor response header back as `cursor`
+    - `fields` (comma-separated) returns only those fields plus _id and created_at
     """
     db = get_database()
     
+    try:
+        after = decode_cursor(cursor) if cursor else None
+        projection = parse_fields(fields, ALERT_FIELDS, ["_id", "created_at"])
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     # Build query based on role
     query = {}
     
@@ -52,16 +85,23 @@ async def get_alerts(
         query["alert_type"] = alert_type
     if is_read is not None:
         query["is_read"] = is_read
-    
-    # Query alerts
-    cursor = db[ALERTS_COLLECTION].find(query).sort("created_at", -1).limit(limit)
-    
-    alerts = []
-    async for alert_data in cursor:
-        alert_data["_id"] = str(alert_data["_id"])
-        alerts.append(AlertResponse(**alert_data))
-    
-    return alerts
+    if after is not None:
+        query.update(keyset_filter("created_at", after))
+    
+    # Query alerts (only the fields the response contains)
+    alert_cursor = db[ALERTS_COLLECTION].find(
+        query,
+        {field: 1 for field in projection or ALERT_FIELDS}
+    ).sort([("created_at", -1), ("_id", -1)]).limit(limit)
+    documents = await alert_cursor.to_list(length=limit)
+    
+    # A full page may have a successor
+    headers = {}
+    if len(documents) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(documents[-1]["created_at"], documents[-1]["_id"])
+    
+    # Stored alerts already have the response shape: render them directly
+    return FastJSONResponse(document_rows(documents, ALERT_SHAPE, projection), headers=headers)
 
 
 @router.post("", response_model=AlertResponse, status_code=status.HTTP_201_CREATED)
@@ -103,6 +143,8 @@ async def create_alert(
     
     alert_dict = alert.model_dump(by_alias=True, exclude={"id"})
     result = await db[ALERTS_COLLECTION].insert_one(alert_dict)
+    dashboard_cache.mark_changed([alert.patient_id])
+    ALERTS_CREATED.inc(source="manual")
     alert.id = str(result.inserted_id)
     
     return AlertResponse(
@@ -122,6 +164,74 @@ async def create_alert(
     )
 
 
+def _bulk_selection(selection: AlertBulkUpdate, current_user: User) -> dict:
+    """Translate a bulk selection into an alert filter limited to accessible patients."""
+    if current_user.role == "patient":
+        patient_ids = [current_user.id]
+    else:
+        patient_ids = current_user.assigned_patients
+    
+    if selection.patient_id:
+        if selection.patient_id not in patient_ids:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this patient's alerts"
+            )
+        patient_ids = [selection.patient_id]
+    
+    try:
+        return bulk_alert_query(
+            patient_ids,
+            alert_ids=selection.alert_ids,
+            vital_type=selection.vital_type,
+            alert_type=selection.alert_type,
+            before=selection.before
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/bulk/read", response_model=AlertBulkResult)
+async def mark_alerts_as_read(
+    selection: AlertBulkUpdate,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Mark many alerts as read with a single update.
+    
+    - Select by alert_ids, or by patient_id plus optional vital_type,
+      alert_type and before
+    - Alerts the user has no access to are silently skipped
+    - Returns the number of alerts marked read
+    """
+    query = _bulk_selection(selection, current_user)
+    modified = await mark_alerts_read(query, current_user.id)
+    if modified:
+        dashboard_cache.mark_changed(query["patient_id"]["$in"])
+    return AlertBulkResult(modified=modified)
+
+
+@router.post("/bulk/resolve", response_model=AlertBulkResult)
+async def resolve_alerts_bulk(
+    selection: AlertBulkUpdate,
+    current_user: User = Depends(require_caregiver_or_clinician)
+):
+    """
+    Resolve many alerts with a single update (Caregivers/Clinicians only).
+    
+    - Same selection as /alerts/bulk/read
+    - Returns the number of alerts resolved
+    """
+    query = _bulk_selection(selection, current_user)
+    modified = await resolve_alerts(query)
+    if modified:
+        dashboard_cache.mark_changed(query["patient_id"]["$in"])
+    return AlertBulkResult(modified=modified)
+
+
 @router.put("/{alert_id}/read", response_model=dict)
 async def mark_alert_as_read(
     alert_id: str,
@@ -178,6 +288,8 @@ async def mark_alert_as_read(
         }
     )
     
+    dashboard_cache.mark_changed([patient_id])
+    
     return {"message": "Alert marked as read"}
 
 
@@ -231,6 +343,9 @@ async def resolve_alert(
             }
         }
     )
+    # Further repeats open a new alert
+    forget_open_alert(alert_data)
+    dashboard_cache.mark_changed([alert_data["patient_id"]])
     
     return {"message": "Alert marked as resolved"}
 
@@ -244,6 +359,7 @@ async def get_alert_stats(
     Get alert statistics.
     
     - Returns counts of different alert types and statuses
+    - All counters are computed in a single aggregation
     """
     db = get_database()
     
@@ -263,29 +379,118 @@ async def get_alert_stats(
         else:
             query["patient_id"] = {"$in": current_user.assigned_patients}
     
-    # Count total alerts
-    total = await db[ALERTS_COLLECTION].count_documents(query)
+    counts = await get_alert_counts(query, db)
     
-    # Count unread alerts
-    unread_query = {**query, "is_read": False}
-    unread = await db[ALERTS_COLLECTION].count_documents(unread_query)
+    return AlertStats(
+        total_alerts=counts["total"],
+        unread_alerts=counts["unread"],
+        critical_alerts=counts["critical"],
+        warning_alerts=counts["warning"],
+        resolved_alerts=counts["resolved"]
+    )
+
+
+@router.get("/rules", response_model=List[AlertRuleResponse])
+async def get_alert_rules(
+    patient_id: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get active custom alert rules.
     
-    # Count critical alerts
-    critical_query = {**query, "alert_type": "critical"}
-    critical = await db[ALERTS_COLLECTION].count_documents(critical_query)
+    - Patients see their own rules
+    - Caregivers/Clinicians specify patient_id
+    """
+    db = get_database()
+    
+    if current_user.role == "patient":
+        target_patient_id = current_user.id
+    else:
+        if not patient_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="patient_id is required for caregivers/clinicians"
+            )
+        if patient_id not in current_user.assigned_patients:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this patient's alert rules"
+            )
+        target_patient_id = patient_id
     
-    # Count warning alerts
-    warning_query = {**query, "alert_type": "warning"}
-    warning = await db[ALERTS_COLLECTION].count_documents(warning_query)
+    cursor = db[ALERT_RULES_COLLECTION].find(
+        {"patient_id": target_patient_id, "is_active": True}
+    ).sort("created_at", 1)
     
-    # Count resolved alerts
-    resolved_query = {**query, "is_resolved": True}
-    resolved = await db[ALERTS_COLLECTION].count_documents(resolved_query)
+    rules = []
+    async for rule_data in cursor:
+        rule_data["_id"] = str(rule_data["_id"])
+        rules.append(AlertRuleResponse(**rule_data))
     
-    return AlertStats(
-        total_alerts=total,
-        unread_alerts=unread,
-        critical_alerts=critical,
-        warning_alerts=warning,
-        resolved_alerts=resolved
+    return rules
+
+
+@router.post("/rules", response_model=AlertRuleResponse, status_code=status.HTTP_201_CREATED)
+async def create_alert_rule(
+    rule_data: AlertRuleCreate,
+    current_user: User = Depends(require_caregiver_or_clinician)
+):
+    """
+    Create a custom alert rule (Caregiver/Clinician only).
+    
+    - Conditions: above/below a value, between/outside a range
+    - Evaluated together with the patient's thresholds on every reading
+    """
+    if rule_data.patient_id not in current_user.assigned_patients:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Can only create alert rules for assigned patients"
+        )
+    
+    db = get_database()
+    
+    rule = AlertRule(**rule_data.model_dump())
+    rule_dict = rule.model_dump(by_alias=True, exclude={"id"})
+    result = await db[ALERT_RULES_COLLECTION].insert_one(rule_dict)
+    invalidate_rule_table(rule.patient_id)
+    
+    rule_dict["_id"] = str(result.inserted_id)
+    return AlertRuleResponse(**rule_dict)
+
+
+@router.delete("/rules/{rule_id}", response_model=dict)
+async def delete_alert_rule(
+    rule_id: str,
+    current_user: User = Depends(require_caregiver_or_clinician)
+):
+    """
+    Deactivate a custom alert rule (Caregiver/Clinician only).
+    """
+    db = get_database()
+    
+    if not ObjectId.is_valid(rule_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid rule ID"
+        )
+    
+    rule_data = await db[ALERT_RULES_COLLECTION].find_one({"_id": ObjectId(rule_id)})
+    if not rule_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Alert rule not found"
+        )
+    
+    if rule_data["patient_id"] not in current_user.assigned_patients:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    await db[ALERT_RULES_COLLECTION].update_one(
+        {"_id": ObjectId(rule_id)},
+        {"$set": {"is_active": False}}
     )
+    invalidate_rule_table(rule_data["patient_id"])
+    
+    return {"message": "Alert rule deactivated"}
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from app.schemas.auth import UserLogin, UserRegister, AuthResponse
 from app.models.user import User
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import create_access_token
+from app.core.password_hasher import password_hasher
 from app.core.database import get_database, USERS_COLLECTION, PATIENTS_COLLECTION
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user_record, get_token_payload, invalidate_cached_user
+from app.services.token_service import token_claims, token_denylist
 from datetime import timedelta
 from app.core.config import settings
 from bson import ObjectId
@@ -32,7 +34,7 @@ async def register(user_data: UserRegister):
     # Create new user
     new_user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
         full_name=user_data.full_name,
         role=user_data.role,
         phone=user_data.phone,
@@ -52,7 +54,7 @@ async def register(user_data: UserRegister):
     
     # Create access token
     access_token = create_access_token(
-        data={"user_id": user_id, "role": user_data.role},
+        data=token_claims({**user_dict, "_id": user_id}),
         expires_delta=timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
     )
     
@@ -72,6 +74,7 @@ async def login(credentials: UserLogin):
     Authenticate user and return JWT token.
     
     - Validates email and password
+    - Rehashes the password when bcrypt settings changed
     - Returns token with user information
     """
     db = get_database()
@@ -86,14 +89,22 @@ async def login(credentials: UserLogin):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Verify password
-    if not verify_password(credentials.password, user_data["hashed_password"]):
+    # Verify password (off the event loop)
+    password_ok, new_hash = await password_hasher.verify_and_update(credentials.password, user_data["hashed_password"])
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Hash uses outdated bcrypt settings: store it with the current ones
+    if new_hash:
+        await db[USERS_COLLECTION].update_one(
+            {"_id": user_data["_id"], "hashed_password": user_data["hashed_password"]},
+            {"$set": {"hashed_password": new_hash}}
+        )
+    
     # Check if user is active
     if not user_data.get("is_active", True):
         raise HTTPException(
@@ -105,7 +116,7 @@ async def login(credentials: UserLogin):
     
     # Create access token
     access_token = create_access_token(
-        data={"user_id": user_id, "role": user_data["role"]},
+        data=token_claims(user_data),
         expires_delta=timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
     )
     
@@ -119,8 +130,31 @@ async def login(credentials: UserLogin):
     )
 
 
+@router.post("/logout", response_model=dict)
+async def logout(payload: dict = Depends(get_token_payload)):
+    """
+    Revoke the access token used for this request.
+    
+    - Takes effect on all workers within TOKEN_DENYLIST_REFRESH_SECONDS
+    """
+    await token_denylist.revoke_token(payload)
+    return {"message": "Logged out"}
+
+
+@router.post("/logout-all", response_model=dict)
+async def logout_everywhere(payload: dict = Depends(get_token_payload)):
+    """
+    Revoke every access token issued to the current user so far.
+    
+    - Including the one used for this request; log in again afterwards
+    """
+    await token_denylist.revoke_user_tokens(payload["user_id"])
+    invalidate_cached_user(payload["user_id"])
+    return {"message": "All sessions logged out"}
+
+
 @router.get("/me", response_model=dict)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user_record)):
     """
     Get current authenticated user information.
     
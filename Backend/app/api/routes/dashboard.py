@@ -1,21 +1,79 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from app.models.user import User
 from app.api.deps import get_current_user
-from app.core.database import get_database, VITALS_COLLECTION, ALERTS_COLLECTION, PATIENTS_COLLECTION
+from app.core.database import get_database, ALERTS_COLLECTION, PATIENTS_COLLECTION
+from app.services.alert_service import get_alert_counts, ALERT_COUNTERS
+from app.services.snapshot_service import get_latest_snapshot, snapshot_to_vitals, readings_last_24h
+from app.services.vitals_repository import find_latest_reading, count_readings
+from app.services.dashboard_cache import dashboard_cache, dashboard_key
+from app.core.config import settings
+from app.utils.query_plan import QueryPlan
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# Alert counters shown when the counting query fails
+EMPTY_ALERT_COUNTS = {"total": 0, **{name: 0 for name in ALERT_COUNTERS}}
+
+
+def _query_plan() -> QueryPlan:
+    return QueryPlan(
+        concurrency=settings.DASHBOARD_QUERY_CONCURRENCY,
+        timeout=settings.DASHBOARD_QUERY_TIMEOUT_SECONDS
+    )
+
+
+def _degraded(failed: List[str]) -> Dict[str, Any]:
+    """Dashboard fields flagging sections computed from failed sub-queries."""
+    return {"degraded": bool(failed), "degraded_queries": failed}
+
+
+async def _recent_alerts(db, query: Dict[str, Any], projection: Dict[str, int]) -> List[Dict[str, Any]]:
+    """Ten most recent alerts matching a filter."""
+    cursor = db[ALERTS_COLLECTION].find(query, projection).sort("created_at", -1).limit(10)
+    return await cursor.to_list(length=10)
+
+
+async def _cached_dashboard(request: Request, current_user: User, build) -> Response:
+    """
+    Serve a dashboard from the dashboard cache with ETag revalidation.
+    
+    Args:
+        request: Incoming request (for If-None-Match)
+        current_user: Dashboard owner
+        build: Builder coroutine function taking (user, db)
+    
+    Returns:
+        JSON response, or 304 when the client's copy is current
+    """
+    if current_user.role == "patient":
+        patient_ids = [current_user.id]
+    else:
+        patient_ids = current_user.assigned_patients
+    
+    etag, body = await dashboard_cache.get_or_build(
+        dashboard_key(current_user.id, current_user.role, patient_ids),
+        patient_ids,
+        lambda: build(current_user, get_database("dashboard"))
+    )
+    
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @router.get("/patient", response_model=Dict[str, Any])
-async def get_patient_dashboard(current_user: User = Depends(get_current_user)):
+async def get_patient_dashboard(request: Request, current_user: User = Depends(get_current_user)):
     """
     Get patient dashboard data.
     
     - Recent vitals summary
     - Alert statistics
     - Device status
+    - Cached briefly; supports If-None-Match
     """
     if current_user.role != "patient":
         raise HTTPException(
@@ -23,30 +81,36 @@ async def get_patient_dashboard(current_user: User = Depends(get_current_user)):
             detail="This endpoint is only for patients"
         )
     
-    db = get_database()
-    
-    # Get latest vitals
-    latest_vitals = await db[VITALS_COLLECTION].find_one(
-        {"patient_id": current_user.id},
-        sort=[("measured_at", -1)]
-    )
-    
-    # Get alerts count
-    total_alerts = await db[ALERTS_COLLECTION].count_documents({"patient_id": current_user.id})
-    unread_alerts = await db[ALERTS_COLLECTION].count_documents({
-        "patient_id": current_user.id,
-        "is_read": False
-    })
+    return await _cached_dashboard(request, current_user, build_patient_dashboard)
+
+
+async def build_patient_dashboard(current_user: User, db) -> Dict[str, Any]:
+    """Compute the patient dashboard payload."""
+    # Latest vitals snapshot, alert counts and device info are independent
+    plan = _query_plan()
+    plan.add("snapshot", lambda: get_latest_snapshot(current_user.id, db))
+    plan.add("alert_counts", lambda: get_alert_counts({"patient_id": current_user.id}, db), default=EMPTY_ALERT_COUNTS)
+    plan.add("patient_info", lambda: db[PATIENTS_COLLECTION].find_one({"user_id": current_user.id}))
+    results = await plan.run()
+    failed = list(plan.failed)
     
-    # Get patient info
-    patient_info = await db[PATIENTS_COLLECTION].find_one({"user_id": current_user.id})
+    # Get latest vitals and 24h activity from the snapshot
+    snapshot = results["snapshot"]
+    if snapshot:
+        latest_vitals = snapshot_to_vitals(snapshot)
+        recent_vitals_count = readings_last_24h(snapshot)
+    else:
+        start_time = datetime.utcnow() - timedelta(hours=24)
+        fallback = _query_plan()
+        fallback.add("latest_vitals", lambda: find_latest_reading(current_user.id, db))
+        fallback.add("recent_vitals_count", lambda: count_readings([current_user.id], start_time, db=db), default=0)
+        fallback_results = await fallback.run()
+        failed += fallback.failed
+        latest_vitals = fallback_results["latest_vitals"]
+        recent_vitals_count = fallback_results["recent_vitals_count"]
     
-    # Get vitals from last 24 hours
-    start_time = datetime.utcnow() - timedelta(hours=24)
-    recent_vitals_count = await db[VITALS_COLLECTION].count_documents({
-        "patient_id": current_user.id,
-        "measured_at": {"$gte": start_time}
-    })
+    alert_counts = results["alert_counts"]
+    patient_info = results["patient_info"]
     
     dashboard_data = {
         "user_info": {
@@ -63,8 +127,8 @@ async def get_patient_dashboard(current_user: User = Depends(get_current_user)):
             "is_anomaly": latest_vitals.get("is_anomaly", False) if latest_vitals else False
         },
         "alerts": {
-            "total": total_alerts,
-            "unread": unread_alerts
+            "total": alert_counts["total"],
+            "unread": alert_counts["unread"]
         },
         "device_status": {
             "calibrated": patient_info.get("device_calibrated", False) if patient_info else False,
@@ -73,20 +137,22 @@ async def get_patient_dashboard(current_user: User = Depends(get_current_user)):
         },
         "activity": {
             "measurements_24h": recent_vitals_count
-        }
+        },
+        **_degraded(failed)
     }
     
     return dashboard_data
 
 
 @router.get("/caregiver", response_model=Dict[str, Any])
-async def get_caregiver_dashboard(current_user: User = Depends(get_current_user)):
+async def get_caregiver_dashboard(request: Request, current_user: User = Depends(get_current_user)):
     """
     Get caregiver dashboard data.
     
     - Assigned patients summary
     - Overall alerts
     - Patient vitals overview
+    - Cached briefly; supports If-None-Match
     """
     if current_user.role != "caregiver":
         raise HTTPException(
@@ -94,38 +160,30 @@ async def get_caregiver_dashboard(current_user: User = Depends(get_current_user)
             detail="This endpoint is only for caregivers"
         )
     
-    db = get_database()
-    
+    return await _cached_dashboard(request, current_user, build_caregiver_dashboard)
+
+
+async def build_caregiver_dashboard(current_user: User, db) -> Dict[str, Any]:
+    """Compute the caregiver dashboard payload."""
     # Get assigned patients count
     assigned_patients = current_user.assigned_patients
     patient_count = len(assigned_patients)
+    patient_filter = {"patient_id": {"$in": assigned_patients}}
     
-    # Get total alerts for all assigned patients
-    total_alerts = await db[ALERTS_COLLECTION].count_documents({
-        "patient_id": {"$in": assigned_patients}
-    })
-    
-    # Get unread alerts
-    unread_alerts = await db[ALERTS_COLLECTION].count_documents({
-        "patient_id": {"$in": assigned_patients},
-        "is_read": False
-    })
-    
-    # Get critical alerts
-    critical_alerts = await db[ALERTS_COLLECTION].count_documents({
-        "patient_id": {"$in": assigned_patients},
-        "alert_type": "critical",
-        "is_resolved": False
-    })
-    
-    # Get recent alerts (last 10)
-    recent_alerts_cursor = db[ALERTS_COLLECTION].find(
-        {"patient_id": {"$in": assigned_patients}},
+    plan = _query_plan()
+    # Total, unread and unresolved critical alerts for all assigned patients
+    plan.add("alert_counts", lambda: get_alert_counts(patient_filter, db), default=EMPTY_ALERT_COUNTS)
+    # Recent alerts (last 10)
+    plan.add("recent_alerts", lambda: _recent_alerts(
+        db,
+        patient_filter,
         {"_id": 1, "patient_id": 1, "title": 1, "alert_type": 1, "created_at": 1}
-    ).sort("created_at", -1).limit(10)
+    ), default=[])
+    results = await plan.run()
+    alert_counts = results["alert_counts"]
     
     recent_alerts = []
-    async for alert in recent_alerts_cursor:
+    for alert in results["recent_alerts"]:
         recent_alerts.append({
             "id": str(alert["_id"]),
             "patient_id": alert["patient_id"],
@@ -145,24 +203,26 @@ async def get_caregiver_dashboard(current_user: User = Depends(get_current_user)
             "assigned_patient_ids": assigned_patients
         },
         "alerts": {
-            "total": total_alerts,
-            "unread": unread_alerts,
-            "critical": critical_alerts,
+            "total": alert_counts["total"],
+            "unread": alert_counts["unread"],
+            "critical": alert_counts["critical_unresolved"],
             "recent": recent_alerts
-        }
+        },
+        **_degraded(plan.failed)
     }
     
     return dashboard_data
 
 
 @router.get("/clinician", response_model=Dict[str, Any])
-async def get_clinician_dashboard(current_user: User = Depends(get_current_user)):
+async def get_clinician_dashboard(request: Request, current_user: User = Depends(get_current_user)):
     """
     Get clinician dashboard data.
     
     - System-wide statistics
     - All patients overview
     - Analytics summary
+    - Cached briefly; supports If-None-Match
     """
     if current_user.role != "clinician":
         raise HTTPException(
@@ -170,48 +230,35 @@ async def get_clinician_dashboard(current_user: User = Depends(get_current_user)
             detail="This endpoint is only for clinicians"
         )
     
-    db = get_database()
-    
+    return await _cached_dashboard(request, current_user, build_clinician_dashboard)
+
+
+async def build_clinician_dashboard(current_user: User, db) -> Dict[str, Any]:
+    """Compute the clinician dashboard payload."""
     # Get assigned patients
     assigned_patients = current_user.assigned_patients
     patient_count = len(assigned_patients)
-    
-    # Get total vitals measurements today
+    patient_filter = {"patient_id": {"$in": assigned_patients}}
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    vitals_today = await db[VITALS_COLLECTION].count_documents({
-        "patient_id": {"$in": assigned_patients},
-        "measured_at": {"$gte": today_start}
-    })
-    
-    # Get alerts
-    total_alerts = await db[ALERTS_COLLECTION].count_documents({
-        "patient_id": {"$in": assigned_patients}
-    })
-    
-    critical_alerts = await db[ALERTS_COLLECTION].count_documents({
-        "patient_id": {"$in": assigned_patients},
-        "alert_type": "critical",
-        "is_resolved": False
-    })
-    
-    # Get anomaly count
-    anomaly_count = await db[VITALS_COLLECTION].count_documents({
-        "patient_id": {"$in": assigned_patients},
-        "is_anomaly": True,
-        "measured_at": {"$gte": today_start}
-    })
-    
-    # Get recent critical alerts
-    critical_alerts_cursor = db[ALERTS_COLLECTION].find(
-        {
-            "patient_id": {"$in": assigned_patients},
-            "alert_type": "critical"
-        },
+    
+    plan = _query_plan()
+    # Total vitals measurements and anomalies today
+    plan.add("vitals_today", lambda: count_readings(assigned_patients, today_start, db=db), default=0)
+    plan.add("anomaly_count", lambda: count_readings(assigned_patients, today_start, anomalies_only=True, db=db), default=0)
+    plan.add("alert_counts", lambda: get_alert_counts(patient_filter, db), default=EMPTY_ALERT_COUNTS)
+    # Recent critical alerts
+    plan.add("critical_alerts", lambda: _recent_alerts(
+        db,
+        {**patient_filter, "alert_type": "critical"},
         {"_id": 1, "patient_id": 1, "title": 1, "severity": 1, "created_at": 1}
-    ).sort("created_at", -1).limit(10)
+    ), default=[])
+    results = await plan.run()
+    vitals_today = results["vitals_today"]
+    anomaly_count = results["anomaly_count"]
+    alert_counts = results["alert_counts"]
     
     critical_alerts_list = []
-    async for alert in critical_alerts_cursor:
+    for alert in results["critical_alerts"]:
         critical_alerts_list.append({
             "id": str(alert["_id"]),
             "patient_id": alert["patient_id"],
@@ -234,13 +281,14 @@ async def get_clinician_dashboard(current_user: User = Depends(get_current_user)
             "anomalies_today": anomaly_count
         },
         "alerts": {
-            "total": total_alerts,
-            "critical_unresolved": critical_alerts,
+            "total": alert_counts["total"],
+            "critical_unresolved": alert_counts["critical_unresolved"],
             "recent_critical": critical_alerts_list
         },
         "analytics": {
             "average_measurements_per_patient": round(vitals_today / patient_count, 2) if patient_count > 0 else 0
-        }
+        },
+        **_degraded(plan.failed)
     }
     
     return dashboard_data
@@ -5,12 +5,23 @@ from app.schemas.user import (
     PatientCreateRequest,
     PatientCreateResponse,
     PatientOverview,
+    PatientThresholdsUpdate,
+    PatientThresholds,
 )
 from app.models.user import User
 from app.models.patient import Patient
-from app.api.deps import get_current_user, require_caregiver_or_clinician
-from app.core.database import get_database, USERS_COLLECTION, PATIENTS_COLLECTION, VITALS_COLLECTION
-from app.core.security import get_password_hash
+from app.api.deps import get_current_user, get_current_user_record, require_caregiver_or_clinician, require_clinician, invalidate_cached_user
+from app.core.database import get_database, USERS_COLLECTION, PATIENTS_COLLECTION
+from app.core.password_hasher import password_hasher
+from app.services.dashboard_cache import dashboard_cache
+from app.services.threshold_service import (
+    THRESHOLD_FIELD_NAMES,
+    get_patient_thresholds,
+    update_patient_thresholds,
+    invalidate_patient_thresholds,
+)
+from app.services.patient_service import get_users_by_ids, get_latest_vitals_many
+from app.services.snapshot_service import get_latest_snapshots
 from bson import ObjectId
 from datetime import datetime
 
@@ -18,7 +29,7 @@ router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/profile", response_model=UserProfile)
-async def get_user_profile(current_user: User = Depends(get_current_user)):
+async def get_user_profile(current_user: User = Depends(get_current_user_record)):
     """
     Get current user's profile with extended information.
     
@@ -57,7 +68,7 @@ async def get_user_profile(current_user: User = Depends(get_current_user)):
 @router.put("/profile", response_model=dict)
 async def update_user_profile(
     update_data: UserUpdate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_record)
 ):
     """
     Update current user's profile.
@@ -85,6 +96,7 @@ async def update_user_profile(
             {"_id": user_id},
             {"$set": user_update}
         )
+        invalidate_cached_user(current_user.id)
     
     # Update patient-specific information
     if current_user.role == "patient":
@@ -110,6 +122,8 @@ async def update_user_profile(
                 {"user_id": current_user.id},
                 {"$set": patient_update}
             )
+            invalidate_patient_thresholds(current_user.id)
+            dashboard_cache.mark_changed([current_user.id])
     
     return {"message": "Profile updated successfully"}
 
@@ -134,20 +148,23 @@ async def get_assigned_patients(current_user: User = Depends(get_current_user)):
     if not patient_ids:
         return []
     
-    # Fetch patient users
+    # Fetch all patient users in one query, keeping assignment order
+    users = await get_users_by_ids(
+        patient_ids,
+        {"full_name": 1, "email": 1, "phone": 1},
+        db
+    )
+    
     patients = []
     for patient_id in patient_ids:
-        try:
-            user_data = await db[USERS_COLLECTION].find_one({"_id": ObjectId(patient_id)})
-            if user_data:
-                patients.append({
-                    "id": str(user_data["_id"]),
-                    "full_name": user_data.get("full_name"),
-                    "email": user_data.get("email"),
-                    "phone": user_data.get("phone")
-                })
-        except:
-            continue
+        user_data = users.get(patient_id)
+        if user_data:
+            patients.append({
+                "id": str(user_data["_id"]),
+                "full_name": user_data.get("full_name"),
+                "email": user_data.get("email"),
+                "phone": user_data.get("phone")
+            })
     
     return patients
 
@@ -161,25 +178,35 @@ async def get_patients_overview(current_user: User = Depends(require_caregiver_o
     - Includes basic demographics and most recent vitals
     """
 
-    db = get_database()
+    db = get_database("dashboard")
     patient_ids = current_user.assigned_patients or []
 
     if not patient_ids:
         return []
 
+    # One query for users and one for their latest-vitals snapshots
+    users = await get_users_by_ids(
+        patient_ids,
+        {"email": 1, "full_name": 1, "phone": 1, "gender": 1, "date_of_birth": 1},
+        db
+    )
+    latest_by_patient = await get_latest_snapshots(list(users.keys()), db)
+
+    # Patients without a snapshot yet fall back to the raw collection
+    missing = [patient_id for patient_id in users if patient_id not in latest_by_patient]
+    if missing:
+        latest_by_patient.update(await get_latest_vitals_many(missing, db))
+
     overview: list[PatientOverview] = []
 
     for patient_id in patient_ids:
-        try:
-            user_data = await db[USERS_COLLECTION].find_one({"_id": ObjectId(patient_id)})
-            if not user_data:
-                continue
+        user_data = users.get(patient_id)
+        if not user_data:
+            continue
 
-            latest_vitals = await db[VITALS_COLLECTION].find_one(
-                {"patient_id": patient_id},
-                sort=[("measured_at", -1)],
-            )
+        latest_vitals = latest_by_patient.get(patient_id)
 
+        try:
             overview.append(
                 PatientOverview(
                     id=str(user_data["_id"]),
@@ -198,7 +225,7 @@ async def get_patients_overview(current_user: User = Depends(require_caregiver_o
                 )
             )
         except Exception:
-            # Skip malformed IDs or lookup issues without failing the entire list
+            # Skip malformed user documents without failing the entire list
             continue
 
     return overview
@@ -241,7 +268,7 @@ async def create_patient(
     # Create User document
     new_user = User(
         email=patient_data.email,
-        hashed_password=get_password_hash(temp_password),
+        hashed_password=await password_hasher.hash(temp_password),
         full_name=patient_data.full_name,
         role="patient",
         phone=patient_data.phone,
@@ -277,8 +304,9 @@ async def create_patient(
         try:
             await db[USERS_COLLECTION].update_one(
                 {"_id": ObjectId(patient_data.assigned_caregiver_id)},
-                {"$addToSet": {"assigned_patients": user_id}}
+                {"$addToSet": {"assigned_patients": user_id}, "$inc": {"assignments_version": 1}}
             )
+            invalidate_cached_user(patient_data.assigned_caregiver_id)
         except Exception as e:
             # Log warning but don't fail the patient creation
             print(f"Warning: Could not assign to caregiver: {e}")
@@ -288,8 +316,9 @@ async def create_patient(
         try:
             await db[USERS_COLLECTION].update_one(
                 {"_id": ObjectId(patient_data.assigned_clinician_id)},
-                {"$addToSet": {"assigned_patients": user_id}}
+                {"$addToSet": {"assigned_patients": user_id}, "$inc": {"assignments_version": 1}}
             )
+            invalidate_cached_user(patient_data.assigned_clinician_id)
         except Exception as e:
             # Log warning but don't fail the patient creation
             print(f"Warning: Could not assign to clinician: {e}")
@@ -302,3 +331,88 @@ async def create_patient(
         message=f"Patient created successfully. Temporary password: {temp_password}"
     )
 
+
+@router.get("/patients/{patient_id}/thresholds", response_model=PatientThresholds)
+async def get_thresholds(
+    patient_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a patient's alert thresholds.
+    
+    - Patients see their own thresholds
+    - Caregivers/Clinicians see thresholds of assigned patients
+    """
+    if current_user.role == "patient":
+        allowed = patient_id == current_user.id
+    else:
+        allowed = patient_id in current_user.assigned_patients
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this patient's data"
+        )
+    
+    thresholds = await get_patient_thresholds(patient_id)
+    if thresholds is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient profile not found"
+        )
+    
+    return PatientThresholds(patient_id=patient_id, **{k: v for k, v in thresholds.items() if k != "user_id"})
+
+
+@router.put("/patients/{patient_id}/thresholds", response_model=PatientThresholds)
+async def update_thresholds(
+    patient_id: str,
+    update_data: PatientThresholdsUpdate,
+    current_user: User = Depends(require_clinician)
+):
+    """
+    Update a patient's alert thresholds (Clinician only).
+    
+    - Only the given thresholds change
+    - Takes effect for the next reading on this worker; other workers pick
+      it up via the change stream or within THRESHOLD_CACHE_TTL_SECONDS
+    """
+    if patient_id not in current_user.assigned_patients:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Can only update thresholds of assigned patients"
+        )
+    
+    updates = update_data.model_dump(exclude_none=True)
+    if not updates:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No thresholds given"
+        )
+    
+    current = await get_patient_thresholds(patient_id)
+    if current is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient profile not found"
+        )
+    
+    # Reject ranges that would be inverted after the update
+    merged = PatientThresholds(patient_id=patient_id, **{
+        **{k: v for k, v in current.items() if k in THRESHOLD_FIELD_NAMES},
+        **updates
+    })
+    for vital in ("heart_rate", "systolic_bp", "diastolic_bp", "temperature", "respiratory_rate"):
+        if getattr(merged, f"{vital}_min") > getattr(merged, f"{vital}_max"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{vital}_min must not exceed {vital}_max"
+            )
+    
+    thresholds = await update_patient_thresholds(patient_id, updates)
+    if thresholds is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient profile not found"
+        )
+    
+    return PatientThresholds(patient_id=patient_id, **{k: v for k, v in thresholds.items() if k != "user_id"})
@@ -1,16 +1,42 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from app.schemas.vitals import VitalsCreate, VitalsResponse, VitalsTrendResponse
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from app.schemas.vitals import (
+    VitalsCreate,
+    VitalsResponse,
+    VitalsTrendResponse,
+    VitalsBatchItemResult,
+    VitalsBatchResponse,
+    VitalsSeriesResponse,
+    VitalsSeriesPoint,
+)
 from app.models.user import User
 from app.models.vitals import VitalSigns
-from app.api.deps import get_current_user, require_patient, require_caregiver_or_clinician
-from app.core.database import get_database, VITALS_COLLECTION, PATIENTS_COLLECTION, ALERTS_COLLECTION
-from app.services.vitals_service import check_vitals_anomaly, create_vital_alert
+from app.api.deps import get_current_user, require_patient, require_caregiver_or_clinician, authenticate_token
+from app.core.database import get_database
+from app.core.config import settings
+from app.services.vitals_service import create_vital_alert, ingest_vitals_batch, after_vitals_stored, store_vitals
+from app.services.rule_engine import get_rule_table
+from app.services.stream_hub import vitals_hub
+from app.services.trends_service import get_vitals_trends as compute_vitals_trends
+from app.services.vitals_repository import find_latest_reading, find_readings
+from app.services.rollup_service import RESOLUTIONS, get_vitals_series, describe_counters
+from app.utils.role_check import can_access_patient_data, get_accessible_patient_ids
+from app.utils.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_fields
+from app.utils.json_response import FastJSONResponse, document_rows, response_shape
+from app.services.snapshot_service import get_latest_snapshot, snapshot_to_vitals
 from bson import ObjectId
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Any, Tuple
+import asyncio
+import json
 
 router = APIRouter(prefix="/vitals", tags=["Vital Signs"])
 
+# Fields that can be selected with `fields` on list endpoints
+VITALS_FIELDS = [field.alias or name for name, field in VitalsResponse.model_fields.items()]
+VITALS_SHAPE = response_shape(VitalsResponse)
+
 
 @router.post("", response_model=VitalsResponse, status_code=status.HTTP_201_CREATED)
 async def submit_vitals(
@@ -22,7 +48,7 @@ async def submit_vitals(
     
     - Records vital signs
     - Checks for anomalies
-    - Creates alerts if thresholds exceeded
+    - Creates alerts if thresholds exceeded (stored in the background)
     """
     db = get_database()
     
@@ -36,27 +62,33 @@ async def submit_vitals(
         temperature=vitals_data.temperature,
         respiratory_rate=vitals_data.respiratory_rate,
         measurement_type=vitals_data.measurement_type,
-        notes=vitals_data.notes
+        notes=vitals_data.notes,
+        measured_at=vitals_data.measured_at or datetime.utcnow()
     )
     
-    # Get patient thresholds
-    patient_data = await db[PATIENTS_COLLECTION].find_one({"user_id": current_user.id})
-    
-    # Check for anomalies
-    if patient_data:
-        is_anomaly, anomaly_type, alerts = await check_vitals_anomaly(vitals, patient_data)
+    # Check for anomalies against the patient's cached rule table
+    vitals.id = str(ObjectId())
+    alerts = []
+    rule_table = await get_rule_table(current_user.id, db)
+    if len(rule_table):
+        is_anomaly, anomaly_type, alerts = rule_table.evaluate(vitals)
         vitals.is_anomaly = is_anomaly
         vitals.anomaly_type = anomaly_type
-        
-        # Create alert records if anomalies detected
-        if alerts:
-            for alert in alerts:
-                await db[ALERTS_COLLECTION].insert_one(alert)
+        for alert in alerts:
+            alert["vital_reading_id"] = vitals.id
     
-    # Insert vitals
+    # Insert vitals; alerts are handed to the alert dispatcher
     vitals_dict = vitals.model_dump(by_alias=True, exclude={"id"})
-    result = await db[VITALS_COLLECTION].insert_one(vitals_dict)
-    vitals.id = str(result.inserted_id)
+    vitals_dict["_id"] = ObjectId(vitals.id)
+    inserted, write_error = await store_vitals([vitals_dict], current_user.id, alerts, db)
+    if not inserted:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Could not store vital signs: {write_error}"
+        )
+    
+    # Refresh the snapshot and rollups, then notify live streams
+    await after_vitals_stored([vitals_dict], db)
     
     return VitalsResponse(
         _id=vitals.id,
@@ -75,6 +107,130 @@ async def submit_vitals(
     )
 
 
+def _parse_batch_body(body: bytes, content_type: str) -> List[Tuple[Any, Optional[str]]]:
+    """
+    Split a batch request body into raw items.
+    
+    Accepts a JSON array, or NDJSON (one JSON object per line) when the
+    content type is application/x-ndjson. A malformed NDJSON line becomes
+    a per-item error instead of failing the whole batch.
+    
+    Returns:
+        List of (raw_item, error) tuples
+    """
+    if "ndjson" in content_type:
+        items = []
+        for line in body.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append((json.loads(line), None))
+            except ValueError:
+                items.append((None, "Invalid JSON line"))
+        return items
+    
+    try:
+        payload = json.loads(body or b"[]")
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array or NDJSON"
+        )
+    if not isinstance(payload, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array of readings"
+        )
+    return [(item, None) for item in payload]
+
+
+@router.post(
+    "/batch",
+    response_model=VitalsBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/VitalsCreate"}}
+                },
+                "application/x-ndjson": {
+                    "schema": {"$ref": "#/components/schemas/VitalsCreate"}
+                },
+            },
+        }
+    },
+)
+async def submit_vitals_batch(
+    request: Request,
+    current_user: User = Depends(require_patient)
+):
+    """
+    Submit a batch of vital signs measurements (Patient only).
+    
+    - Accepts a JSON array or NDJSON stream of readings
+    - Thresholds are resolved once and all readings evaluated together
+    - Vitals and alerts are written with bulk inserts
+    - Returns per-item ids or validation errors
+    """
+    raw_items = _parse_batch_body(
+        await request.body(),
+        request.headers.get("content-type", "")
+    )
+    
+    if len(raw_items) > settings.VITALS_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds maximum of {settings.VITALS_BATCH_MAX_SIZE} readings"
+        )
+    
+    db = get_database()
+    
+    # Validate items individually so one bad reading doesn't reject the batch
+    results: List[Optional[VitalsBatchItemResult]] = [None] * len(raw_items)
+    readings = []
+    reading_indexes = []
+    for index, (raw_item, error) in enumerate(raw_items):
+        if error is None:
+            try:
+                vitals_data = VitalsCreate.model_validate(raw_item)
+            except ValidationError as e:
+                error = "; ".join(
+                    f"{'.'.join(str(loc) for loc in err['loc']) or 'item'}: {err['msg']}"
+                    for err in e.errors()
+                )
+        if error is not None:
+            results[index] = VitalsBatchItemResult(index=index, error=error)
+            continue
+        
+        readings.append(VitalSigns(
+            patient_id=current_user.id,
+            heart_rate=vitals_data.heart_rate,
+            systolic_bp=vitals_data.systolic_bp,
+            diastolic_bp=vitals_data.diastolic_bp,
+            oxygen_saturation=vitals_data.oxygen_saturation,
+            temperature=vitals_data.temperature,
+            respiratory_rate=vitals_data.respiratory_rate,
+            measurement_type=vitals_data.measurement_type,
+            notes=vitals_data.notes,
+            measured_at=vitals_data.measured_at or datetime.utcnow()
+        ))
+        reading_indexes.append(index)
+    
+    stored = await ingest_vitals_batch(readings, current_user.id, db)
+    for index, outcome in zip(reading_indexes, stored):
+        results[index] = VitalsBatchItemResult(index=index, **outcome)
+    
+    accepted = sum(1 for result in results if result.error is None)
+    return VitalsBatchResponse(
+        accepted=accepted,
+        rejected=len(results) - accepted,
+        alerts_created=sum(result.alerts_created for result in results),
+        results=results
+    )
+
+
 @router.get("/live", response_model=VitalsResponse)
 async def get_live_vitals(
     patient_id: Optional[str] = Query(None),
@@ -105,11 +261,12 @@ async def get_live_vitals(
             )
         target_patient_id = patient_id
     
-    # Get most recent vitals
-    vitals_data = await db[VITALS_COLLECTION].find_one(
-        {"patient_id": target_patient_id},
-        sort=[("measured_at", -1)]
-    )
+    # Get most recent vitals from the snapshot, falling back to the raw collection
+    snapshot = await get_latest_snapshot(target_patient_id, db)
+    if snapshot:
+        vitals_data = snapshot_to_vitals(snapshot)
+    else:
+        vitals_data = await find_latest_reading(target_patient_id, db)
     
     if not vitals_data:
         raise HTTPException(
@@ -126,16 +283,20 @@ async def get_vitals_history(
     patient_id: Optional[str] = Query(None),
     hours: int = Query(24, ge=1, le=720),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get historical vital signs.
     
-    - Returns vitals from the specified time period
+    - Returns vitals from the specified time period, newest first
     - Patients see their own history
     - Caregivers/Clinicians can specify patient_id
+    - Pages: pass the X-Next-Cursor response header back as `cursor`
+    - `fields` (comma-separated) returns only those fields plus _id and measured_at
     """
-    db = get_database()
+    db = get_database("analytics")
     
     # Determine which patient to query
     if current_user.role == "patient":
@@ -154,38 +315,119 @@ async def get_vitals_history(
             )
         target_patient_id = patient_id
     
+    try:
+        after = decode_cursor(cursor) if cursor else None
+        projection = parse_fields(fields, VITALS_FIELDS, ["_id", "measured_at"])
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     # Calculate time range
     start_time = datetime.utcnow() - timedelta(hours=hours)
     
-    # Query vitals
-    cursor = db[VITALS_COLLECTION].find(
-        {
-            "patient_id": target_patient_id,
-            "measured_at": {"$gte": start_time}
-        }
-    ).sort("measured_at", -1).limit(limit)
+    # Query vitals (only the fields the response contains)
+    readings = await find_readings(
+        target_patient_id,
+        start_time,
+        descending=True,
+        limit=limit,
+        fields=projection or VITALS_FIELDS,
+        after=after,
+        db=db
+    )
     
-    vitals_list = []
-    async for vitals_data in cursor:
-        vitals_data["_id"] = str(vitals_data["_id"])
-        vitals_list.append(VitalsResponse(**vitals_data))
+    # A full page may have a successor
+    headers = {}
+    if len(readings) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(readings[-1]["measured_at"], readings[-1]["_id"])
     
-    return vitals_list
+    # Stored readings already have the response shape: render them directly
+    return FastJSONResponse(document_rows(readings, VITALS_SHAPE, projection), headers=headers)
+
+
+# Upper bound on points returned by /history/series
+MAX_SERIES_POINTS = 5000
+
+
+@router.get("/history/series", response_model=VitalsSeriesResponse)
+async def get_vitals_history_series(
+    patient_id: Optional[str] = Query(None),
+    hours: int = Query(24, ge=1, le=720),
+    resolution: str = Query("1h", regex="^(1m|5m|15m|1h|6h|1d)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get bucketed vital signs history for charting.
+    
+    - Count, average, min, max and standard deviation per vital and bucket
+    - Served from pre-aggregated rollups (1m/1h/1d) where possible
+    - Available resolutions: 1m, 5m, 15m, 1h, 6h, 1d
+    """
+    db = get_database("analytics")
+    
+    # Determine which patient to query
+    if current_user.role == "patient":
+        target_patient_id = current_user.id
+    else:
+        if not patient_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="patient_id is required for caregivers/clinicians"
+            )
+        # Verify access
+        if patient_id not in current_user.assigned_patients:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this patient's data"
+            )
+        target_patient_id = patient_id
+    
+    resolution_seconds = RESOLUTIONS[resolution]
+    if hours * 3600 // resolution_seconds > MAX_SERIES_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many points requested (max {MAX_SERIES_POINTS}); use a coarser resolution"
+        )
+    
+    start_time = datetime.utcnow() - timedelta(hours=hours)
+    source, buckets = await get_vitals_series(target_patient_id, start_time, resolution_seconds, db)
+    
+    return VitalsSeriesResponse(
+        patient_id=target_patient_id,
+        resolution=resolution,
+        source=source,
+        points=[
+            VitalsSeriesPoint(
+                start=bucket["start"],
+                count=bucket["count"],
+                vitals={
+                    field: describe_counters(stats)
+                    for field, stats in bucket["vitals"].items()
+                }
+            )
+            for bucket in buckets
+        ]
+    )
 
 
 @router.get("/trends", response_model=List[VitalsTrendResponse])
 async def get_vitals_trends(
     patient_id: Optional[str] = Query(None),
     period: str = Query("24h", regex="^(24h|7d|30d)$"),
+    bucket: Optional[str] = Query(None, regex="^(hour|day)$"),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get vital signs trends and statistics.
     
-    - Calculates averages, min, max for each vital type
+    - Average, min, max, standard deviation and percentiles for all six vitals
+    - Trend direction from a least-squares slope
+    - Optional hourly/daily series for charting
     - Available periods: 24h, 7d, 30d
     """
-    db = get_database()
+    db = get_database("analytics")
     
     # Determine which patient to query
     if current_user.role == "patient":
@@ -196,49 +438,140 @@ async def get_vitals_trends(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="patient_id is required for caregivers/clinicians"
             )
+        # Verify access
+        if patient_id not in current_user.assigned_patients:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this patient's data"
+            )
         target_patient_id = patient_id
     
     # Calculate time range
     period_map = {"24h": 24, "7d": 168, "30d": 720}
     hours = period_map.get(period, 24)
-    start_time = datetime.utcnow() - timedelta(hours=hours)
     
-    # Aggregate vitals data
-    pipeline = [
-        {
-            "$match": {
-                "patient_id": target_patient_id,
-                "measured_at": {"$gte": start_time}
-            }
-        },
-        {
-            "$group": {
-                "_id": None,
-                "avg_heart_rate": {"$avg": "$heart_rate"},
-                "min_heart_rate": {"$min": "$heart_rate"},
-                "max_heart_rate": {"$max": "$heart_rate"},
-                "count": {"$sum": 1}
-            }
-        }
+    trends = await compute_vitals_trends(target_patient_id, period, hours, bucket, db)
+    
+    return [
+        VitalsTrendResponse(**trend.model_dump(exclude={"patient_id", "calculated_at"}))
+        for trend in trends
     ]
+
+
+def _stream_patient_ids(user: User, patient_id: Optional[str]) -> List[str]:
+    """
+    Resolve which patients a live-stream subscriber may receive.
+    
+    Raises:
+        HTTPException: If the user may not access the requested patient
+    """
+    if patient_id:
+        if not can_access_patient_data(user.role, user.id, patient_id, user.assigned_patients):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this patient's data"
+            )
+        return [patient_id]
+    
+    patient_ids = get_accessible_patient_ids(user.role, user.id, user.assigned_patients)
+    if not patient_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No patients available to stream"
+        )
+    return patient_ids
+
+
+@router.websocket("/stream")
+async def stream_vitals_ws(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    patient_id: Optional[str] = Query(None)
+):
+    """
+    Live vitals over WebSocket.
+    
+    - Authenticate with ?token=<jwt> or an Authorization: Bearer header
+    - Patients receive their own readings
+    - Caregivers/Clinicians receive assigned patients (or one patient_id)
+    """
+    if token is None:
+        authorization = websocket.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            token = authorization[7:]
     
-    result = await db[VITALS_COLLECTION].aggregate(pipeline).to_list(length=1)
+    # Authorize once at connect
+    try:
+        if not token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+        user = await authenticate_token(token)
+        patient_ids = _stream_patient_ids(user, patient_id)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
     
-    if not result:
-        return []
+    await websocket.accept()
+    subscription = vitals_hub.subscribe(patient_ids)
     
-    data = result[0]
-    trends = []
+    async def send_events():
+        while True:
+            event = await subscription.next_event(settings.STREAM_KEEPALIVE_SECONDS)
+            if subscription.closed:
+                return
+            await websocket.send_json(event if event is not None else {"type": "keepalive"})
     
-    if data.get("avg_heart_rate"):
-        trends.append(VitalsTrendResponse(
-            vital_type="heart_rate",
-            average=data["avg_heart_rate"],
-            min_value=data["min_heart_rate"],
-            max_value=data["max_heart_rate"],
-            trend="stable",
-            data_points=data["count"],
-            period=period
-        ))
+    async def receive_until_disconnect():
+        while True:
+            await websocket.receive_text()
     
-    return trends
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(receive_until_disconnect())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+        if subscription.closed:
+            # Slow consumer disconnected by the drop policy
+            await websocket.close(code=1013, reason="Subscriber too slow")
+    finally:
+        vitals_hub.unsubscribe(subscription)
+
+
+@router.get("/stream/sse")
+async def stream_vitals_sse(
+    request: Request,
+    patient_id: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Live vitals as Server-Sent Events.
+    
+    - Same access rules as the WebSocket stream
+    - Sends a keepalive comment when idle
+    """
+    patient_ids = _stream_patient_ids(current_user, patient_id)
+    
+    async def events():
+        subscription = vitals_hub.subscribe(patient_ids)
+        try:
+            yield "retry: 3000\n\n"
+            while not subscription.closed:
+                event = await subscription.next_event(settings.STREAM_KEEPALIVE_SECONDS)
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    if not subscription.closed:
+                        yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            vitals_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
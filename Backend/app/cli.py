@@ -0,0 +1,242 @@
+"""
+HyperWatch maintenance commands.
+
+Usage:
+    python -m app.cli indexes --check
+    python -m app.cli indexes [--drop-changed]
+    python -m app.cli snapshots rebuild [--patient ID ...]
+    python -m app.cli vitals migrate [--batch-size N]
+    python -m app.cli rollups backfill [--patient ID ...] [--since YYYY-MM-DD] [--tier 1m|1h|1d ...]
+    python -m app.cli generate [--patients N] [--days N] [--interval-seconds N] [--workers N]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database, VITALS_COLLECTION
+from app.core.config import settings
+from app.core.indexes import check_indexes, ensure_indexes
+from app.services.snapshot_service import rebuild_latest_vitals
+from app.services.rollup_service import ROLLUP_TIERS, backfill_rollups
+from app.services.data_generator import SYNTHETIC_PASSWORD, create_population, generate_vitals
+from app.services.vitals_repository import ensure_vitals_collection, insert_readings, vitals_collection_name
+
+
+async def run_indexes(args: argparse.Namespace) -> int:
+    """
+    Report or build the declared indexes.
+
+    Returns:
+        Exit code (1 in check mode when indexes are missing or changed)
+    """
+    db = get_database()
+
+    if args.check:
+        report = await check_indexes(db)
+        out_of_date = False
+        for collection_name, diff in report.items():
+            print(f"{collection_name}:")
+            for state in ("missing", "changed", "extra"):
+                for name in diff[state]:
+                    print(f"  {state:<8} {name}")
+            if diff["missing"] or diff["changed"]:
+                out_of_date = True
+            elif not diff["extra"]:
+                print("  up to date")
+        return 1 if out_of_date else 0
+
+    # Indexes must not implicitly create the time-series collection as a plain one
+    await ensure_vitals_collection(db)
+    created = await ensure_indexes(db, drop_changed=args.drop_changed)
+    if not created:
+        print("All declared indexes already exist")
+    for collection_name, names in created.items():
+        for name in names:
+            print(f"Built {collection_name}.{name}")
+    return 0
+
+
+async def run_snapshots(args: argparse.Namespace) -> int:
+    """Rebuild latest-vitals snapshots from the raw vitals collection."""
+    written = await rebuild_latest_vitals(args.patient or None, get_database())
+    print(f"Rebuilt {written} latest-vitals snapshots")
+    return 0
+
+
+async def run_vitals(args: argparse.Namespace) -> int:
+    """
+    Copy readings from the standard collection into the configured layout.
+
+    Meant to be run once against an empty target after changing
+    VITALS_STORAGE_MODE; re-running it duplicates readings.
+    """
+    if settings.VITALS_STORAGE_MODE == "standard":
+        print("VITALS_STORAGE_MODE is standard; nothing to migrate")
+        return 1
+
+    db = get_database()
+    await ensure_vitals_collection(db)
+
+    copied = 0
+    batch = []
+    cursor = db[VITALS_COLLECTION].find().sort([("patient_id", 1), ("measured_at", 1)])
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= args.batch_size:
+            inserted, error = await insert_readings(batch, db)
+            copied += inserted
+            if error:
+                print(f"Stopped after {copied} readings: {error}")
+                return 1
+            batch = []
+    if batch:
+        inserted, error = await insert_readings(batch, db)
+        copied += inserted
+        if error:
+            print(f"Stopped after {copied} readings: {error}")
+            return 1
+
+    print(f"Copied {copied} readings into {vitals_collection_name()}")
+    return 0
+
+
+async def run_rollups(args: argparse.Namespace) -> int:
+    """Recompute vitals rollup buckets from the raw vitals collection."""
+    rebuilt = await backfill_rollups(args.patient or None, args.since, args.tier or None, get_database())
+    for tier in rebuilt:
+        print(f"Backfilled {tier} rollups")
+    return 0
+
+
+def _generate_options(args: argparse.Namespace, start: datetime, end: datetime) -> dict:
+    return {
+        "start": start,
+        "end": end,
+        "interval_seconds": args.interval_seconds,
+        "anomaly_rate": args.anomaly_rate,
+        "gap_rate": args.gap_rate,
+        "batch_size": args.batch_size,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+    }
+
+
+def _generate_worker(population: list, options: dict) -> tuple:
+    """Write one slice of the patients' vitals from a worker process."""
+    async def work():
+        await connect_to_mongo()
+        try:
+            return await generate_vitals(population, **options)
+        finally:
+            await close_mongo_connection()
+    return asyncio.run(work())
+
+
+async def run_generate(args: argparse.Namespace) -> int:
+    """
+    Generate synthetic users, patients, vitals and alerts.
+
+    With --workers > 1 the patients are split over worker processes, each
+    with its own connection pool, so generation is not bound to one core.
+    """
+    db = get_database()
+    await ensure_vitals_collection(db)
+    end = args.end or datetime.utcnow()
+    start = end - timedelta(days=args.days)
+    expected = int(args.patients * args.days * 86400 / args.interval_seconds)
+    print(f"Generating {args.patients} patients x {args.days:g} days at {args.interval_seconds:g}s (~{expected:,} readings)")
+
+    population = await create_population(args.patients, args.caregivers, args.clinicians, args.seed, db)
+    print(f"Created {args.patients} patients, {args.caregivers} caregivers, {args.clinicians} clinicians (password {SYNTHETIC_PASSWORD})")
+
+    started = time.monotonic()
+    options = _generate_options(args, start, end)
+    if args.workers > 1:
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = await asyncio.gather(*(
+                loop.run_in_executor(pool, _generate_worker, population[i::args.workers], options)
+                for i in range(args.workers)
+            ))
+        readings = sum(r for r, _ in results)
+        alerts = sum(a for _, a in results)
+    else:
+        last_report = [0.0]
+
+        def progress(readings: int, alerts: int):
+            if time.monotonic() - last_report[0] >= 5:
+                last_report[0] = time.monotonic()
+                print(f"  {readings:,} readings, {alerts:,} alerts")
+
+        readings, alerts = await generate_vitals(population, **options, db=db, progress=progress)
+    elapsed = time.monotonic() - started
+    print(f"Stored {readings:,} readings and {alerts:,} alerts in {elapsed:.0f}s ({readings / max(elapsed, 1e-9):,.0f} readings/s)")
+
+    if not args.skip_derived:
+        patient_ids = [patient["patient_id"] for patient in population]
+        written = await rebuild_latest_vitals(patient_ids, db)
+        print(f"Rebuilt {written} latest-vitals snapshots")
+        if settings.VITALS_ROLLUPS_ENABLED:
+            for tier in await backfill_rollups(patient_ids, start, None, db):
+                print(f"Backfilled {tier} rollups")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="HyperWatch maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    indexes = subparsers.add_parser("indexes", help="Check or build MongoDB indexes")
+    indexes.add_argument("--check", action="store_true", help="Only report differences, build nothing")
+    indexes.add_argument("--drop-changed", action="store_true", help="Rebuild indexes whose definition changed")
+    indexes.set_defaults(handler=run_indexes)
+
+    snapshots = subparsers.add_parser("snapshots", help="Manage latest-vitals snapshots")
+    snapshots.add_argument("action", choices=["rebuild"])
+    snapshots.add_argument("--patient", action="append", help="Patient user id (repeatable, default: all)")
+    snapshots.set_defaults(handler=run_snapshots)
+
+    vitals = subparsers.add_parser("vitals", help="Manage raw vitals storage")
+    vitals.add_argument("action", choices=["migrate"])
+    vitals.add_argument("--batch-size", type=int, default=1000, help="Readings per write (default: 1000)")
+    vitals.set_defaults(handler=run_vitals)
+
+    rollups = subparsers.add_parser("rollups", help="Manage vitals rollup tiers")
+    rollups.add_argument("action", choices=["backfill"])
+    rollups.add_argument("--patient", action="append", help="Patient user id (repeatable, default: all)")
+    rollups.add_argument("--since", type=datetime.fromisoformat, help="Start date (UTC, aligned to the day)")
+    rollups.add_argument("--tier", action="append", choices=list(ROLLUP_TIERS), help="Tier to rebuild (repeatable, default: all)")
+    rollups.set_defaults(handler=run_rollups)
+
+    generate = subparsers.add_parser("generate", help="Generate synthetic users, patients, vitals and alerts")
+    generate.add_argument("--patients", type=int, default=100)
+    generate.add_argument("--caregivers", type=int, default=10)
+    generate.add_argument("--clinicians", type=int, default=5)
+    generate.add_argument("--days", type=float, default=30, help="Length of each patient's history (default: 30)")
+    generate.add_argument("--end", type=datetime.fromisoformat, help="End of the history (UTC, default: now)")
+    generate.add_argument("--interval-seconds", type=float, default=300, help="Mean spacing of readings (default: 300)")
+    generate.add_argument("--anomaly-rate", type=float, default=0.5, help="Anomaly episodes per patient per day (default: 0.5)")
+    generate.add_argument("--gap-rate", type=float, default=0.1, help="Device gaps per patient per day (default: 0.1)")
+    generate.add_argument("--batch-size", type=int, default=5000, help="Readings per insert (default: 5000)")
+    generate.add_argument("--concurrency", type=int, default=8, help="Inserts in flight per worker (default: 8)")
+    generate.add_argument("--workers", type=int, default=1, help="Generator processes (default: 1)")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--skip-derived", action="store_true", help="Do not rebuild snapshots and rollups afterwards")
+    generate.set_defaults(handler=run_generate)
+
+    return parser
+
+
+async def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    await connect_to_mongo()
+    try:
+        return await args.handler(args)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Literal
 
 
 class Settings(BaseSettings):
@@ -9,12 +9,107 @@ class Settings(BaseSettings):
     # MongoDB Configuration
     MONGO_URI: str = "mongodb://localhost:27017/hyperwatch"
     MONGO_DB_NAME: str = "hyperwatch"
+    MONGO_ENSURE_INDEXES: bool = True  # Build missing indexes on startup
+    
+    # MongoDB Connection Pool (per worker process and server)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 1
+    MONGO_MAX_CONNECTING: int = 2  # Connections being established concurrently
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None  # Close idle connections after this
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = 5000  # Fail requests waiting longer for a connection
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    # Wire compression, in order of preference, e.g. "zstd,snappy,zlib"
+    # (zstd needs the zstandard package, snappy needs python-snappy)
+    MONGO_COMPRESSORS: str = ""
+    MONGO_ZLIB_COMPRESSION_LEVEL: int = -1
+    
+    # Read routing per query class; ingest, auth and writes always use the primary.
+    # Reads from secondaries may lag the latest writes by the replication delay.
+    MONGO_READ_PREFERENCE_DASHBOARD: Literal["primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"] = "primary"
+    MONGO_READ_PREFERENCE_ANALYTICS: Literal["primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"] = "primary"
+    MONGO_MAX_STALENESS_SECONDS: Optional[int] = None  # For non-primary reads (>= 90)
     
     # JWT Configuration
     JWT_SECRET: str = "CHANGE_ME_TO_A_SECURE_RANDOM_STRING"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 60
     
+    # Password Hashing (bcrypt runs on a thread pool, off the event loop)
+    PASSWORD_HASH_ROUNDS: int = 12  # Changing it rehashes passwords on next login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Waiting hash/verify calls before 503
+    
+    # Authorization: "lookup" loads the user on each request (cached for
+    # USER_CACHE_TTL_SECONDS); "claims" authorizes from token claims plus
+    # the assignment cache, without reading the users collection
+    AUTH_TOKEN_MODE: Literal["lookup", "claims"] = "lookup"
+    ASSIGNMENT_CACHE_TTL_SECONDS: int = 60
+    ASSIGNMENT_CACHE_MAX_SIZE: int = 10000
+    TOKEN_DENYLIST_REFRESH_SECONDS: float = 5.0  # Revocations reach other workers within this
+    
+    # Authentication Caches (per worker process)
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    
+    # Patient thresholds and compiled alert rule tables (per worker process)
+    THRESHOLD_CACHE_TTL_SECONDS: int = 60
+    THRESHOLD_CACHE_MAX_SIZE: int = 10000
+    RULE_TABLE_CACHE_TTL_SECONDS: int = 60
+    RULE_TABLE_CACHE_MAX_SIZE: int = 10000
+    # local: each worker invalidates on its own writes (other workers catch up
+    # within the TTL); change_stream: all workers follow a change stream
+    THRESHOLD_INVALIDATION: Literal["local", "change_stream"] = "local"
+    
+    # Dashboard responses (per worker process; local writes invalidate at once)
+    DASHBOARD_CACHE_TTL_SECONDS: int = 10
+    DASHBOARD_CACHE_MAX_SIZE: int = 10000
+    # Dashboard sub-queries run concurrently; a slow one is dropped and the
+    # dashboard is returned flagged as degraded (and not cached)
+    DASHBOARD_QUERY_CONCURRENCY: int = 4
+    DASHBOARD_QUERY_TIMEOUT_SECONDS: float = 2.0
+    
+    # Vitals Ingest
+    VITALS_BATCH_MAX_SIZE: int = 500
+    
+    # Alert Dispatch
+    # background: ingest stages alerts in an outbox and a worker stores them
+    # in batches; inline: alerts are stored within the ingest request
+    ALERT_DISPATCH_MODE: Literal["background", "inline"] = "background"
+    ALERT_DISPATCH_QUEUE_SIZE: int = 10000
+    ALERT_DISPATCH_BATCH_SIZE: int = 200
+    ALERT_DISPATCH_FLUSH_SECONDS: float = 0.05
+    ALERT_OUTBOX_SWEEP_SECONDS: int = 30
+    ALERT_OUTBOX_REPLAY_AFTER_SECONDS: int = 30  # Outbox entries older than this are swept
+    
+    # Alert Suppression: repeats of an open alert (same patient, vital and
+    # threshold crossed) within the window are folded into it; 0 disables
+    ALERT_SUPPRESSION_WINDOW_SECONDS: int = 900
+    ALERT_SUPPRESSION_MAX_SECONDS: int = 21600  # An alert open this long stops absorbing repeats
+    ALERT_OPEN_INDEX_MAX_SIZE: int = 100000
+    
+    # Vitals Storage Layout
+    # standard: one document per reading ("vitals")
+    # timeseries: MongoDB time-series collection ("vitals_ts", MongoDB 5.0+)
+    # bucketed: one document per patient-hour with column arrays ("vitals_buckets")
+    VITALS_STORAGE_MODE: Literal["standard", "timeseries", "bucketed"] = "standard"
+    VITALS_TIMESERIES_GRANULARITY: Literal["seconds", "minutes", "hours"] = "seconds"
+    
+    # Vitals Rollups (minute/hour/day pre-aggregates)
+    VITALS_ROLLUPS_ENABLED: bool = True
+    VITALS_ROLLUP_1M_RETENTION_DAYS: int = 35
+    
+    # Live Streaming (WebSocket/SSE)
+    STREAM_QUEUE_SIZE: int = 100  # Buffered events per subscriber
+    STREAM_DROP_POLICY: Literal["drop_oldest", "disconnect"] = "drop_oldest"
+    STREAM_KEEPALIVE_SECONDS: int = 15
+    # "local" publishes readings ingested by this worker; "change_stream"
+    # relays every insert via a MongoDB change stream (replica set required)
+    STREAM_SOURCE: Literal["local", "change_stream"] = "local"
+    
+    # Metrics (GET /metrics, Prometheus text format, per worker process)
+    METRICS_ENABLED: bool = True
+    
     # CORS Configuration
     FRONTEND_URL: str = "http://localhost:3000"
     
@@ -1,22 +1,77 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import read_preferences
 from app.core.config import settings
-from typing import Optional
+from app.core.pool_monitor import pool_monitor
+from app.core.metrics import command_metrics
+from typing import Optional, Dict, Any
 
 # Global database client
 mongo_client: Optional[AsyncIOMotorClient] = None
 
 
+# Read preference setting per query class; other reads use the primary
+READ_PREFERENCE_SETTINGS = {
+    "dashboard": "MONGO_READ_PREFERENCE_DASHBOARD",  # Role dashboards, patient overviews
+    "analytics": "MONGO_READ_PREFERENCE_ANALYTICS",  # History, series and trends
+}
+
+_READ_PREFERENCE_CLASSES = {
+    "primaryPreferred": read_preferences.PrimaryPreferred,
+    "secondary": read_preferences.Secondary,
+    "secondaryPreferred": read_preferences.SecondaryPreferred,
+    "nearest": read_preferences.Nearest,
+}
+
+
+def client_options() -> Dict[str, Any]:
+    """
+    MongoClient options built from the connection settings.
+    
+    Returns:
+        Keyword arguments for AsyncIOMotorClient
+    """
+    options: Dict[str, Any] = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxConnecting": settings.MONGO_MAX_CONNECTING,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [pool_monitor, command_metrics] if settings.METRICS_ENABLED else [pool_monitor],
+    }
+    if settings.MONGO_MAX_IDLE_TIME_MS is not None:
+        options["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+    if settings.MONGO_WAIT_QUEUE_TIMEOUT_MS is not None:
+        options["waitQueueTimeoutMS"] = settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    compressors = [name.strip() for name in settings.MONGO_COMPRESSORS.split(",") if name.strip()]
+    if compressors:
+        options["compressors"] = compressors
+        if "zlib" in compressors:
+            options["zlibCompressionLevel"] = settings.MONGO_ZLIB_COMPRESSION_LEVEL
+    return options
+
+
+def read_preference_for(query_class: str):
+    """
+    Read preference configured for a query class.
+    
+    Returns:
+        PyMongo read preference, or None for the primary
+    """
+    setting = READ_PREFERENCE_SETTINGS.get(query_class)
+    mode = getattr(settings, setting) if setting else "primary"
+    if mode == "primary":
+        return None
+    max_staleness = settings.MONGO_MAX_STALENESS_SECONDS or -1
+    return _READ_PREFERENCE_CLASSES[mode](max_staleness=max_staleness)
+
+
 async def connect_to_mongo():
     """
     Connect to MongoDB on application startup.
     """
     global mongo_client
     try:
-        mongo_client = AsyncIOMotorClient(
-            settings.MONGO_URI,
-            maxPoolSize=10,
-            minPoolSize=1,
-        )
+        pool_monitor.reset()
+        mongo_client = AsyncIOMotorClient(settings.MONGO_URI, **client_options())
         # Verify connection
         await mongo_client.admin.command('ping')
         print(f"✅ Connected to MongoDB: {settings.MONGO_DB_NAME}")
@@ -35,16 +90,24 @@ async def close_mongo_connection():
         print("🔌 Closed MongoDB connection")
 
 
-def get_database() -> AsyncIOMotorDatabase:
+def get_database(query_class: str = "default") -> AsyncIOMotorDatabase:
     """
     Get the MongoDB database instance.
     
+    Args:
+        query_class: Kind of reads the caller performs ("dashboard",
+            "analytics"); selects the configured read preference. Writes
+            and other reads use the primary.
+    
     Returns:
         AsyncIOMotorDatabase: MongoDB database
     """
     if not mongo_client:
         raise Exception("Database not initialized. Call connect_to_mongo() first.")
-    return mongo_client[settings.MONGO_DB_NAME]
+    read_preference = read_preference_for(query_class)
+    if read_preference is None:
+        return mongo_client[settings.MONGO_DB_NAME]
+    return mongo_client.get_database(settings.MONGO_DB_NAME, read_preference=read_preference)
 
 
 # Collection names
@@ -52,3 +115,23 @@ USERS_COLLECTION = "users"
 PATIENTS_COLLECTION = "patients"
 VITALS_COLLECTION = "vitals"
 ALERTS_COLLECTION = "alerts"
+ALERT_RULES_COLLECTION = "alert_rules"
+ALERT_OUTBOX_COLLECTION = "alert_outbox"  # Alerts raised by ingest, pending dispatch
+TOKEN_DENYLIST_COLLECTION = "token_denylist"  # Revoked access tokens until they expire
+VITALS_TIMESERIES_COLLECTION = "vitals_ts"  # VITALS_STORAGE_MODE=timeseries
+VITALS_BUCKETS_COLLECTION = "vitals_buckets"  # VITALS_STORAGE_MODE=bucketed
+LATEST_VITALS_COLLECTION = "latest_vitals"  # One snapshot per patient, _id = patient user id
+
+# Collection holding raw readings for each VITALS_STORAGE_MODE
+VITALS_STORAGE_COLLECTIONS = {
+    "standard": VITALS_COLLECTION,
+    "timeseries": VITALS_TIMESERIES_COLLECTION,
+    "bucketed": VITALS_BUCKETS_COLLECTION,
+}
+
+# Pre-aggregated vitals per patient and time bucket, by tier
+VITALS_ROLLUP_COLLECTIONS = {
+    "1m": "vitals_rollup_1m",
+    "1h": "vitals_rollup_1h",
+    "1d": "vitals_rollup_1d",
+}
@@ -0,0 +1,213 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from app.core.config import settings
+from app.core.database import (
+    USERS_COLLECTION,
+    PATIENTS_COLLECTION,
+    ALERTS_COLLECTION,
+    ALERT_RULES_COLLECTION,
+    ALERT_OUTBOX_COLLECTION,
+    TOKEN_DENYLIST_COLLECTION,
+    VITALS_ROLLUP_COLLECTIONS,
+    VITALS_STORAGE_COLLECTIONS,
+)
+from typing import Dict, List, Any
+
+# Declared indexes per collection.
+# Every query path in the API routes should be backed by one of these.
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    USERS_COLLECTION: [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        # Caregivers/clinicians notified about a patient's alerts
+        IndexModel([("assigned_patients", ASCENDING)], name="assigned_patients"),
+    ],
+    PATIENTS_COLLECTION: [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    ALERTS_COLLECTION: [
+        # Alert lists sorted by recency (_id breaks ties for cursor paging)
+        IndexModel(
+            [("patient_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="patient_created_at_id",
+        ),
+        # Unread alert lists and counts
+        IndexModel(
+            [("patient_id", ASCENDING), ("is_read", ASCENDING), ("created_at", DESCENDING)],
+            name="patient_is_read_created_at",
+        ),
+        # Recent critical alerts on the clinician dashboard
+        IndexModel(
+            [("patient_id", ASCENDING), ("alert_type", ASCENDING), ("created_at", DESCENDING)],
+            name="patient_alert_type_created_at",
+        ),
+        # Unresolved critical alert counts (small, partial)
+        IndexModel(
+            [("patient_id", ASCENDING), ("alert_type", ASCENDING)],
+            name="unresolved_critical",
+            partialFilterExpression={"alert_type": "critical", "is_resolved": False},
+        ),
+    ],
+    ALERT_RULES_COLLECTION: [
+        # Active rules compiled into a patient's rule table
+        IndexModel(
+            [("patient_id", ASCENDING), ("is_active", ASCENDING)],
+            name="patient_is_active",
+        ),
+    ],
+    ALERT_OUTBOX_COLLECTION: [
+        # Sweep of entries left undelivered
+        IndexModel([("created_at", ASCENDING)], name="created_at"),
+    ],
+    TOKEN_DENYLIST_COLLECTION: [
+        # Entries added since a worker's last poll
+        IndexModel([("created_at", ASCENDING)], name="created_at"),
+        # Entries are dropped once the tokens they cover have expired
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    **{
+        collection_name: [
+            IndexModel(
+                [("patient_id", ASCENDING), ("bucket_start", ASCENDING)],
+                name="patient_bucket_start",
+            ),
+        ]
+        for collection_name in VITALS_ROLLUP_COLLECTIONS.values()
+    },
+}
+
+# Raw readings, declared for the configured storage layout only
+VITALS_INDEXES: Dict[str, List[IndexModel]] = {
+    "standard": [
+        # Latest reading, history ranges/pages and trends for a patient
+        IndexModel(
+            [("patient_id", ASCENDING), ("measured_at", DESCENDING), ("_id", DESCENDING)],
+            name="patient_measured_at_id",
+        ),
+        # Clinician dashboard anomaly counts
+        IndexModel(
+            [("patient_id", ASCENDING), ("is_anomaly", ASCENDING), ("measured_at", DESCENDING)],
+            name="patient_anomaly_measured_at",
+        ),
+    ],
+    "timeseries": [
+        # Secondary index on metaField + timeField for latest/range queries
+        IndexModel(
+            [("patient_id", ASCENDING), ("measured_at", DESCENDING)],
+            name="patient_measured_at",
+        ),
+    ],
+    "bucketed": [
+        IndexModel(
+            [("patient_id", ASCENDING), ("bucket_start", DESCENDING)],
+            name="patient_bucket_start",
+        ),
+    ],
+}
+INDEX_REGISTRY[VITALS_STORAGE_COLLECTIONS[settings.VITALS_STORAGE_MODE]] = VITALS_INDEXES[settings.VITALS_STORAGE_MODE]
+
+# Minute rollups are only kept for a limited time
+INDEX_REGISTRY[VITALS_ROLLUP_COLLECTIONS["1m"]].append(
+    IndexModel(
+        [("bucket_start", ASCENDING)],
+        name="bucket_start_ttl",
+        expireAfterSeconds=settings.VITALS_ROLLUP_1M_RETENTION_DAYS * 86400,
+    )
+)
+
+# Options that must match for an existing index to count as up to date
+_COMPARED_OPTIONS = ("unique", "partialFilterExpression", "expireAfterSeconds", "sparse")
+
+
+def _declared_spec(index: IndexModel) -> Dict[str, Any]:
+    """Return the comparable part of a declared index."""
+    document = index.document
+    spec = {"key": list(document["key"].items())}
+    for option in _COMPARED_OPTIONS:
+        if option in document:
+            spec[option] = document[option]
+    return spec
+
+
+def _existing_spec(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the comparable part of an index reported by index_information()."""
+    spec = {"key": [(field, direction) for field, direction in info["key"]]}
+    for option in _COMPARED_OPTIONS:
+        if option in info:
+            spec[option] = info[option]
+    return spec
+
+
+def _in_background(index: IndexModel) -> IndexModel:
+    """Return a copy of a declared index flagged for a background build."""
+    options = {option: value for option, value in index.document.items() if option != "key"}
+    options["background"] = True
+    return IndexModel(list(index.document["key"].items()), **options)
+
+
+async def check_indexes(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Diff declared indexes against the indexes present in the database.
+
+    Args:
+        db: MongoDB database
+
+    Returns:
+        Per-collection report with "missing", "changed" and "extra" index names
+    """
+    report = {}
+
+    for collection_name, indexes in INDEX_REGISTRY.items():
+        existing = await db[collection_name].index_information()
+        existing.pop("_id_", None)
+
+        missing, changed = [], []
+        for index in indexes:
+            name = index.document["name"]
+            if name not in existing:
+                missing.append(name)
+            elif _existing_spec(existing[name]) != _declared_spec(index):
+                changed.append(name)
+
+        declared_names = {index.document["name"] for index in indexes}
+        extra = sorted(name for name in existing if name not in declared_names)
+
+        report[collection_name] = {"missing": missing, "changed": changed, "extra": extra}
+
+    return report
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase, drop_changed: bool = False) -> Dict[str, List[str]]:
+    """
+    Create any declared index that does not exist yet.
+
+    Builds are requested with background=True; MongoDB 4.2+ ignores the
+    flag and always uses a non-blocking build, older servers honour it.
+
+    Args:
+        db: MongoDB database
+        drop_changed: Drop and rebuild indexes whose definition changed
+
+    Returns:
+        Names of indexes created per collection
+    """
+    report = await check_indexes(db)
+    created = {}
+
+    for collection_name, indexes in INDEX_REGISTRY.items():
+        diff = report[collection_name]
+        to_build = set(diff["missing"])
+
+        if drop_changed:
+            for name in diff["changed"]:
+                await db[collection_name].drop_index(name)
+            to_build.update(diff["changed"])
+
+        pending = [
+            _in_background(index)
+            for index in indexes
+            if index.document["name"] in to_build
+        ]
+        if pending:
+            created[collection_name] = await db[collection_name].create_indexes(pending)
+
+    return created
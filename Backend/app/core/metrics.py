@@ -0,0 +1,296 @@
+from abc import ABC, abstractmethod
+from pymongo import monitoring
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """
+    Base class of in-process metrics rendered in the Prometheus text format.
+
+    Values are kept per worker process; Prometheus aggregates across
+    workers when each one is scraped (or summed by the query).
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, LabelValues, float, Tuple[str, ...]]]:
+        """(suffix, label values, value, extra label names/values) tuples."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, values, value, extra in self.samples():
+            names = self.labelnames + extra[0::2]
+            all_values = values + extra[1::2]
+            lines.append(f"{self.name}{suffix}{_format_labels(names, all_values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count (name it with a _total suffix)."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [("", key, value, ()) for key, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [("", key, value, ()) for key, value in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for index, bound in enumerate(self.buckets):
+                    cumulative += state[index]
+                    samples.append(("_bucket", key, cumulative, ("le", _format_value(bound))))
+                samples.append(("_sum", key, state[-2], ()))
+                samples.append(("_count", key, state[-1], ()))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """Metric whose values are read from a function at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        labelnames: Iterable[str],
+        collect: Callable[[], Dict[LabelValues, float]]
+    ):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.collect = collect
+
+    def samples(self):
+        return [("", tuple(str(v) for v in key), value, ()) for key, value in sorted(self.collect().items())]
+
+
+class Registry:
+    """Ordered set of metrics rendered together by /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code", ["method", "route", "status"]
+))
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route"]
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being served"
+))
+MONGO_COMMAND_DURATION = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection and command", ["collection", "command"]
+))
+MONGO_COMMAND_FAILURES = registry.register(Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands by collection and command", ["collection", "command"]
+))
+READINGS_INGESTED = registry.register(Counter(
+    "vitals_readings_ingested_total", "Vital sign readings stored"
+))
+ALERTS_CREATED = registry.register(Counter(
+    "alerts_created_total", "Alerts stored as new documents", ["source"]
+))
+ALERTS_SUPPRESSED = registry.register(Counter(
+    "alerts_suppressed_total", "Alert repeats folded into an open alert"
+))
+PASSWORD_HASH_WAIT = registry.register(Histogram(
+    "password_hash_queue_wait_seconds", "Time password hash/verify calls waited for a worker thread"
+))
+PASSWORD_HASH_DURATION = registry.register(Histogram(
+    "password_hash_duration_seconds", "Password hash/verify time on the worker thread", ["operation"]
+))
+PASSWORD_HASH_REJECTED = registry.register(Counter(
+    "password_hash_rejected_total", "Password hash/verify calls rejected because the queue was full"
+))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, latency and in-flight requests.
+
+    Requests are labelled with the route template (e.g. /alerts/{alert_id})
+    rather than the raw path to keep label cardinality bounded.
+    """
+
+    def __init__(self, app, skip_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method=scope["method"], route=route_path)
+            HTTP_REQUESTS.inc(method=scope["method"], route=route_path, status=status_code)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """PyMongo command listener feeding the MongoDB command metrics."""
+
+    # Connection handshake and session housekeeping commands
+    IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions", "buildinfo", "buildInfo"}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[int, Any], str] = {}
+
+    def started(self, event) -> None:
+        if event.command_name in self.IGNORED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        with self._lock:
+            self._pending[(event.request_id, event.connection_id)] = collection if isinstance(collection, str) else ""
+
+    def _finish(self, event) -> Optional[str]:
+        with self._lock:
+            return self._pending.pop((event.request_id, event.connection_id), None)
+
+    def succeeded(self, event) -> None:
+        collection = self._finish(event)
+        if collection is not None:
+            MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, collection=collection, command=event.command_name)
+
+    def failed(self, event) -> None:
+        collection = self._finish(event)
+        if collection is not None:
+            MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, collection=collection, command=event.command_name)
+            MONGO_COMMAND_FAILURES.inc(collection=collection, command=event.command_name)
+
+
+# Global listener registered with the application's Mongo client
+command_metrics = CommandMetrics()
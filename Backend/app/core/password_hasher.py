@@ -0,0 +1,113 @@
+from fastapi import HTTPException, status
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_WAIT, PASSWORD_HASH_DURATION, PASSWORD_HASH_REJECTED
+from app.core.security import get_password_hash, verify_and_update_password
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import threading
+import time
+
+# Seconds clients are asked to wait when the hasher is saturated
+RETRY_AFTER_SECONDS = 2
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded thread pool.
+
+    bcrypt releases the GIL, so worker threads hash in parallel while the
+    event loop keeps serving other requests. At most `workers` calls run
+    at once; up to `max_queue` more wait for a thread, and further calls
+    are rejected with 503 so a login wave cannot pile up unbounded work.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # `running` is updated from worker threads
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.running = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def waiting(self) -> int:
+        return self.in_flight - self.running
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args) -> Any:
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                PASSWORD_HASH_WAIT.observe(started - submitted)
+                PASSWORD_HASH_DURATION.observe(time.perf_counter() - started, operation=operation)
+
+        self.in_flight += 1
+        self.peak_waiting = max(self.peak_waiting, self.in_flight - self.workers)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), call)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured bcrypt rounds."""
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password against its stored hash.
+
+        Returns:
+            Tuple of (password matches, new hash when the stored one uses
+            outdated settings, else None)
+        """
+        return await self._run("verify", verify_and_update_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "waiting": max(self.waiting, 0),
+            "peak_waiting": max(self.peak_waiting, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+# Global hasher used by the authentication routes
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
@@ -0,0 +1,103 @@
+from pymongo import monitoring
+from typing import Any, Dict
+import threading
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Connection pool statistics collected from PyMongo pool events.
+
+    Events are delivered on driver threads, so counters are guarded by a
+    lock. Figures cover all servers the client is connected to.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.peak_in_use = 0
+        self.peak_waiting = 0
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.pool_clears = 0
+
+    def reset(self) -> None:
+        """Forget all figures (e.g. when a new client is created)."""
+        with self._lock:
+            self.__init__()
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self.open += 1
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self.open = max(self.open - 1, 0)
+
+    def connection_check_out_started(self, event) -> None:
+        with self._lock:
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+
+    def connection_check_out_failed(self, event) -> None:
+        with self._lock:
+            self.waiting = max(self.waiting - 1, 0)
+            reason = str(event.reason)
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+
+    def connection_checked_out(self, event) -> None:
+        with self._lock:
+            self.waiting = max(self.waiting - 1, 0)
+            self.in_use += 1
+            self.checkouts += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def stats(self, max_pool_size: int) -> Dict[str, Any]:
+        """
+        Current pool figures.
+
+        Args:
+            max_pool_size: Configured pool size per server, for utilization
+
+        Returns:
+            Dict with open/in-use/waiting connections, peaks, checkout
+            counters and utilization (in use / max pool size)
+        """
+        with self._lock:
+            return {
+                "max_pool_size": max_pool_size,
+                "open": self.open,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "peak_in_use": self.peak_in_use,
+                "peak_waiting": self.peak_waiting,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "pool_clears": self.pool_clears,
+                "utilization": round(self.in_use / max_pool_size, 4) if max_pool_size else 0.0,
+            }
+
+
+# Global monitor registered with the application's Mongo client
+pool_monitor = PoolMonitor()
@@ -1,9 +1,81 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 from app.core.config import settings
-from app.core.database import connect_to_mongo, close_mongo_connection
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database, READ_PREFERENCE_SETTINGS
+from app.core.pool_monitor import pool_monitor
+from app.core.password_hasher import password_hasher
+from app.core.metrics import registry, CallbackMetric, MetricsMiddleware
+from app.core.indexes import ensure_indexes
 from app.api.routes import auth, users, vitals, alerts, dashboard
+from app.api.deps import user_cache, token_cache
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.services.stream_hub import vitals_hub
+from app.services.vitals_service import relay_vitals_change_stream
+from app.services.vitals_repository import ensure_vitals_collection, vitals_collection_name
+from app.services.threshold_service import threshold_cache
+from app.services.rule_engine import rule_table_cache, watch_rule_changes
+from app.services.alert_dispatcher import alert_dispatcher
+from app.services.dashboard_cache import dashboard_cache
+from app.services.alert_suppression import open_alert_index
+from app.services.token_service import assignment_cache, token_denylist
+
+# Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _cache_stats():
+    return [cache.stats() for cache in (user_cache, token_cache, assignment_cache, threshold_cache, rule_table_cache, open_alert_index)] + [dashboard_cache.stats()]
+
+
+def _register_runtime_metrics():
+    """Expose cache, pool, dispatcher and stream figures on /metrics."""
+    for name, help_text, field, metric_type in (
+        ("cache_hits_total", "In-process cache hits", "hits", "counter"),
+        ("cache_misses_total", "In-process cache misses", "misses", "counter"),
+        ("cache_entries", "In-process cache entries", "size", "gauge"),
+        ("cache_hit_ratio", "In-process cache hit ratio since start", "hit_ratio", "gauge"),
+    ):
+        registry.register(CallbackMetric(
+            name, help_text, metric_type, ["cache"],
+            lambda field=field: {(stats["name"],): stats[field] for stats in _cache_stats()}
+        ))
+    for name, help_text, field in (
+        ("mongodb_pool_connections_open", "Open MongoDB connections", "open"),
+        ("mongodb_pool_connections_in_use", "MongoDB connections checked out", "in_use"),
+        ("mongodb_pool_wait_queue", "Operations waiting for a MongoDB connection", "waiting"),
+        ("mongodb_pool_utilization", "MongoDB connections in use / max pool size", "utilization"),
+    ):
+        registry.register(CallbackMetric(
+            name, help_text, "gauge", [],
+            lambda field=field: {(): pool_monitor.stats(settings.MONGO_MAX_POOL_SIZE)[field]}
+        ))
+    registry.register(CallbackMetric(
+        "alert_dispatch_queue_depth", "Alert batches waiting for the dispatcher", "gauge", [],
+        lambda: {(): alert_dispatcher.queue.qsize()}
+    ))
+    registry.register(CallbackMetric(
+        "password_hash_queue_depth", "Password hash/verify calls waiting for a worker thread", "gauge", [],
+        lambda: {(): password_hasher.stats()["waiting"]}
+    ))
+    registry.register(CallbackMetric(
+        "vitals_stream_subscribers", "Live vitals stream subscribers", "gauge", [],
+        lambda: {(): vitals_hub.stats()["subscribers"]}
+    ))
+
+
+_register_runtime_metrics()
+
+
+async def _build_indexes():
+    """Create declared indexes that are missing from the database."""
+    try:
+        created = await ensure_indexes(get_database())
+        for collection_name, names in created.items():
+            print(f"🗂️  Built indexes on {collection_name}: {', '.join(names)}")
+    except Exception as e:
+        print(f"⚠️  Could not ensure indexes: {e}")
 
 
 @asynccontextmanager
@@ -15,8 +87,32 @@ async def lifespan(app: FastAPI):
     # Startup
     print(f"🚀 Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     await connect_to_mongo()
+    # The time-series collection must exist before the first reading is written
+    if await ensure_vitals_collection(get_database()):
+        print(f"🗂️  Created time-series collection {vitals_collection_name()}")
+    index_task = None
+    if settings.MONGO_ENSURE_INDEXES:
+        # Build missing indexes without delaying startup
+        index_task = asyncio.create_task(_build_indexes())
+    stream_task = None
+    if settings.STREAM_SOURCE == "change_stream" and settings.VITALS_STORAGE_MODE != "standard":
+        print("⚠️  STREAM_SOURCE=change_stream requires VITALS_STORAGE_MODE=standard; live relay disabled")
+    elif settings.STREAM_SOURCE == "change_stream":
+        stream_task = asyncio.create_task(relay_vitals_change_stream(get_database()))
+    rules_task = None
+    if settings.THRESHOLD_INVALIDATION == "change_stream":
+        rules_task = asyncio.create_task(watch_rule_changes(get_database()))
+    if settings.ALERT_DISPATCH_MODE == "background":
+        alert_dispatcher.start(get_database())
+    # Mirror revoked tokens from the database
+    denylist_task = asyncio.create_task(token_denylist.run(get_database()))
     yield
     # Shutdown
+    await alert_dispatcher.stop()
+    for task in (index_task, stream_task, rules_task, denylist_task):
+        if task and not task.done():
+            task.cancel()
+    password_hasher.shutdown()
     await close_mongo_connection()
     print("👋 Shutting down application")
 
@@ -38,8 +134,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Request counts and latency per route template
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -73,6 +174,49 @@ async def health_check():
     }
 
 
+@app.get("/health/caches", tags=["Health"])
+async def cache_stats():
+    """
+    In-process cache and live-stream statistics for this worker.
+    """
+    return {
+        "caches": [
+            cache.stats()
+            for cache in (user_cache, token_cache, assignment_cache, threshold_cache, rule_table_cache)
+        ],
+        "dashboard_cache": dashboard_cache.stats(),
+        "vitals_stream": vitals_hub.stats(),
+        "alert_dispatcher": alert_dispatcher.stats(),
+        "password_hasher": password_hasher.stats(),
+        "token_denylist": token_denylist.stats()
+    }
+
+
+@app.get("/health/db", tags=["Health"])
+async def database_stats():
+    """
+    MongoDB connection pool usage and read routing for this worker.
+    """
+    return {
+        "pool": pool_monitor.stats(settings.MONGO_MAX_POOL_SIZE),
+        "read_preferences": {
+            query_class: getattr(settings, setting)
+            for query_class, setting in READ_PREFERENCE_SETTINGS.items()
+        },
+        "compressors": settings.MONGO_COMPRESSORS or None
+    }
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics for this worker (scrape each worker, or use one worker per target).
+    """
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
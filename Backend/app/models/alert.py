@@ -24,6 +24,12 @@ class Alert(BaseModel):
     vital_value: Optional[float] = None
     threshold_crossed: Optional[str] = None  # "above_max", "below_min"
     
+    # Suppressed repeats folded into this alert
+    occurrence_count: int = 1
+    first_seen_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None
+    peak_value: Optional[float] = None  # Most extreme value seen
+    
     # Status
     is_read: bool = False
     is_resolved: bool = False
@@ -37,6 +37,8 @@ class Patient(BaseModel):
     oxygen_saturation_min: int = 95
     temperature_min: float = 36.1
     temperature_max: float = 37.2
+    respiratory_rate_min: int = 12
+    respiratory_rate_max: int = 20
     
     # Metadata
     created_at: datetime = Field(default_factory=datetime.utcnow)
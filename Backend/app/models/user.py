@@ -49,6 +49,8 @@ class User(BaseModel):
     # Relationships
     assigned_patients: list[str] = Field(default_factory=list)  # For caregivers/clinicians
     assigned_caregiver: Optional[str] = None  # For patients
+    assignments_version: int = 0  # Bumped whenever assigned_patients changes
+    token_version: int = 0  # Bumped to revoke all of the user's tokens
     
     # Metadata
     created_at: datetime = Field(default_factory=datetime.utcnow)
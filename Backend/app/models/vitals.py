@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import Optional, Literal, Dict, List, Any
 from datetime import datetime
 
 
@@ -47,6 +47,11 @@ class VitalsTrend(BaseModel):
     average: float
     min_value: float
     max_value: float
+    std_dev: Optional[float] = None
+    percentiles: Optional[Dict[str, float]] = None  # {"p5": ..., "p50": ..., "p95": ...}
+    slope_per_hour: Optional[float] = None  # Least-squares slope
     trend: Literal["increasing", "decreasing", "stable"]
+    data_points: int = 0
     period: str  # "24h", "7d", "30d"
+    buckets: Optional[List[Dict[str, Any]]] = None  # Hourly/daily series for charting
     calculated_at: datetime = Field(default_factory=datetime.utcnow)
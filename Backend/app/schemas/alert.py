@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, Literal, List
 from datetime import datetime
 
@@ -31,6 +31,10 @@ class AlertResponse(BaseModel):
     vital_type: Optional[str] = None
     vital_value: Optional[float] = None
     threshold_crossed: Optional[str] = None
+    occurrence_count: int = 1
+    first_seen_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None
+    peak_value: Optional[float] = None
     is_read: bool
     is_resolved: bool
     read_at: Optional[datetime] = None
@@ -40,6 +44,32 @@ class AlertResponse(BaseModel):
         populate_by_name = True
 
 
+class AlertBulkUpdate(BaseModel):
+    """
+    Schema selecting alerts for a bulk update.
+    
+    Either list alert_ids or give a patient_id; the other fields narrow
+    the selection further.
+    """
+    alert_ids: Optional[List[str]] = Field(default=None, max_length=1000)
+    patient_id: Optional[str] = None
+    vital_type: Optional[str] = None
+    alert_type: Optional[Literal["critical", "warning", "info"]] = None
+    before: Optional[datetime] = None  # Only alerts created before this time
+    
+    @model_validator(mode="after")
+    def check_selection(self):
+        """Refuse to select every accessible alert by accident."""
+        if not self.alert_ids and not self.patient_id:
+            raise ValueError("alert_ids or patient_id is required")
+        return self
+
+
+class AlertBulkResult(BaseModel):
+    """Schema for bulk update results."""
+    modified: int
+
+
 class AlertStats(BaseModel):
     """Schema for alert statistics."""
     total_alerts: int
@@ -57,3 +87,50 @@ class AlertFilter(BaseModel):
     is_read: Optional[bool] = None
     is_resolved: Optional[bool] = None
     limit: int = Field(default=50, le=500)
+
+
+class AlertRuleCreate(BaseModel):
+    """Schema for creating a custom alert rule."""
+    patient_id: str
+    vital_type: Literal[
+        "heart_rate",
+        "systolic_bp",
+        "diastolic_bp",
+        "oxygen_saturation",
+        "temperature",
+        "respiratory_rate",
+    ]
+    condition: Literal["above", "below", "between", "outside"]
+    threshold_value: Optional[float] = None
+    threshold_min: Optional[float] = None
+    threshold_max: Optional[float] = None
+    alert_severity: Literal["high", "medium", "low"] = "medium"
+    
+    @model_validator(mode="after")
+    def check_thresholds(self):
+        """above/below need threshold_value; between/outside need a min/max range."""
+        if self.condition in ("above", "below"):
+            if self.threshold_value is None:
+                raise ValueError(f"threshold_value is required for '{self.condition}' rules")
+        elif self.threshold_min is None or self.threshold_max is None:
+            raise ValueError(f"threshold_min and threshold_max are required for '{self.condition}' rules")
+        elif self.threshold_min > self.threshold_max:
+            raise ValueError("threshold_min must not exceed threshold_max")
+        return self
+
+
+class AlertRuleResponse(BaseModel):
+    """Schema for alert rule response."""
+    id: str = Field(alias="_id")
+    patient_id: str
+    vital_type: str
+    condition: str
+    threshold_value: Optional[float] = None
+    threshold_min: Optional[float] = None
+    threshold_max: Optional[float] = None
+    alert_severity: str
+    is_active: bool
+    created_at: datetime
+    
+    class Config:
+        populate_by_name = True
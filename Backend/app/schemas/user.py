@@ -129,3 +129,35 @@ class PatientOverview(BaseModel):
     temperature: Optional[float] = None
     last_measurement_at: Optional[datetime] = None
     is_anomaly: bool = False
+
+
+class PatientThresholdsUpdate(BaseModel):
+    """Schema for changing a patient's alert thresholds (omitted fields stay)."""
+    heart_rate_min: Optional[int] = Field(None, ge=0, le=300)
+    heart_rate_max: Optional[int] = Field(None, ge=0, le=300)
+    systolic_bp_min: Optional[int] = Field(None, ge=0, le=300)
+    systolic_bp_max: Optional[int] = Field(None, ge=0, le=300)
+    diastolic_bp_min: Optional[int] = Field(None, ge=0, le=200)
+    diastolic_bp_max: Optional[int] = Field(None, ge=0, le=200)
+    oxygen_saturation_min: Optional[int] = Field(None, ge=0, le=100)
+    temperature_min: Optional[float] = Field(None, ge=30, le=45)
+    temperature_max: Optional[float] = Field(None, ge=30, le=45)
+    respiratory_rate_min: Optional[int] = Field(None, ge=0, le=100)
+    respiratory_rate_max: Optional[int] = Field(None, ge=0, le=100)
+
+
+class PatientThresholds(BaseModel):
+    """Schema for a patient's alert thresholds."""
+    patient_id: str
+    heart_rate_min: int = 60
+    heart_rate_max: int = 100
+    systolic_bp_min: int = 90
+    systolic_bp_max: int = 140
+    diastolic_bp_min: int = 60
+    diastolic_bp_max: int = 90
+    oxygen_saturation_min: int = 95
+    temperature_min: float = 36.1
+    temperature_max: float = 37.2
+    respiratory_rate_min: int = 12
+    respiratory_rate_max: int = 20
+    thresholds_version: int = 0
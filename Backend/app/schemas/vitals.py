@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Literal
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, Literal, List, Dict
+from datetime import datetime, timezone
 
 
 class VitalsCreate(BaseModel):
@@ -13,6 +13,15 @@ class VitalsCreate(BaseModel):
     respiratory_rate: Optional[int] = Field(None, ge=0, le=100, description="Breaths per minute")
     measurement_type: Literal["manual", "automatic", "device"] = "automatic"
     notes: Optional[str] = None
+    measured_at: Optional[datetime] = Field(None, description="Device timestamp (defaults to server time)")
+    
+    @field_validator("measured_at")
+    @classmethod
+    def normalize_measured_at(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """Store timestamps as naive UTC, like every other datetime in the database."""
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
 
 
 class VitalsResponse(BaseModel):
@@ -43,12 +52,67 @@ class VitalsHistory(BaseModel):
     limit: int = Field(default=100, le=1000)
 
 
+class VitalsTrendBucket(BaseModel):
+    """Schema for one hourly/daily point of a trend series."""
+    start: datetime
+    count: int
+    average: float
+    min_value: float
+    max_value: float
+
+
 class VitalsTrendResponse(BaseModel):
     """Schema for vital signs trend analytics."""
     vital_type: str
     average: float
     min_value: float
     max_value: float
+    std_dev: Optional[float] = None
+    percentiles: Optional[Dict[str, float]] = None
+    slope_per_hour: Optional[float] = None
     trend: str
     data_points: int
     period: str
+    buckets: Optional[List[VitalsTrendBucket]] = None
+
+
+class VitalsSeriesStats(BaseModel):
+    """Schema for one vital's statistics within a series point."""
+    count: int
+    average: float
+    min_value: float
+    max_value: float
+    std_dev: float
+
+
+class VitalsSeriesPoint(BaseModel):
+    """Schema for one bucket of a vitals history series."""
+    start: datetime
+    count: int
+    vitals: Dict[str, VitalsSeriesStats]
+
+
+class VitalsSeriesResponse(BaseModel):
+    """Schema for a bucketed vitals history series."""
+    patient_id: str
+    resolution: str
+    source: str  # Rollup tier ("1m", "1h", "1d") or "raw"
+    points: List[VitalsSeriesPoint]
+
+
+class VitalsBatchItemResult(BaseModel):
+    """Schema for the outcome of one reading in a batch submission."""
+    index: int
+    id: Optional[str] = None
+    is_anomaly: bool = False
+    anomaly_type: Optional[str] = None
+    alerts_created: int = 0
+    error: Optional[str] = None
+
+
+class VitalsBatchResponse(BaseModel):
+    """Schema for batch vital signs submission response."""
+    accepted: int
+    rejected: int
+    alerts_created: int
+    results: List[VitalsBatchItemResult]
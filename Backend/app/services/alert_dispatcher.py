@@ -0,0 +1,247 @@
+from app.core.database import ALERTS_COLLECTION, ALERT_OUTBOX_COLLECTION, USERS_COLLECTION
+from app.core.config import settings
+from app.core.metrics import ALERTS_CREATED, ALERTS_SUPPRESSED
+from app.services.alert_suppression import suppress_repeats, track_open_alerts
+from app.services.dashboard_cache import dashboard_cache
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import time
+
+# Duplicate key error code; replayed outbox entries hit it for alerts
+# that were already delivered
+DUPLICATE_KEY = 11000
+
+
+def outbox_entry(patient_id: str, alerts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Wrap a patient's alert candidates into an outbox document.
+
+    Alert ids are assigned here so that delivering the same entry twice
+    (e.g. after a crash between insert and outbox cleanup) stores each
+    alert only once.
+
+    Args:
+        patient_id: Patient the alerts are about
+        alerts: Alert dicts (see alert_service.create_alert_dict)
+
+    Returns:
+        Outbox document
+    """
+    for alert in alerts:
+        alert.setdefault("_id", ObjectId())
+    return {
+        "_id": ObjectId(),
+        "patient_id": patient_id,
+        "alerts": alerts,
+        "created_at": datetime.utcnow(),
+    }
+
+
+async def find_recipients(patient_ids: List[str], db) -> Dict[str, List[str]]:
+    """
+    Caregivers and clinicians to notify, by patient.
+
+    Args:
+        patient_ids: Patient user IDs
+        db: Database instance
+
+    Returns:
+        Dict of patient ID -> user IDs of active assigned caregivers/clinicians
+    """
+    recipients: Dict[str, List[str]] = {patient_id: [] for patient_id in patient_ids}
+    cursor = db[USERS_COLLECTION].find(
+        {
+            "assigned_patients": {"$in": patient_ids},
+            "role": {"$in": ["caregiver", "clinician"]},
+            "is_active": {"$ne": False}
+        },
+        {"assigned_patients": 1}
+    )
+    async for user in cursor:
+        for patient_id in user.get("assigned_patients", []):
+            if patient_id in recipients:
+                recipients[patient_id].append(str(user["_id"]))
+    return recipients
+
+
+async def deliver_alerts(entries: List[Dict[str, Any]], db) -> int:
+    """
+    Store the alerts of outbox entries and remove the entries.
+
+    Repeats of an open alert are folded into it (see alert_suppression);
+    the remaining alerts get notified_users/notification_sent from the
+    patients' caregivers and clinicians and are written with one unordered
+    insert. The outbox entries are deleted last. Alerts already stored or
+    folded by an earlier attempt are skipped.
+
+    Args:
+        entries: Outbox documents
+        db: Database instance
+
+    Returns:
+        Number of alert occurrences stored (new alerts plus folded repeats)
+    """
+    for entry in entries:
+        for alert in entry["alerts"]:
+            alert["outbox_id"] = entry["_id"]
+    alerts, folded = await suppress_repeats(
+        [alert for entry in entries for alert in entry["alerts"]], db
+    )
+    if alerts:
+        recipients = await find_recipients(list({alert["patient_id"] for alert in alerts}), db)
+        for alert in alerts:
+            alert["notified_users"] = recipients.get(alert["patient_id"], [])
+            alert["notification_sent"] = bool(alert["notified_users"])
+
+    stored = len(alerts)
+    if alerts:
+        try:
+            await db[ALERTS_COLLECTION].insert_many(alerts, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                raise
+            stored -= len(errors)
+        track_open_alerts(alerts)
+    ALERTS_CREATED.inc(stored, source="vitals")
+    ALERTS_SUPPRESSED.inc(folded)
+
+    await db[ALERT_OUTBOX_COLLECTION].delete_many(
+        {"_id": {"$in": [entry["_id"] for entry in entries]}}
+    )
+    dashboard_cache.mark_changed({entry["patient_id"] for entry in entries})
+    return stored + folded
+
+
+class AlertDispatcher:
+    """
+    Background stage storing alerts raised by the ingest path.
+
+    Requests stage alert candidates in the outbox collection and hand
+    them to this dispatcher; a worker task drains the in-process queue
+    in batches. Entries that never make it through the queue (full
+    queue, crash, restart) stay in the outbox and are delivered by the
+    periodic sweep of any worker.
+    """
+
+    def __init__(self, queue_size: int, batch_size: int, flush_seconds: float):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.enqueued = 0
+        self.overflowed = 0
+        self.delivered = 0
+        self.swept = 0
+        self.failed_batches = 0
+        self._db = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, db) -> None:
+        """Start the worker task."""
+        self._db = db
+        self.queue = asyncio.Queue(maxsize=self.queue.maxsize)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker and deliver what is still queued (best effort)."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        entries = self._drain(self.queue.qsize())
+        if entries:
+            await self._deliver(entries)
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """
+        Queue an outbox entry for delivery without blocking.
+
+        Returns:
+            True if queued; False if the queue is full and the entry is
+            left to the outbox sweep
+        """
+        try:
+            self.queue.put_nowait(entry)
+            self.enqueued += 1
+            return True
+        except asyncio.QueueFull:
+            self.overflowed += 1
+            return False
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        entries = []
+        while len(entries) < limit and not self.queue.empty():
+            entries.append(self.queue.get_nowait())
+        return entries
+
+    async def _deliver(self, entries: List[Dict[str, Any]]) -> None:
+        try:
+            self.delivered += await deliver_alerts(entries, self._db)
+        except Exception as e:
+            # Entries remain in the outbox; the sweep retries them
+            self.failed_batches += 1
+            print(f"⚠️  Alert dispatch failed for {len(entries)} outbox entries: {e}")
+
+    async def sweep(self) -> None:
+        """Deliver outbox entries older than ALERT_OUTBOX_REPLAY_AFTER_SECONDS."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.ALERT_OUTBOX_REPLAY_AFTER_SECONDS)
+        try:
+            entries = await self._db[ALERT_OUTBOX_COLLECTION].find(
+                {"created_at": {"$lt": cutoff}}
+            ).sort("created_at", 1).limit(self.batch_size).to_list(length=None)
+        except Exception as e:
+            print(f"⚠️  Could not read the alert outbox: {e}")
+            return
+        if entries:
+            self.swept += len(entries)
+            await self._deliver(entries)
+
+    async def _run(self) -> None:
+        await self.sweep()
+        last_sweep = time.monotonic()
+        while True:
+            timeout = max(settings.ALERT_OUTBOX_SWEEP_SECONDS - (time.monotonic() - last_sweep), 0)
+            try:
+                entries = [await asyncio.wait_for(self.queue.get(), timeout)]
+            except asyncio.TimeoutError:
+                entries = []
+
+            if entries:
+                # Give concurrent requests a moment to fill the batch
+                await asyncio.sleep(self.flush_seconds)
+                entries += self._drain(self.batch_size - 1)
+                await self._deliver(entries)
+
+            if time.monotonic() - last_sweep >= settings.ALERT_OUTBOX_SWEEP_SECONDS:
+                await self.sweep()
+                last_sweep = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self.queue.qsize(),
+            "enqueued": self.enqueued,
+            "overflowed": self.overflowed,
+            "delivered": self.delivered,
+            "swept": self.swept,
+            "failed_batches": self.failed_batches,
+        }
+
+
+# Global dispatcher; started by the application lifespan
+alert_dispatcher = AlertDispatcher(
+    queue_size=settings.ALERT_DISPATCH_QUEUE_SIZE,
+    batch_size=settings.ALERT_DISPATCH_BATCH_SIZE,
+    flush_seconds=settings.ALERT_DISPATCH_FLUSH_SECONDS
+)
@@ -1,9 +1,13 @@
 from app.models.alert import Alert
 from app.core.database import get_database, ALERTS_COLLECTION
-from typing import List, Optional
+from app.core.metrics import ALERTS_CREATED
+from typing import List, Optional, Dict, Any
 from bson import ObjectId
 from datetime import datetime
 
+# Alert type -> severity
+ALERT_SEVERITIES = {"critical": "high", "warning": "medium", "info": "low"}
+
 
 async def create_system_alert(
     patient_id: str,
@@ -37,6 +41,7 @@ async def create_system_alert(
     
     alert_dict = alert.model_dump(by_alias=True, exclude={"id"})
     result = await db[ALERTS_COLLECTION].insert_one(alert_dict)
+    ALERTS_CREATED.inc(source="system")
     
     return str(result.inserted_id)
 
@@ -115,3 +120,175 @@ async def get_critical_alerts_count(patient_ids: List[str]) -> int:
     })
     
     return count
+
+
+def bulk_alert_query(
+    patient_ids: List[str],
+    alert_ids: Optional[List[str]] = None,
+    vital_type: Optional[str] = None,
+    alert_type: Optional[str] = None,
+    before: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Build the filter of a bulk alert update.
+    
+    Access is enforced by the filter itself: alerts of patients outside
+    `patient_ids` never match, whatever ids are listed.
+    
+    Args:
+        patient_ids: Patients the user may update alerts of
+        alert_ids: Only these alerts
+        vital_type: Only alerts about this vital
+        alert_type: Only alerts of this type
+        before: Only alerts created before this time
+    
+    Returns:
+        Alert filter
+    
+    Raises:
+        ValueError: If an alert id is malformed
+    """
+    query: Dict[str, Any] = {"patient_id": {"$in": patient_ids}}
+    if alert_ids:
+        try:
+            query["_id"] = {"$in": [ObjectId(alert_id) for alert_id in alert_ids]}
+        except Exception:
+            raise ValueError("Invalid alert ID")
+    if vital_type:
+        query["vital_type"] = vital_type
+    if alert_type:
+        query["alert_type"] = alert_type
+    if before is not None:
+        query["created_at"] = {"$lt": before}
+    return query
+
+
+async def mark_alerts_read(query: Dict[str, Any], user_id: str, db=None) -> int:
+    """
+    Mark all unread alerts matching a filter as read with one update.
+    
+    Args:
+        query: Alert filter (see bulk_alert_query)
+        user_id: User ID who read the alerts
+        db: Database instance (defaults to the application database)
+    
+    Returns:
+        Number of alerts marked read
+    """
+    db = db if db is not None else get_database()
+    now = datetime.utcnow()
+    result = await db[ALERTS_COLLECTION].update_many(
+        {**query, "is_read": False},
+        {"$set": {"is_read": True, "read_at": now, "read_by": user_id, "updated_at": now}}
+    )
+    return result.modified_count
+
+
+async def resolve_alerts(query: Dict[str, Any], db=None) -> int:
+    """
+    Resolve all unresolved alerts matching a filter with one update.
+    
+    Repeats of a resolved alert are no longer folded into it, since
+    suppression only updates unresolved alerts.
+    
+    Args:
+        query: Alert filter (see bulk_alert_query)
+        db: Database instance (defaults to the application database)
+    
+    Returns:
+        Number of alerts resolved
+    """
+    db = db if db is not None else get_database()
+    now = datetime.utcnow()
+    result = await db[ALERTS_COLLECTION].update_many(
+        {**query, "is_resolved": False},
+        {"$set": {"is_resolved": True, "resolved_at": now, "updated_at": now}}
+    )
+    return result.modified_count
+
+
+# Counters computed by get_alert_counts, as $cond expressions over one alert
+ALERT_COUNTERS = {
+    "unread": {"$eq": ["$is_read", False]},
+    "critical": {"$eq": ["$alert_type", "critical"]},
+    "warning": {"$eq": ["$alert_type", "warning"]},
+    "resolved": {"$eq": ["$is_resolved", True]},
+    "critical_unresolved": {
+        "$and": [
+            {"$eq": ["$alert_type", "critical"]},
+            {"$eq": ["$is_resolved", False]}
+        ]
+    },
+}
+
+
+async def get_alert_counts(query: Dict[str, Any], db=None) -> Dict[str, int]:
+    """
+    Compute all alert counters for a filter in a single aggregation.
+    
+    Args:
+        query: Alert filter (e.g. {"patient_id": {"$in": [...]}})
+        db: Database instance (defaults to the application database)
+    
+    Returns:
+        Dict with total, unread, critical, warning, resolved and
+        critical_unresolved counts
+    """
+    db = db if db is not None else get_database()
+    
+    group = {"_id": None, "total": {"$sum": 1}}
+    for name, condition in ALERT_COUNTERS.items():
+        group[name] = {"$sum": {"$cond": [condition, 1, 0]}}
+    
+    result = await db[ALERTS_COLLECTION].aggregate([
+        {"$match": query},
+        {"$group": group}
+    ]).to_list(length=1)
+    
+    counts = {"total": 0, **{name: 0 for name in ALERT_COUNTERS}}
+    if result:
+        counts.update({name: result[0][name] for name in counts})
+    return counts
+
+
+def create_alert_dict(
+    patient_id: str,
+    vital_type: str,
+    vital_value: float,
+    threshold_crossed: str,
+    title: str,
+    message: str,
+    alert_type: str = "warning"
+) -> Dict[str, Any]:
+    """
+    Create an alert dictionary for database insertion.
+    
+    Args:
+        patient_id: Patient ID
+        vital_type: Type of vital sign
+        vital_value: Measured value
+        threshold_crossed: "above_max", "below_min" or "within_range"
+        title: Alert title
+        message: Alert message
+        alert_type: "critical", "warning", or "info"
+    
+    Returns:
+        Alert dictionary ready for database insertion
+    """
+    now = datetime.utcnow()
+    return {
+        "patient_id": patient_id,
+        "alert_type": alert_type,
+        "severity": ALERT_SEVERITIES.get(alert_type, "medium"),
+        "title": title,
+        "message": message,
+        "vital_type": vital_type,
+        "vital_value": vital_value,
+        "threshold_crossed": threshold_crossed,
+        "is_read": False,
+        "is_resolved": False,
+        "notified_users": [],
+        "notification_sent": False,
+        "created_at": now,
+        "updated_at": now
+    }
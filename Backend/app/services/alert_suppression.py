@@ -0,0 +1,236 @@
+from app.core.database import ALERTS_COLLECTION
+from app.core.config import settings
+from app.core.cache import TTLCache, MISSING
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import time
+
+# Alert types by severity rank; a more severe repeat is never suppressed
+ALERT_TYPE_RANK = {"info": 0, "warning": 1, "critical": 2}
+
+# Update operator tracking the peak value, by threshold crossed
+PEAK_OPERATORS = {"below_min": "$min"}
+
+# Outbox entries an alert remembers having applied (newest kept). Replays
+# arrive within a few sweeps, so this only needs to cover that long.
+APPLIED_ENTRIES_KEPT = 256
+
+# Open (unresolved, recently seen) alerts by suppression key, holding
+# (alert _id, alert_type, monotonic time opened). Entries expire one window
+# after the last repeat.
+open_alert_index = TTLCache(
+    "open_alerts",
+    maxsize=settings.ALERT_OPEN_INDEX_MAX_SIZE,
+    ttl=settings.ALERT_SUPPRESSION_WINDOW_SECONDS
+)
+
+
+def suppression_key(alert: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+    """
+    Key under which repeats of an alert are coalesced.
+
+    Returns:
+        (patient_id, vital_type, threshold_crossed), or None for alerts
+        that are never suppressed (manual and system alerts)
+    """
+    if not alert.get("vital_type") or not alert.get("threshold_crossed"):
+        return None
+    return alert["patient_id"], alert["vital_type"], alert["threshold_crossed"]
+
+
+def _peak(threshold_crossed: str, values: List[float]) -> float:
+    return min(values) if PEAK_OPERATORS.get(threshold_crossed) == "$min" else max(values)
+
+
+def _merge(group: Dict[str, Any], alert: Dict[str, Any]) -> None:
+    """Fold a later alert of the same key into a group."""
+    group["occurrence_count"] += alert["occurrence_count"]
+    group["last_seen_at"] = alert["last_seen_at"]
+    group["vital_value"] = alert.get("vital_value")
+    group["vital_reading_id"] = alert.get("vital_reading_id")
+    group["message"] = alert["message"]
+    group["outbox_ids"] = group["outbox_ids"] + [i for i in alert["outbox_ids"] if i not in group["outbox_ids"]]
+    values = [v for v in (group.get("peak_value"), alert.get("peak_value")) if v is not None]
+    if values:
+        group["peak_value"] = _peak(alert["threshold_crossed"], values)
+
+
+def coalesce_alerts(
+    alerts: List[Dict[str, Any]],
+    members: Optional[Dict[Any, List[Dict[str, Any]]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Merge repeats within a list of alerts into one alert per key.
+
+    The first alert of a key is kept (with its _id) and carries the
+    occurrence count, first/last seen times and peak value of the group;
+    its value, reading and message are those of the latest repeat, and
+    outbox_ids lists the outbox entries (outbox_id) the group came from.
+    A repeat more severe than the alert it would join starts a new group.
+
+    Args:
+        alerts: Alert dicts in creation order
+        members: Filled with group _id -> copies of the alerts merged
+            into the group, taken before merging (if given)
+
+    Returns:
+        Coalesced alert dicts, in order of first occurrence
+    """
+    coalesced: List[Dict[str, Any]] = []
+    groups: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for alert in alerts:
+        original = dict(alert)
+        seen_at = alert.get("created_at") or datetime.utcnow()
+        alert.setdefault("occurrence_count", 1)
+        alert.setdefault("first_seen_at", seen_at)
+        alert.setdefault("last_seen_at", seen_at)
+        alert.setdefault("peak_value", alert.get("vital_value"))
+        outbox_id = alert.pop("outbox_id", None)
+        alert.setdefault("outbox_ids", [outbox_id] if outbox_id is not None else [])
+
+        key = suppression_key(alert)
+        group = groups.get(key) if key else None
+        if group is None or ALERT_TYPE_RANK.get(alert["alert_type"], 0) > ALERT_TYPE_RANK.get(group["alert_type"], 0):
+            if key:
+                groups[key] = alert
+            coalesced.append(alert)
+            group = alert
+        else:
+            _merge(group, alert)
+        if members is not None:
+            members.setdefault(group["_id"], []).append(original)
+    return coalesced
+
+
+def _repeat_update(alert: Dict[str, Any]) -> Dict[str, Any]:
+    """Update folding a coalesced repeat into an open alert."""
+    update = {
+        "$inc": {"occurrence_count": alert["occurrence_count"]},
+        "$push": {"outbox_ids": {"$each": alert["outbox_ids"], "$slice": -APPLIED_ENTRIES_KEPT}},
+        "$set": {
+            "last_seen_at": alert["last_seen_at"],
+            "vital_value": alert.get("vital_value"),
+            "vital_reading_id": alert.get("vital_reading_id"),
+            "message": alert["message"],
+            "updated_at": datetime.utcnow()
+        }
+    }
+    if alert.get("peak_value") is not None:
+        operator = PEAK_OPERATORS.get(alert["threshold_crossed"], "$max")
+        update[operator] = {"peak_value": alert["peak_value"]}
+    return update
+
+
+def _open_alert(key: Optional[Tuple[str, str, str]]) -> Any:
+    """Open alert of a key, or MISSING; alerts open for too long roll over."""
+    open_alert = open_alert_index.get(key) if key else MISSING
+    if open_alert is not MISSING and time.monotonic() - open_alert[2] > settings.ALERT_SUPPRESSION_MAX_SECONDS:
+        open_alert_index.invalidate(key)
+        return MISSING
+    return open_alert
+
+
+async def suppress_repeats(alerts: List[Dict[str, Any]], db) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Fold alerts into matching open alerts and return the ones to insert.
+
+    Open alerts are looked up in the in-process index only, so the check
+    costs no database read. An alert is folded into the open alert of its
+    key unless it is more severe or the open alert has been open for
+    ALERT_SUPPRESSION_MAX_SECONDS; the update is conditional on the open
+    alert still being unresolved, and alerts whose open alert was resolved
+    or removed meanwhile are returned for insertion.
+
+    Folding is idempotent per outbox entry: an alert remembers the last
+    APPLIED_ENTRIES_KEPT entries folded into it (outbox_ids) and the update
+    only applies if none of the repeats' entries is among them. When it
+    does not apply, the open alert is read once and only the repeats of
+    entries it has not applied are folded again, so replayed outbox
+    entries are not counted twice.
+
+    Args:
+        alerts: Alert dicts in creation order, with outbox_id set
+        db: Database instance
+
+    Returns:
+        Tuple of (alerts to insert as new documents, number of repeats folded)
+    """
+    if settings.ALERT_SUPPRESSION_WINDOW_SECONDS <= 0:
+        return alerts, 0
+    members: Dict[Any, List[Dict[str, Any]]] = {}
+    alerts = coalesce_alerts(alerts, members)
+
+    # One update per open alert (groups of one key split by severity may join the same one)
+    repeats: Dict[Any, Tuple[Tuple, Dict[str, Any]]] = {}
+    new_alerts = []
+    for alert in alerts:
+        open_alert = _open_alert(suppression_key(alert))
+        if open_alert is MISSING or ALERT_TYPE_RANK.get(alert["alert_type"], 0) > ALERT_TYPE_RANK.get(open_alert[1], 0):
+            new_alerts.append(alert)
+        elif open_alert[0] in repeats:
+            target = repeats[open_alert[0]][1]
+            _merge(target, alert)
+            members[target["_id"]] += members.pop(alert["_id"])
+        else:
+            repeats[open_alert[0]] = (open_alert, alert)
+
+    results = await asyncio.gather(*(
+        db[ALERTS_COLLECTION].update_one(
+            {"_id": open_alert[0], "is_resolved": False, "outbox_ids": {"$nin": alert["outbox_ids"]}},
+            _repeat_update(alert)
+        )
+        for open_alert, alert in repeats.values()
+    ))
+
+    folded = 0
+    unmatched = []
+    for (open_alert, alert), result in zip(repeats.values(), results):
+        if result.matched_count:
+            folded += alert["occurrence_count"]
+            open_alert_index.set(suppression_key(alert), open_alert)
+        else:
+            unmatched.append((open_alert, alert))
+    if not unmatched:
+        return new_alerts, folded
+
+    # Resolved or removed meanwhile, or (partly) applied already
+    applied = {
+        document["_id"]: set(document.get("outbox_ids", []))
+        for document in await db[ALERTS_COLLECTION].find(
+            {"_id": {"$in": [open_alert[0] for open_alert, _ in unmatched]}, "is_resolved": False},
+            {"outbox_ids": 1}
+        ).to_list(length=None)
+    }
+    retry = []
+    for open_alert, alert in unmatched:
+        group = members[alert["_id"]]
+        remaining = [a for a in group if a.get("outbox_id") not in applied.get(open_alert[0], ())]
+        if open_alert[0] in applied and len(remaining) < len(group):
+            retry.extend(remaining)
+        else:
+            open_alert_index.invalidate(suppression_key(alert))
+            new_alerts.append(alert)
+    if retry:
+        retried, retried_folded = await suppress_repeats(retry, db)
+        new_alerts.extend(retried)
+        folded += retried_folded
+    return new_alerts, folded
+
+
+def track_open_alerts(alerts: List[Dict[str, Any]]) -> None:
+    """Register newly stored alerts as the open alert of their key."""
+    if settings.ALERT_SUPPRESSION_WINDOW_SECONDS <= 0:
+        return
+    for alert in alerts:
+        key = suppression_key(alert)
+        if key:
+            open_alert_index.set(key, (alert["_id"], alert["alert_type"], time.monotonic()))
+
+
+def forget_open_alert(alert: Dict[str, Any]) -> None:
+    """Stop folding repeats into an alert (e.g. once it is resolved)."""
+    key = suppression_key(alert)
+    open_alert = open_alert_index.get(key, None) if key else None
+    if open_alert is not None and open_alert[0] == alert["_id"]:
+        open_alert_index.invalidate(key)
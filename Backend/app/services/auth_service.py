@@ -1,6 +1,6 @@
 from app.models.user import User
 from app.core.database import get_database, USERS_COLLECTION
-from app.core.security import verify_password, get_password_hash
+from app.core.password_hasher import password_hasher
 from typing import Optional
 from bson import ObjectId
 
@@ -22,8 +22,15 @@ async def authenticate_user(email: str, password: str) -> Optional[User]:
     if not user_data:
         return None
     
-    if not verify_password(password, user_data["hashed_password"]):
+    password_ok, new_hash = await password_hasher.verify_and_update(password, user_data["hashed_password"])
+    if not password_ok:
         return None
+    if new_hash:
+        await db[USERS_COLLECTION].update_one(
+            {"_id": user_data["_id"], "hashed_password": user_data["hashed_password"]},
+            {"$set": {"hashed_password": new_hash}}
+        )
+        user_data["hashed_password"] = new_hash
     
     # Convert ObjectId to string
     user_data["_id"] = str(user_data["_id"])
@@ -93,7 +100,7 @@ async def create_user(email: str, password: str, full_name: str, role: str) -> U
     # Create user
     user = User(
         email=email,
-        hashed_password=get_password_hash(password),
+        hashed_password=await password_hasher.hash(password),
         full_name=full_name,
         role=role
     )
@@ -0,0 +1,105 @@
+from app.core.config import settings
+from app.core.cache import TTLCache, MISSING
+from app.utils.json_response import dumps
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Tuple
+import asyncio
+import hashlib
+
+
+def encode_dashboard(data: Dict[str, Any]) -> Tuple[str, bytes]:
+    """
+    Serialize a dashboard payload and derive its ETag.
+
+    Returns:
+        Tuple of (quoted ETag, JSON body)
+    """
+    body = dumps(data)
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"', body
+
+
+class DashboardCache:
+    """
+    Short-lived cache of rendered dashboards with request coalescing.
+
+    Each entry remembers the change generation of the patients it covers;
+    mark_changed() bumps a patient's generation, so entries covering that
+    patient are rebuilt on their next request. Concurrent requests for a
+    dashboard that is being built wait for the same build.
+
+    Generations are per worker process: changes made through another worker
+    are picked up when the entry expires (DASHBOARD_CACHE_TTL_SECONDS).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache("dashboard", maxsize=maxsize, ttl=ttl)
+        self._generations: Dict[str, int] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    def mark_changed(self, patient_ids: Iterable[str]) -> None:
+        """Invalidate cached dashboards covering any of these patients."""
+        for patient_id in patient_ids:
+            self._generations[patient_id] = self._generations.get(patient_id, 0) + 1
+
+    def _generation(self, patient_ids: List[str]) -> int:
+        # Generations only grow, so the sum changes whenever one of them does
+        return sum(self._generations.get(patient_id, 0) for patient_id in patient_ids)
+
+    async def get_or_build(
+        self,
+        key: Hashable,
+        patient_ids: List[str],
+        build: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[str, bytes]:
+        """
+        Get a rendered dashboard, building it on a miss.
+
+        Args:
+            key: Cache key (see dashboard_key)
+            patient_ids: Patients whose data the dashboard shows
+            build: Coroutine function computing the dashboard payload
+
+        Returns:
+            Tuple of (ETag, JSON body)
+        """
+        generation = self._generation(patient_ids)
+        entry = self._cache.get(key)
+        if entry is not MISSING and entry[0] == generation:
+            return entry[1], entry[2]
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._build(key, generation, build))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # A cancelled request must not cancel the build other requests wait for
+        return await asyncio.shield(future)
+
+    async def _build(self, key: Hashable, generation: int, build) -> Tuple[str, bytes]:
+        data = await build()
+        etag, body = encode_dashboard(data)
+        # Partial (degraded) dashboards are served but not kept
+        if not data.get("degraded"):
+            self._cache.set(key, (generation, etag, body))
+        return etag, body
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), "coalesced": self.coalesced, "building": len(self._inflight)}
+
+
+def dashboard_key(user_id: str, role: str, patient_ids: List[str]) -> Tuple[str, str, str]:
+    """Cache key of a user's dashboard; changes when the assigned patients do."""
+    patients_hash = hashlib.sha256(",".join(sorted(patient_ids)).encode()).hexdigest()[:16]
+    return user_id, role, patients_hash
+
+
+# Global dashboard cache
+dashboard_cache = DashboardCache(
+    maxsize=settings.DASHBOARD_CACHE_MAX_SIZE,
+    ttl=settings.DASHBOARD_CACHE_TTL_SECONDS
+)
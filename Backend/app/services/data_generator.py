@@ -0,0 +1,510 @@
+"""
+Synthetic users, patients, vitals and alerts for sizing and benchmarking.
+
+Readings follow a per-patient baseline with a circadian rhythm, a shared
+slowly varying activity level (so heart rate, blood pressure and breathing
+move together), sensor noise, anomaly episodes that push vitals out of
+range for a while, and device gaps with no readings at all. Series are
+generated with NumPy a chunk of days at a time and written with bulk
+inserts, several batches in flight at once.
+"""
+from app.core.database import get_database, USERS_COLLECTION, PATIENTS_COLLECTION, ALERTS_COLLECTION
+from app.core.security import get_password_hash
+from app.models.patient import Patient
+from app.models.user import User
+from app.services.alert_service import create_alert_dict
+from app.services.vitals_repository import insert_readings
+from bson import ObjectId
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import numpy as np
+
+# Password of every generated account
+SYNTHETIC_PASSWORD = "Synthetic123!"
+
+VITAL_FIELDS = ("heart_rate", "systolic_bp", "diastolic_bp", "oxygen_saturation", "temperature", "respiratory_rate")
+INTEGER_FIELDS = {"heart_rate", "systolic_bp", "diastolic_bp", "respiratory_rate"}
+
+# vital -> (threshold min field, threshold max field, label, unit, critical below, critical above)
+VITAL_LIMITS = {
+    "heart_rate": ("heart_rate_min", "heart_rate_max", "Heart Rate", "BPM", 45, 130),
+    "systolic_bp": ("systolic_bp_min", "systolic_bp_max", "Systolic Blood Pressure", "mmHg", 80, 180),
+    "diastolic_bp": ("diastolic_bp_min", "diastolic_bp_max", "Diastolic Blood Pressure", "mmHg", 45, 110),
+    "oxygen_saturation": ("oxygen_saturation_min", None, "Oxygen Saturation", "%", 90, None),
+    "temperature": ("temperature_min", "temperature_max", "Body Temperature", "°C", 35.0, 39.0),
+    "respiratory_rate": ("respiratory_rate_min", "respiratory_rate_max", "Respiratory Rate", "breaths/min", 8, 28),
+}
+
+# Episode kind -> offsets applied to each vital at the episode's peak
+EPISODES = {
+    "tachycardia": {"heart_rate": 45, "respiratory_rate": 6},
+    "bradycardia": {"heart_rate": -28},
+    "hypertension": {"systolic_bp": 45, "diastolic_bp": 25, "heart_rate": 8},
+    "hypoxia": {"oxygen_saturation": -9, "heart_rate": 18, "respiratory_rate": 9},
+    "fever": {"temperature": 2.2, "heart_rate": 22, "respiratory_rate": 4},
+}
+
+# Share of individual measurements missing from an otherwise present reading
+FIELD_DROPOUT = 0.02
+
+# Days of readings generated per patient at a time (bounds memory)
+CHUNK_DAYS = 7
+
+# Decay of the activity level between readings (AR(1) coefficient 0.95)
+ACTIVITY_KERNEL = 0.95 ** np.arange(100)
+
+
+def random_thresholds(rng: np.random.Generator) -> Dict[str, Any]:
+    """Patient alert thresholds spread around the clinical defaults."""
+    return {
+        "heart_rate_min": int(rng.integers(48, 56)),
+        "heart_rate_max": int(rng.integers(100, 121)),
+        "systolic_bp_min": int(rng.integers(85, 101)),
+        "systolic_bp_max": int(rng.integers(140, 161)),
+        "diastolic_bp_min": int(rng.integers(52, 59)),
+        "diastolic_bp_max": int(rng.integers(90, 101)),
+        "oxygen_saturation_min": int(rng.integers(92, 96)),
+        "temperature_min": round(float(rng.uniform(35.8, 36.2)), 1),
+        "temperature_max": round(float(rng.uniform(37.4, 37.8)), 1),
+        "respiratory_rate_min": int(rng.integers(9, 12)),
+        "respiratory_rate_max": int(rng.integers(21, 25)),
+    }
+
+
+def random_baseline(rng: np.random.Generator) -> Dict[str, float]:
+    """Resting values of one patient."""
+    return {
+        "heart_rate": rng.uniform(66, 80),
+        "systolic_bp": rng.uniform(110, 125),
+        "diastolic_bp": rng.uniform(68, 78),
+        "oxygen_saturation": rng.uniform(97, 98.5),
+        "temperature": rng.uniform(36.5, 36.8),
+        "respiratory_rate": rng.uniform(14, 16),
+    }
+
+
+def _episode_mask(seconds: np.ndarray, count: int, min_minutes: float, max_minutes: float, rng) -> Tuple[np.ndarray, np.ndarray]:
+    """Random episodes as (intensity 0..1 per reading, episode index or -1)."""
+    intensity = np.zeros(len(seconds))
+    index = np.full(len(seconds), -1)
+    if not len(seconds):
+        return intensity, index
+    starts = rng.uniform(seconds[0], seconds[-1], count)
+    durations = rng.uniform(min_minutes, max_minutes, count) * 60
+    for episode, (start, duration) in enumerate(zip(starts, durations)):
+        lo, hi = np.searchsorted(seconds, [start, start + duration])
+        if hi > lo:
+            # Rise and fall over the episode
+            phase = (seconds[lo:hi] - start) / duration
+            intensity[lo:hi] = np.maximum(intensity[lo:hi], np.sin(np.pi * phase))
+            index[lo:hi] = episode
+    return intensity, index
+
+
+def generate_series(
+    baseline: Dict[str, float],
+    start: datetime,
+    end: datetime,
+    interval_seconds: float,
+    anomaly_rate: float,
+    gap_rate: float,
+    rng: np.random.Generator
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Generate one patient's readings between two times.
+
+    Args:
+        baseline: Resting values (see random_baseline)
+        start: First reading time (UTC)
+        end: End of the range (exclusive)
+        interval_seconds: Mean spacing of readings
+        anomaly_rate: Anomaly episodes per patient per day
+        gap_rate: Device gaps (no readings for 1-12 hours) per patient per day
+        rng: NumPy random generator
+
+    Returns:
+        Tuple of (measured_at as datetime64[ms], vital -> float array with NaN for missing)
+    """
+    span = (end - start).total_seconds()
+    count = int(span // interval_seconds)
+    seconds = np.arange(count) * interval_seconds + rng.uniform(0, interval_seconds * 0.2, count)
+    days = span / 86400
+
+    # Device gaps: readings are simply missing
+    _, gap = _episode_mask(seconds, rng.poisson(gap_rate * days), 60, 720, rng)
+    seconds = seconds[gap < 0]
+    count = len(seconds)
+
+    epoch_seconds = seconds + (start - datetime(1970, 1, 1)).total_seconds()
+    hour_of_day = (epoch_seconds % 86400) / 3600
+    # Lowest around 04:00, highest in the late afternoon
+    circadian = np.sin(2 * np.pi * (hour_of_day - 10) / 24)
+    # Activity level: AR(1)-like smoothed noise, shared across vitals
+    activity = np.convolve(rng.normal(0, 0.3, count), ACTIVITY_KERNEL)[:count]
+
+    values = {
+        "heart_rate": baseline["heart_rate"] + 6 * circadian + 6 * activity + rng.normal(0, 2, count),
+        "systolic_bp": baseline["systolic_bp"] + 7 * circadian + 4 * activity + rng.normal(0, 3, count),
+        "diastolic_bp": baseline["diastolic_bp"] + 4 * circadian + 2 * activity + rng.normal(0, 2, count),
+        "oxygen_saturation": baseline["oxygen_saturation"] - 0.3 * np.abs(activity) + rng.normal(0, 0.4, count),
+        "temperature": baseline["temperature"] + 0.3 * circadian + 0.05 * activity + rng.normal(0, 0.05, count),
+        "respiratory_rate": baseline["respiratory_rate"] + 1 * circadian + 1.5 * activity + rng.normal(0, 0.7, count),
+    }
+
+    intensity, episode = _episode_mask(seconds, rng.poisson(anomaly_rate * days), 15, 180, rng)
+    if (episode >= 0).any():
+        kinds = rng.choice(list(EPISODES), episode.max() + 1)
+        for kind in set(kinds):
+            in_kind = np.isin(episode, np.flatnonzero(kinds == kind))
+            for field, offset in EPISODES[kind].items():
+                values[field][in_kind] += offset * intensity[in_kind]
+
+    values["oxygen_saturation"] = np.minimum(values["oxygen_saturation"], 100)
+    for field in VITAL_FIELDS:
+        values[field] = np.round(values[field], 0 if field in INTEGER_FIELDS else 1)
+        values[field][rng.random(count) < FIELD_DROPOUT] = np.nan
+
+    measured_at = np.datetime64(start, "ms") + (seconds * 1000).astype("timedelta64[ms]")
+    return measured_at, values
+
+
+def classify_readings(values: Dict[str, np.ndarray], thresholds: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+    """
+    Flag readings outside a patient's thresholds.
+
+    Returns:
+        Tuple of (is_anomaly, any value high, vital -> (below min, above max))
+    """
+    count = len(next(iter(values.values())))
+    below_any = np.zeros(count, dtype=bool)
+    above_any = np.zeros(count, dtype=bool)
+    crossings = {}
+    for field, (min_key, max_key, *_) in VITAL_LIMITS.items():
+        # Comparisons with NaN (missing) are False
+        below = values[field] < thresholds[min_key] if min_key else np.zeros(count, dtype=bool)
+        above = values[field] > thresholds[max_key] if max_key else np.zeros(count, dtype=bool)
+        crossings[field] = (below, above)
+        below_any |= below
+        above_any |= above
+    return below_any | above_any, above_any, crossings
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """(start, end) index pairs of consecutive True values."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def episode_alerts(
+    patient_id: str,
+    measured_at: np.ndarray,
+    values: Dict[str, np.ndarray],
+    reading_ids: List[ObjectId],
+    thresholds: Dict[str, Any],
+    crossings: Dict[str, Tuple[np.ndarray, np.ndarray]],
+    now: datetime,
+    rng: np.random.Generator,
+    open_runs: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None,
+    more: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    One alert per run of consecutive out-of-range readings of a vital.
+
+    Repeats within a run are folded into the alert the way alert
+    suppression stores them: occurrence_count, first_seen_at and
+    peak_value cover the run, while vital_value, message and
+    vital_reading_id are those of the latest reading. Alerts older than
+    a day are mostly read and resolved.
+
+    Runs can continue across consecutive chunks of readings: pass the
+    same open_runs dict for every chunk and more=True for all but the
+    last. Alerts of runs still open at the end of a chunk are then kept
+    in open_runs instead of being returned, and extended by a run at the
+    start of the next chunk.
+    """
+    alerts = []
+    times = measured_at.astype("datetime64[ms]").tolist()
+    open_runs = open_runs if open_runs is not None else {}
+    for field, (min_key, max_key, label, unit, critical_low, critical_high) in VITAL_LIMITS.items():
+        below, above = crossings[field]
+        for mask, direction in ((below, "below_min"), (above, "above_max")):
+            previous = open_runs.pop((field, direction), None)
+            for lo, hi in _runs(mask):
+                run = values[field][lo:hi]
+                peak_index = lo + int(np.argmin(run) if direction == "below_min" else np.argmax(run))
+                value = values[field][hi - 1]
+                peak = values[field][peak_index]
+                if direction == "below_min":
+                    title = f"Low {label} Detected"
+                    message = f"{label} ({value:g} {unit}) is below minimum threshold ({thresholds[min_key]} {unit})"
+                else:
+                    title = f"High {label} Detected"
+                    message = f"{label} ({value:g} {unit}) is above maximum threshold ({thresholds[max_key]} {unit})"
+
+                if previous is not None and lo == 0:
+                    # Continuation of a run from the previous chunk
+                    alert, previous = previous, None
+                    alert["occurrence_count"] += int(hi - lo)
+                    alert["peak_value"] = float(min(alert["peak_value"], peak) if direction == "below_min" else max(alert["peak_value"], peak))
+                    alert.update({"vital_value": float(value), "message": message})
+                else:
+                    alert = create_alert_dict(
+                        patient_id=patient_id,
+                        vital_type=field,
+                        vital_value=float(value),
+                        threshold_crossed=direction,
+                        title=title,
+                        message=message,
+                        alert_type="warning"
+                    )
+                    alert.update({
+                        "_id": ObjectId(),
+                        "occurrence_count": int(hi - lo),
+                        "first_seen_at": times[lo],
+                        "peak_value": float(peak),
+                        "created_at": times[lo],
+                    })
+                if direction == "below_min":
+                    critical = critical_low is not None and alert["peak_value"] < critical_low
+                else:
+                    critical = critical_high is not None and alert["peak_value"] > critical_high
+                alert.update({
+                    "alert_type": "critical" if critical else "warning",
+                    "severity": "high" if critical else "medium",
+                    "vital_reading_id": str(reading_ids[hi - 1]),
+                    "last_seen_at": times[hi - 1],
+                })
+                if more and hi == len(mask):
+                    open_runs[(field, direction)] = alert
+                else:
+                    alerts.append(alert)
+            if previous is not None:
+                # Ended with the previous chunk
+                alerts.append(previous)
+
+    for alert in alerts:
+        last_seen = alert["last_seen_at"]
+        handled = (now - last_seen) > timedelta(days=1) and rng.random() < 0.9
+        alert.update({
+            "is_read": handled,
+            "is_resolved": handled,
+            "resolved_at": last_seen + timedelta(hours=1) if handled else None,
+            "updated_at": last_seen,
+        })
+    return alerts
+
+
+def reading_docs(
+    patient_id: str,
+    device_id: str,
+    measured_at: np.ndarray,
+    values: Dict[str, np.ndarray],
+    is_anomaly: np.ndarray,
+    is_high: np.ndarray
+) -> List[Dict[str, Any]]:
+    """Vitals documents in the VitalSigns layout with pre-assigned ids."""
+    times = measured_at.astype("datetime64[ms]").tolist()
+    columns = []
+    for field in VITAL_FIELDS:
+        column = values[field].astype(object)
+        column[np.isnan(values[field])] = None
+        if field in INTEGER_FIELDS:
+            column = [None if v is None else int(v) for v in column]
+        columns.append(list(column))
+    anomaly_types = np.where(is_anomaly, np.where(is_high, "high", "low"), None).tolist()
+
+    docs = []
+    for moment, flagged, anomaly_type, *measurements in zip(times, is_anomaly.tolist(), anomaly_types, *columns):
+        doc = {
+            "_id": ObjectId(),
+            "patient_id": patient_id,
+            "measurement_type": "device",
+            "device_id": device_id,
+            "is_anomaly": flagged,
+            "anomaly_type": anomaly_type,
+            "notes": None,
+            "measured_at": moment,
+            "created_at": moment,
+        }
+        doc.update(zip(VITAL_FIELDS, measurements))
+        docs.append(doc)
+    return docs
+
+
+async def create_population(
+    patients: int,
+    caregivers: int,
+    clinicians: int,
+    seed: int = 0,
+    db=None
+) -> List[Dict[str, Any]]:
+    """
+    Insert synthetic patients, caregivers and clinicians.
+
+    Patients are spread round-robin over the caregivers and clinicians.
+    All accounts share SYNTHETIC_PASSWORD.
+
+    Args:
+        patients: Number of patients
+        caregivers: Number of caregivers
+        clinicians: Number of clinicians
+        seed: Random seed
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        One dict per patient with number, patient_id, device_id, thresholds and baseline
+    """
+    db = db if db is not None else get_database()
+    rng = np.random.default_rng(seed)
+    hashed_password = get_password_hash(SYNTHETIC_PASSWORD)
+    tag = ObjectId()
+
+    def account(role: str, index: int, **fields) -> Dict[str, Any]:
+        user = User(
+            email=f"synthetic-{role}-{index}-{tag}@example.com",
+            hashed_password=hashed_password,
+            full_name=f"Synthetic {role.title()} {index}",
+            role=role,
+            **fields
+        )
+        return {"_id": ObjectId(), **user.model_dump(by_alias=True, exclude={"id"})}
+
+    staff = {
+        "caregiver": [account("caregiver", i) for i in range(caregivers)],
+        "clinician": [account("clinician", i) for i in range(clinicians)],
+    }
+    patient_users = []
+    for i in range(patients):
+        caregiver = staff["caregiver"][i % caregivers] if caregivers else None
+        patient = account("patient", i, assigned_caregiver=str(caregiver["_id"]) if caregiver else None)
+        patient_users.append(patient)
+        for members in staff.values():
+            if members:
+                members[i % len(members)]["assigned_patients"].append(str(patient["_id"]))
+
+    population = []
+    patient_docs = []
+    for number, user in enumerate(patient_users):
+        thresholds = random_thresholds(rng)
+        device_id = f"SYN-{str(user['_id'])[-8:].upper()}"
+        patient_docs.append(Patient(user_id=str(user["_id"]), device_id=device_id, device_calibrated=True, **thresholds).model_dump(by_alias=True, exclude={"id"}))
+        population.append({
+            "number": number,
+            "patient_id": str(user["_id"]),
+            "device_id": device_id,
+            "thresholds": thresholds,
+            "baseline": random_baseline(rng),
+        })
+
+    for docs in (patient_users, staff["caregiver"], staff["clinician"]):
+        if docs:
+            await db[USERS_COLLECTION].insert_many(docs, ordered=False)
+    if patient_docs:
+        await db[PATIENTS_COLLECTION].insert_many(patient_docs, ordered=False)
+    return population
+
+
+async def generate_vitals(
+    population: List[Dict[str, Any]],
+    start: datetime,
+    end: datetime,
+    interval_seconds: float = 300,
+    anomaly_rate: float = 0.5,
+    gap_rate: float = 0.1,
+    batch_size: int = 5000,
+    concurrency: int = 8,
+    seed: int = 0,
+    db=None,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> Tuple[int, int]:
+    """
+    Generate and store readings and alerts for patients.
+
+    Args:
+        population: Patients from create_population
+        start: Start of the generated period (UTC)
+        end: End of the generated period (UTC)
+        interval_seconds: Mean spacing of a patient's readings
+        anomaly_rate: Anomaly episodes per patient per day
+        gap_rate: Device gaps per patient per day
+        batch_size: Readings per insert
+        concurrency: Inserts in flight at once
+        seed: Random seed
+        db: Database instance (defaults to the application database)
+        progress: Called with (readings, alerts) written so far
+
+    Returns:
+        Tuple of (readings stored, alerts stored)
+    """
+    db = db if db is not None else get_database()
+    now = datetime.utcnow()
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+    errors: List[BaseException] = []
+    totals = {"readings": 0, "alerts": 0}
+
+    async def write(docs: List[Dict[str, Any]], alerts: List[Dict[str, Any]]):
+        try:
+            inserted, error = await insert_readings(docs, db)
+            if error:
+                raise RuntimeError(f"Vitals insert failed after {inserted} readings: {error}")
+            if alerts:
+                await db[ALERTS_COLLECTION].insert_many(alerts, ordered=False)
+            totals["readings"] += inserted
+            totals["alerts"] += len(alerts)
+            if progress:
+                progress(totals["readings"], totals["alerts"])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            slots.release()
+
+    async def submit(docs, alerts):
+        await slots.acquire()
+        # Stop generating once a write failed
+        if errors:
+            raise errors[0]
+        task = asyncio.create_task(write(docs, alerts))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    try:
+        for patient in population:
+            # Per-patient stream: the output does not depend on how patients are split
+            rng = np.random.default_rng([seed, patient["number"]])
+            open_runs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+            chunk_start = start
+            while chunk_start < end:
+                chunk_end = min(chunk_start + timedelta(days=CHUNK_DAYS), end)
+                measured_at, values = generate_series(
+                    patient["baseline"], chunk_start, chunk_end, interval_seconds, anomaly_rate, gap_rate, rng
+                )
+                is_anomaly, is_high, crossings = classify_readings(values, patient["thresholds"])
+                docs = reading_docs(patient["patient_id"], patient["device_id"], measured_at, values, is_anomaly, is_high)
+                alerts = episode_alerts(
+                    patient["patient_id"], measured_at, values, [doc["_id"] for doc in docs],
+                    patient["thresholds"], crossings, now, rng, open_runs, more=chunk_end < end
+                )
+                for offset in range(0, len(docs), batch_size):
+                    batch = docs[offset:offset + batch_size]
+                    batch_end = batch[-1]["measured_at"]
+                    batch_start = batch[0]["measured_at"]
+                    # Alerts go with their latest reading; runs from the previous chunk end in the first batch
+                    await submit(batch, [
+                        a for a in alerts
+                        if batch_start <= a["last_seen_at"] <= batch_end or (offset == 0 and a["last_seen_at"] < batch_start)
+                    ])
+                if not docs and alerts:
+                    # Chunk without readings (device gap)
+                    await submit([], alerts)
+                chunk_start = chunk_end
+                # Let in-flight writes progress between chunks
+                await asyncio.sleep(0)
+        await asyncio.gather(*pending)
+        if errors:
+            raise errors[0]
+    finally:
+        for task in pending:
+            task.cancel()
+    return totals["readings"], totals["alerts"]
@@ -0,0 +1,68 @@
+from app.core.database import get_database, USERS_COLLECTION
+from app.services.vitals_repository import find_latest_readings
+from bson import ObjectId
+from typing import List, Dict, Any, Optional
+
+# Latest-vitals fields shown in patient overviews
+OVERVIEW_VITALS_FIELDS = [
+    "systolic_bp",
+    "diastolic_bp",
+    "heart_rate",
+    "oxygen_saturation",
+    "temperature",
+    "measured_at",
+    "is_anomaly",
+]
+
+
+def to_object_ids(ids: List[str]) -> List[ObjectId]:
+    """
+    Convert string ids to ObjectIds, skipping malformed ones.
+
+    Args:
+        ids: List of string ids
+
+    Returns:
+        List of valid ObjectIds
+    """
+    return [ObjectId(value) for value in ids if ObjectId.is_valid(value)]
+
+
+async def get_users_by_ids(
+    user_ids: List[str],
+    projection: Optional[Dict[str, int]] = None,
+    db=None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch several users with a single $in query.
+
+    Args:
+        user_ids: User IDs (malformed ids are ignored)
+        projection: Optional field projection
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Dict of user id -> user document
+    """
+    db = db if db is not None else get_database()
+    object_ids = to_object_ids(user_ids)
+    if not object_ids:
+        return {}
+
+    cursor = db[USERS_COLLECTION].find({"_id": {"$in": object_ids}}, projection)
+    return {str(user["_id"]): user async for user in cursor}
+
+
+async def get_latest_vitals_many(patient_ids: List[str], db=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch the most recent vitals reading for several patients.
+
+    Args:
+        patient_ids: Patient user IDs
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Dict of patient id -> latest vitals fields (patients without
+        readings are absent)
+    """
+    return await find_latest_readings(patient_ids, OVERVIEW_VITALS_FIELDS, db)
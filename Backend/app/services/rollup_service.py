@@ -0,0 +1,333 @@
+from app.core.database import get_database, VITALS_ROLLUP_COLLECTIONS
+from app.services.vitals_repository import find_readings, aggregate_readings
+from app.core.config import settings
+from pymongo import UpdateOne
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+
+# Rollup tiers and their bucket size in seconds, finest first
+ROLLUP_TIERS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+# Vitals aggregated into rollup buckets
+ROLLUP_FIELDS = [
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "oxygen_saturation",
+    "temperature",
+    "respiratory_rate",
+]
+
+# Supported series resolutions in seconds
+RESOLUTIONS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "1h": 3600,
+    "6h": 21600,
+    "1d": 86400,
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch_seconds(moment: datetime) -> int:
+    return int((moment - EPOCH).total_seconds())
+
+
+def bucket_id(patient_id: str, bucket_start: datetime) -> str:
+    """Rollup document _id for a patient and bucket start."""
+    return f"{patient_id}:{_epoch_seconds(bucket_start)}"
+
+
+def plan_tier(resolution_seconds: int) -> Optional[str]:
+    """
+    Pick the coarsest rollup tier that can serve a resolution.
+
+    A tier qualifies when its bucket size evenly divides the requested
+    resolution, so its buckets can be merged without splitting any.
+
+    Args:
+        resolution_seconds: Requested bucket size
+
+    Returns:
+        Tier name, or None when raw readings must be used
+    """
+    if not settings.VITALS_ROLLUPS_ENABLED:
+        return None
+    eligible = [
+        tier for tier, size in ROLLUP_TIERS.items()
+        if size <= resolution_seconds and resolution_seconds % size == 0
+    ]
+    return eligible[-1] if eligible else None
+
+
+def fold_readings(vitals_docs: List[Dict[str, Any]], bucket_seconds: int) -> Dict[tuple, Dict[str, Any]]:
+    """Aggregate readings into (patient_id, bucket epoch) -> counters."""
+    buckets: Dict[tuple, Dict[str, Any]] = {}
+    for doc in vitals_docs:
+        epoch = _epoch_seconds(doc["measured_at"])
+        key = (doc["patient_id"], epoch - epoch % bucket_seconds)
+        bucket = buckets.setdefault(key, {"count": 0, "vitals": {}})
+        bucket["count"] += 1
+        for field in ROLLUP_FIELDS:
+            value = doc.get(field)
+            if value is None:
+                continue
+            stats = bucket["vitals"].get(field)
+            if stats is None:
+                bucket["vitals"][field] = {"n": 1, "sum": value, "sumsq": value * value, "min": value, "max": value}
+            else:
+                stats["n"] += 1
+                stats["sum"] += value
+                stats["sumsq"] += value * value
+                stats["min"] = min(stats["min"], value)
+                stats["max"] = max(stats["max"], value)
+    return buckets
+
+
+async def record_rollups(vitals_docs: List[Dict[str, Any]], db=None) -> None:
+    """
+    Fold newly stored readings into every rollup tier.
+
+    Readings are pre-aggregated per bucket in memory, then each tier gets
+    one unordered bulk upsert; the tiers are written concurrently.
+
+    Args:
+        vitals_docs: Stored vitals documents
+        db: Database instance (defaults to the application database)
+    """
+    if not vitals_docs or not settings.VITALS_ROLLUPS_ENABLED:
+        return
+    db = db if db is not None else get_database()
+
+    writes = []
+    for tier, bucket_seconds in ROLLUP_TIERS.items():
+        operations = []
+        for (patient_id, epoch), bucket in fold_readings(vitals_docs, bucket_seconds).items():
+            increments = {"count": bucket["count"]}
+            minimums, maximums = {}, {}
+            for field, stats in bucket["vitals"].items():
+                increments[f"{field}.n"] = stats["n"]
+                increments[f"{field}.sum"] = stats["sum"]
+                increments[f"{field}.sumsq"] = stats["sumsq"]
+                minimums[f"{field}.min"] = stats["min"]
+                maximums[f"{field}.max"] = stats["max"]
+
+            update = {
+                "$inc": increments,
+                "$setOnInsert": {
+                    "patient_id": patient_id,
+                    "bucket_start": EPOCH + timedelta(seconds=epoch)
+                }
+            }
+            if minimums:
+                update["$min"] = minimums
+                update["$max"] = maximums
+            operations.append(UpdateOne({"_id": f"{patient_id}:{epoch}"}, update, upsert=True))
+
+        writes.append(db[VITALS_ROLLUP_COLLECTIONS[tier]].bulk_write(operations, ordered=False))
+
+    await asyncio.gather(*writes)
+
+
+async def load_rollups(
+    patient_id: str,
+    tier: str,
+    start: datetime,
+    end: Optional[datetime] = None,
+    db=None
+) -> List[Dict[str, Any]]:
+    """
+    Read a patient's rollup buckets for a time range, oldest first.
+
+    Buckets are selected by start time, so the first bucket may begin
+    up to one bucket size before `start`.
+    """
+    db = db if db is not None else get_database()
+
+    bucket_seconds = ROLLUP_TIERS[tier]
+    aligned_start = EPOCH + timedelta(seconds=_epoch_seconds(start) // bucket_seconds * bucket_seconds)
+    time_range = {"$gte": aligned_start}
+    if end is not None:
+        time_range["$lt"] = end
+
+    cursor = db[VITALS_ROLLUP_COLLECTIONS[tier]].find(
+        {"patient_id": patient_id, "bucket_start": time_range}
+    ).sort("bucket_start", 1)
+    return await cursor.to_list(length=None)
+
+
+def merge_buckets(rollups: List[Dict[str, Any]], resolution_seconds: int) -> List[Dict[str, Any]]:
+    """
+    Merge time-sorted rollup buckets into coarser buckets.
+
+    Counters are additive, so merging only sums n/sum/sumsq and combines
+    min/max. The resolution must be a multiple of the source bucket size.
+
+    Returns:
+        Buckets ({"start", "count", "vitals": {field: counters}}), oldest first
+    """
+    merged: List[Dict[str, Any]] = []
+    for rollup in rollups:
+        epoch = _epoch_seconds(rollup["bucket_start"])
+        start = EPOCH + timedelta(seconds=epoch - epoch % resolution_seconds)
+        if not merged or merged[-1]["start"] != start:
+            merged.append({"start": start, "count": 0, "vitals": {}})
+        bucket = merged[-1]
+        bucket["count"] += rollup.get("count", 0)
+        for field in ROLLUP_FIELDS:
+            stats = rollup.get(field)
+            if not stats or not stats.get("n"):
+                continue
+            target = bucket["vitals"].get(field)
+            if target is None:
+                bucket["vitals"][field] = {key: stats[key] for key in ("n", "sum", "sumsq", "min", "max")}
+            else:
+                target["n"] += stats["n"]
+                target["sum"] += stats["sum"]
+                target["sumsq"] += stats["sumsq"]
+                target["min"] = min(target["min"], stats["min"])
+                target["max"] = max(target["max"], stats["max"])
+    return merged
+
+
+def describe_counters(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn n/sum/sumsq/min/max counters into count/average/min/max/std_dev."""
+    average = stats["sum"] / stats["n"]
+    variance = max(stats["sumsq"] / stats["n"] - average * average, 0.0)
+    return {
+        "count": stats["n"],
+        "average": average,
+        "min_value": stats["min"],
+        "max_value": stats["max"],
+        "std_dev": variance ** 0.5,
+    }
+
+
+async def get_vitals_series(
+    patient_id: str,
+    start: datetime,
+    resolution_seconds: int,
+    db=None
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Bucketed vitals series for a patient from `start` until now.
+
+    The planner reads the coarsest rollup tier that divides the requested
+    resolution; raw readings are only scanned when rollups are disabled
+    or no tier fits.
+
+    Args:
+        patient_id: Patient user ID
+        start: Series start
+        resolution_seconds: Bucket size of the returned series
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Tuple of (source tier or "raw", buckets oldest first)
+    """
+    db = db if db is not None else get_database()
+
+    tier = plan_tier(resolution_seconds)
+    if tier is not None:
+        rollups = await load_rollups(patient_id, tier, start, db=db)
+        return tier, merge_buckets(rollups, resolution_seconds)
+
+    readings = await find_readings(
+        patient_id, start, fields=["patient_id", "measured_at", *ROLLUP_FIELDS], db=db
+    )
+
+    buckets = []
+    for (_, epoch), bucket in sorted(fold_readings(readings, resolution_seconds).items()):
+        buckets.append({
+            "start": EPOCH + timedelta(seconds=epoch),
+            "count": bucket["count"],
+            "vitals": bucket["vitals"],
+        })
+    return "raw", buckets
+
+
+def _backfill_stages(bucket_seconds: int, into: str) -> List[Dict[str, Any]]:
+    """Server-side aggregation stages recomputing one tier's buckets with $merge."""
+    bucket_ms = bucket_seconds * 1000
+    measured_ms = {"$toLong": "$measured_at"}
+
+    group = {
+        "_id": {
+            "patient_id": "$patient_id",
+            "bucket_ms": {"$subtract": [measured_ms, {"$mod": [measured_ms, bucket_ms]}]}
+        },
+        "count": {"$sum": 1},
+    }
+    shape = {
+        "_id": {
+            "$concat": [
+                "$_id.patient_id",
+                ":",
+                {"$toString": {"$toLong": {"$divide": ["$_id.bucket_ms", 1000]}}}
+            ]
+        },
+        "patient_id": "$_id.patient_id",
+        "bucket_start": {"$toDate": "$_id.bucket_ms"},
+        "count": 1,
+    }
+    for field in ROLLUP_FIELDS:
+        group[f"{field}_n"] = {"$sum": {"$cond": [{"$isNumber": f"${field}"}, 1, 0]}}
+        group[f"{field}_sum"] = {"$sum": f"${field}"}
+        group[f"{field}_sumsq"] = {"$sum": {"$multiply": [f"${field}", f"${field}"]}}
+        group[f"{field}_min"] = {"$min": f"${field}"}
+        group[f"{field}_max"] = {"$max": f"${field}"}
+        shape[field] = {
+            "n": f"${field}_n",
+            "sum": f"${field}_sum",
+            "sumsq": f"${field}_sumsq",
+            "min": f"${field}_min",
+            "max": f"${field}_max",
+        }
+
+    return [
+        {"$group": group},
+        {"$project": shape},
+        {"$merge": {"into": into, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+async def backfill_rollups(
+    patient_ids: Optional[List[str]] = None,
+    since: Optional[datetime] = None,
+    tiers: Optional[List[str]] = None,
+    db=None
+) -> List[str]:
+    """
+    Recompute rollup buckets from the raw readings.
+
+    Runs one aggregation per tier on the server and merges the result,
+    replacing existing buckets. `since` is aligned down to a whole day
+    so no bucket is recomputed from a partial range.
+
+    Args:
+        patient_ids: Limit to these patients (default: all)
+        since: Only recompute buckets from this time on (default: all data)
+        tiers: Tiers to rebuild (default: all)
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Names of the tiers rebuilt
+    """
+    db = db if db is not None else get_database()
+
+    match: Dict[str, Any] = {}
+    if patient_ids:
+        match["patient_id"] = {"$in": patient_ids}
+    if since is not None:
+        day = ROLLUP_TIERS["1d"]
+        match["measured_at"] = {"$gte": EPOCH + timedelta(seconds=_epoch_seconds(since) // day * day)}
+
+    rebuilt = []
+    for tier in tiers or list(ROLLUP_TIERS):
+        stages = _backfill_stages(ROLLUP_TIERS[tier], VITALS_ROLLUP_COLLECTIONS[tier])
+        await aggregate_readings(match, stages, db).to_list(length=None)
+        rebuilt.append(tier)
+    return rebuilt
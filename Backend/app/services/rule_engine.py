@@ -0,0 +1,429 @@
+from app.models.vitals import VitalSigns
+from app.core.database import get_database, PATIENTS_COLLECTION, ALERT_RULES_COLLECTION
+from app.services.threshold_service import get_patient_thresholds, invalidate_patient_thresholds, VERSION_FIELD
+from app.core.config import settings
+from app.core.cache import TTLCache
+from app.services.alert_service import create_alert_dict
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from functools import lru_cache
+from operator import attrgetter
+import math
+import numpy as np
+
+# Vitals the engine evaluates, in evaluation order (column order of batch arrays)
+RULE_VITALS = [
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "oxygen_saturation",
+    "temperature",
+    "respiratory_rate",
+]
+
+# Alert wording per vital: (title noun, message label, unit suffix)
+VITAL_LABELS = {
+    "heart_rate": ("Heart Rate", "Heart rate", " BPM"),
+    "systolic_bp": ("Blood Pressure", "Systolic BP", " mmHg"),
+    "diastolic_bp": ("Blood Pressure", "Diastolic BP", " mmHg"),
+    "oxygen_saturation": ("Oxygen Saturation", "Oxygen saturation", "%"),
+    "temperature": ("Body Temperature", "Temperature", "°C"),
+    "respiratory_rate": ("Respiratory Rate", "Respiratory rate", " breaths/min"),
+}
+
+# Patient threshold fields per vital: (min field, min default, max field, max default).
+# Defaults match the Patient model.
+THRESHOLD_FIELDS = {
+    "heart_rate": ("heart_rate_min", 60, "heart_rate_max", 100),
+    "systolic_bp": ("systolic_bp_min", 90, "systolic_bp_max", 140),
+    "diastolic_bp": ("diastolic_bp_min", 60, "diastolic_bp_max", 90),
+    "oxygen_saturation": ("oxygen_saturation_min", 95, None, None),
+    "temperature": ("temperature_min", 36.1, "temperature_max", 37.2),
+    "respiratory_rate": ("respiratory_rate_min", 12, "respiratory_rate_max", 20),
+}
+
+# When a threshold alert escalates to critical: ("offset", n) is relative
+# to the crossed threshold, ("absolute", n) a fixed value; None never escalates
+CRITICAL_BELOW = {
+    "heart_rate": ("offset", -10),
+    "oxygen_saturation": ("absolute", 90),
+    "respiratory_rate": ("absolute", 8),
+}
+CRITICAL_ABOVE = {
+    "heart_rate": ("offset", 20),
+    "systolic_bp": ("absolute", 180),
+    "diastolic_bp": ("absolute", 120),
+    "temperature": ("absolute", 39),
+    "respiratory_rate": ("absolute", 30),
+}
+
+# Reads all evaluated vitals of a reading in one call
+_read_vitals = attrgetter(*RULE_VITALS)
+
+# AlertRule severity -> alert type
+RULE_ALERT_TYPES = {"high": "critical", "medium": "warning", "low": "info"}
+
+
+class Rule:
+    """
+    One compiled row of a rule table.
+
+    A value triggers the row when it lies outside [low, high] (or inside it
+    for `inside` rows). A triggered alert is critical when the value is
+    below `critical_below` or above `critical_above`.
+    """
+
+    __slots__ = (
+        "vital_type", "low", "high", "inside", "critical_below", "critical_above",
+        "alert_type", "threshold_crossed", "anomaly_type", "title", "message",
+    )
+
+    def __init__(
+        self,
+        vital_type: str,
+        low: float,
+        high: float,
+        title: str,
+        message: str,
+        threshold_crossed: str,
+        anomaly_type: str,
+        alert_type: str = "warning",
+        inside: bool = False,
+        critical_below: float = -math.inf,
+        critical_above: float = math.inf
+    ):
+        self.vital_type = vital_type
+        self.low = low
+        self.high = high
+        self.inside = inside
+        self.critical_below = critical_below
+        self.critical_above = critical_above
+        self.alert_type = alert_type
+        self.threshold_crossed = threshold_crossed
+        self.anomaly_type = anomaly_type
+        self.title = title
+        self.message = message  # Template with a {value} placeholder
+
+    def alert_type_for(self, value: float) -> str:
+        if value < self.critical_below or value > self.critical_above:
+            return "critical"
+        return self.alert_type
+
+
+@lru_cache(maxsize=None)
+def _range_check_factory(positions: Tuple[int, ...]) -> Callable[..., Callable[[VitalSigns], bool]]:
+    """
+    Generate a factory of range checks for tables with rows on `positions`.
+
+    The factory takes (low, high) for each position and returns a function
+    telling whether a reading cannot trigger any row: it reads each vital
+    straight off the reading and compares it with the skip range held in a
+    closure. Normal readings, the vast majority, are thereby cleared
+    without looping over the table or building tuples. Factories are
+    generated once per combination of vitals, so compiling a table stays
+    cheap.
+    """
+    parameters = ", ".join(f"low_{index}, high_{index}" for index in range(len(positions)))
+    lines = [f"def factory({parameters}):", "    def in_range(vitals):"]
+    for index, position in enumerate(positions):
+        lines.append(f"        value = vitals.{RULE_VITALS[position]}")
+        lines.append(f"        if value is not None and not low_{index} <= value <= high_{index}: return False")
+    lines += ["        return True", "    return in_range"]
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+    return namespace["factory"]
+
+
+def _critical_bound(spec: Optional[Tuple[str, float]], threshold: float, default: float) -> float:
+    if spec is None:
+        return default
+    kind, amount = spec
+    return threshold + amount if kind == "offset" else amount
+
+
+def _threshold_rules(patient_data: Dict[str, Any]) -> List[Rule]:
+    """Compile the patient's min/max thresholds (one row per side)."""
+    rules = []
+    for vital_type in RULE_VITALS:
+        min_field, min_default, max_field, max_default = THRESHOLD_FIELDS[vital_type]
+        noun, label, unit = VITAL_LABELS[vital_type]
+
+        if min_field:
+            minimum = patient_data.get(min_field, min_default)
+            rules.append(Rule(
+                vital_type=vital_type,
+                low=minimum,
+                high=math.inf,
+                title=f"Low {noun} Detected",
+                message=f"{label} ({{value}}{unit}) is below minimum threshold ({minimum}{unit})",
+                threshold_crossed="below_min",
+                anomaly_type="low",
+                critical_below=_critical_bound(CRITICAL_BELOW.get(vital_type), minimum, -math.inf),
+            ))
+        if max_field:
+            maximum = patient_data.get(max_field, max_default)
+            rules.append(Rule(
+                vital_type=vital_type,
+                low=-math.inf,
+                high=maximum,
+                title=f"High {noun} Detected",
+                message=f"{label} ({{value}}{unit}) is above maximum threshold ({maximum}{unit})",
+                threshold_crossed="above_max",
+                anomaly_type="high",
+                critical_above=_critical_bound(CRITICAL_ABOVE.get(vital_type), maximum, math.inf),
+            ))
+    return rules
+
+
+def _alert_rule_rows(rule: Dict[str, Any]) -> List[Rule]:
+    """Compile one active AlertRule document (outside rules give two rows)."""
+    vital_type = rule.get("vital_type")
+    if vital_type not in VITAL_LABELS:
+        return []
+    noun, label, unit = VITAL_LABELS[vital_type]
+    alert_type = RULE_ALERT_TYPES.get(rule.get("alert_severity"), "warning")
+    title = f"{noun} Alert Rule Triggered"
+    condition = rule.get("condition")
+    value = rule.get("threshold_value")
+    minimum = rule.get("threshold_min")
+    maximum = rule.get("threshold_max")
+
+    if condition == "above" and value is not None:
+        return [Rule(
+            vital_type, -math.inf, value, title,
+            f"{label} ({{value}}{unit}) is above rule threshold ({value}{unit})",
+            "above_max", "high", alert_type
+        )]
+    if condition == "below" and value is not None:
+        return [Rule(
+            vital_type, value, math.inf, title,
+            f"{label} ({{value}}{unit}) is below rule threshold ({value}{unit})",
+            "below_min", "low", alert_type
+        )]
+    if condition == "between" and minimum is not None and maximum is not None:
+        return [Rule(
+            vital_type, minimum, maximum, title,
+            f"{label} ({{value}}{unit}) is within rule range ({minimum}-{maximum}{unit})",
+            "within_range", "range", alert_type, inside=True
+        )]
+    if condition == "outside" and minimum is not None and maximum is not None:
+        return [
+            Rule(
+                vital_type, minimum, math.inf, title,
+                f"{label} ({{value}}{unit}) is below rule range ({minimum}-{maximum}{unit})",
+                "below_min", "low", alert_type
+            ),
+            Rule(
+                vital_type, -math.inf, maximum, title,
+                f"{label} ({{value}}{unit}) is above rule range ({minimum}-{maximum}{unit})",
+                "above_max", "high", alert_type
+            ),
+        ]
+    return []
+
+
+class RuleTable:
+    """
+    Flat, compiled evaluation table for one patient.
+
+    Rows are grouped by vital in RULE_VITALS order (per vital: low and high
+    threshold, then the patient's active alert rules) and evaluated in
+    that order; the anomaly type of a reading is that of the last
+    triggered row.
+    """
+
+    def __init__(self, rules: List[Rule]):
+        rules = sorted(rules, key=lambda rule: RULE_VITALS.index(rule.vital_type))
+        self.rules = rules
+        self.columns = np.array([RULE_VITALS.index(rule.vital_type) for rule in rules], dtype=np.int64)
+        self.low = np.array([rule.low for rule in rules], dtype=np.float64)
+        self.high = np.array([rule.high for rule in rules], dtype=np.float64)
+        self.inside = np.array([rule.inside for rule in rules], dtype=bool)
+        self.critical_below = np.array([rule.critical_below for rule in rules], dtype=np.float64)
+        self.critical_above = np.array([rule.critical_above for rule in rules], dtype=np.float64)
+        # Scalar path: per vital, a value inside [safe_low, safe_high]
+        # cannot trigger any of its rows and is skipped with one comparison
+        self._vital_checks = []
+        for position, vital_type in enumerate(RULE_VITALS):
+            rows = [rule for rule in rules if rule.vital_type == vital_type]
+            if not rows:
+                continue
+            if any(rule.inside for rule in rows):
+                safe_low, safe_high = math.inf, -math.inf
+            else:
+                safe_low = max(rule.low for rule in rows)
+                safe_high = min(rule.high for rule in rows)
+            self._vital_checks.append((position, safe_low, safe_high, rows))
+        self._in_range = _range_check_factory(tuple(check[0] for check in self._vital_checks))(
+            *(bound for check in self._vital_checks for bound in check[1:3])
+        )
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _alert(self, rule: Rule, vitals: VitalSigns, value: Any, alert_type: str) -> Dict[str, Any]:
+        return create_alert_dict(
+            patient_id=vitals.patient_id,
+            vital_type=rule.vital_type,
+            vital_value=value,
+            threshold_crossed=rule.threshold_crossed,
+            title=rule.title,
+            message=rule.message.format(value=value),
+            alert_type=alert_type
+        )
+
+    def evaluate(self, vitals: VitalSigns) -> Tuple[bool, Optional[str], List[Dict[str, Any]]]:
+        """
+        Evaluate one reading in a single pass over the table.
+
+        Returns:
+            Tuple of (is_anomaly, anomaly_type, list_of_alerts)
+        """
+        if self._in_range(vitals):
+            return False, None, []
+        anomaly_type = None
+        alerts = []
+        values = _read_vitals(vitals)
+        for position, safe_low, safe_high, rows in self._vital_checks:
+            value = values[position]
+            if value is None or safe_low <= value <= safe_high:
+                continue
+            for rule in rows:
+                if rule.inside:
+                    if not rule.low <= value <= rule.high:
+                        continue
+                elif rule.low <= value <= rule.high:
+                    continue
+                anomaly_type = rule.anomaly_type
+                alerts.append(self._alert(rule, vitals, value, rule.alert_type_for(value)))
+        return bool(alerts), anomaly_type, alerts
+
+    def evaluate_batch(self, readings: List[VitalSigns]) -> List[Tuple[bool, Optional[str], List[Dict[str, Any]]]]:
+        """
+        Evaluate many readings at once with NumPy.
+
+        Readings become a (readings x vitals) array with NaN for missing
+        values; all rows are compared in one vectorised step and only the
+        triggered cells are turned into alert dicts.
+
+        Returns:
+            One (is_anomaly, anomaly_type, alerts) tuple per reading
+        """
+        no_alerts = (False, None, [])
+        if not readings or not self.rules:
+            return [no_alerts] * len(readings)
+
+        # None becomes NaN, which compares False against every bound
+        values = np.array([_read_vitals(vitals) for vitals in readings], dtype=np.float64)[:, self.columns]
+        outside = (values < self.low) | (values > self.high)
+        within = (values >= self.low) & (values <= self.high)
+        triggered = np.where(self.inside, within, outside)
+        critical = (values < self.critical_below) | (values > self.critical_above)
+
+        results: List[Tuple[bool, Optional[str], List[Dict[str, Any]]]] = [no_alerts] * len(readings)
+        # nonzero() walks row-major, so rows stay in table order per reading
+        for reading_index, rule_index in zip(*np.nonzero(triggered)):
+            vitals = readings[reading_index]
+            rule = self.rules[rule_index]
+            value = getattr(vitals, rule.vital_type)
+            alert_type = "critical" if critical[reading_index, rule_index] else rule.alert_type
+            alerts = results[reading_index][2] if results[reading_index] is not no_alerts else []
+            alerts.append(self._alert(rule, vitals, value, alert_type))
+            results[reading_index] = (True, rule.anomaly_type, alerts)
+        return results
+
+
+def compile_rule_table(
+    patient_data: Optional[Dict[str, Any]],
+    alert_rules: Optional[List[Dict[str, Any]]] = None
+) -> RuleTable:
+    """
+    Compile patient thresholds and active alert rules into a RuleTable.
+
+    Args:
+        patient_data: Patient document with threshold settings (None: no
+            threshold rows, only alert rules)
+        alert_rules: Active AlertRule documents of the patient
+
+    Returns:
+        Compiled RuleTable
+    """
+    rules = _threshold_rules(patient_data) if patient_data else []
+    for rule in alert_rules or []:
+        if rule.get("is_active", True):
+            rules.extend(_alert_rule_rows(rule))
+    return RuleTable(rules)
+
+
+# (thresholds version, compiled table) keyed by patient id
+rule_table_cache = TTLCache(
+    "rule_table",
+    maxsize=settings.RULE_TABLE_CACHE_MAX_SIZE,
+    ttl=settings.RULE_TABLE_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_rule_table(patient_id: Optional[str] = None) -> None:
+    """
+    Drop a patient's (or every patient's) compiled rule table.
+
+    Call after any write that changes the patient's alert rules. Threshold
+    changes only need invalidate_patient_thresholds: a table compiled from
+    an older thresholds version is recompiled on its next use.
+    """
+    if patient_id:
+        rule_table_cache.invalidate(patient_id)
+    else:
+        rule_table_cache.clear()
+
+
+async def get_rule_table(patient_id: str, db=None) -> RuleTable:
+    """
+    Get the compiled rule table for a patient, compiling it on a cache miss.
+
+    Thresholds come from the threshold cache, so a cached table costs no
+    database round trip at all.
+
+    Args:
+        patient_id: Patient user ID
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        RuleTable (empty if the patient has no profile and no rules)
+    """
+    thresholds = await get_patient_thresholds(patient_id, db)
+    version = thresholds[VERSION_FIELD] if thresholds else None
+
+    cached = rule_table_cache.get(patient_id, None)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    db = db if db is not None else get_database()
+    alert_rules = await db[ALERT_RULES_COLLECTION].find(
+        {"patient_id": patient_id, "is_active": True}
+    ).to_list(length=None)
+
+    table = compile_rule_table(thresholds, alert_rules)
+    rule_table_cache.set(patient_id, (version, table))
+    return table
+
+
+async def watch_rule_changes(db) -> None:
+    """
+    Invalidate cached thresholds and rule tables on changes by any worker.
+
+    Used when THRESHOLD_INVALIDATION is "change_stream" (requires a replica
+    set). Runs until cancelled.
+    """
+    pipeline = [{"$match": {"ns.coll": {"$in": [PATIENTS_COLLECTION, ALERT_RULES_COLLECTION]}}}]
+    async with db.watch(pipeline, full_document="updateLookup") as stream:
+        async for change in stream:
+            document = change.get("fullDocument")
+            collection_name = change["ns"]["coll"]
+            if document is None:
+                # Deletes carry no patient id; start over
+                invalidate_patient_thresholds()
+                invalidate_rule_table()
+            elif collection_name == PATIENTS_COLLECTION:
+                invalidate_patient_thresholds(document.get("user_id"))
+            else:
+                invalidate_rule_table(document.get("patient_id"))
@@ -0,0 +1,220 @@
+from app.core.database import get_database, LATEST_VITALS_COLLECTION
+from app.services.vitals_repository import aggregate_readings
+from pymongo import ReplaceOne
+from collections import Counter
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+
+# Reading fields copied into the per-patient snapshot
+SNAPSHOT_FIELDS = [
+    "patient_id",
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "oxygen_saturation",
+    "temperature",
+    "respiratory_rate",
+    "measurement_type",
+    "is_anomaly",
+    "anomaly_type",
+    "measured_at",
+    "created_at",
+]
+
+EPOCH = datetime(1970, 1, 1)
+
+# Readings are counted in 24 hourly slots (slot = hour % 24)
+HOURLY_SLOTS = 24
+
+
+def _hour_number(moment: datetime) -> int:
+    """Whole hours since the epoch for a naive UTC datetime."""
+    return int((moment - EPOCH).total_seconds() // 3600)
+
+
+def _slot_key(hour: int) -> str:
+    return f"h{hour % HOURLY_SLOTS:02d}"
+
+
+def readings_last_24h(snapshot: Optional[Dict[str, Any]], now: Optional[datetime] = None) -> int:
+    """
+    Count readings in the last 24 hours from a snapshot's hourly slots.
+
+    Resolution is one hour: the current (partial) hour plus the 23
+    previous full hours are counted.
+
+    Args:
+        snapshot: latest_vitals document (or None)
+        now: Reference time (defaults to utcnow)
+
+    Returns:
+        Number of readings
+    """
+    if not snapshot:
+        return 0
+    current_hour = _hour_number(now or datetime.utcnow())
+    return sum(
+        slot.get("count", 0)
+        for slot in (snapshot.get("hourly_counts") or {}).values()
+        if current_hour - HOURLY_SLOTS < slot.get("hour", -1) <= current_hour
+    )
+
+
+async def update_latest_vitals(vitals_docs: List[Dict[str, Any]], db=None) -> None:
+    """
+    Fold newly stored readings of one patient into their snapshot.
+
+    A single upsert with an update pipeline replaces the snapshot fields
+    only when the newest reading is at least as recent as the stored one
+    (so late, out-of-order batches don't roll it back) and bumps the
+    hourly reading counters.
+
+    Args:
+        vitals_docs: Stored vitals documents (with _id) of a single patient
+        db: Database instance (defaults to the application database)
+    """
+    if not vitals_docs:
+        return
+    db = db if db is not None else get_database()
+
+    newest = max(vitals_docs, key=lambda doc: doc["measured_at"])
+    patient_id = newest["patient_id"]
+    is_newer = {"$gte": [newest["measured_at"], {"$ifNull": ["$measured_at", EPOCH]}]}
+
+    fields = {field: newest.get(field) for field in SNAPSHOT_FIELDS}
+    fields["vital_id"] = str(newest["_id"])
+    update = {
+        field: {"$cond": [is_newer, {"$literal": value}, f"${field}"]}
+        for field, value in fields.items()
+    }
+
+    # Hourly counters, skipping readings already outside the 24h window
+    current_hour = _hour_number(datetime.utcnow())
+    counts = Counter(_hour_number(doc["measured_at"]) for doc in vitals_docs)
+    for hour, count in counts.items():
+        if hour <= current_hour - HOURLY_SLOTS:
+            continue
+        slot = f"$hourly_counts.{_slot_key(hour)}"
+        update[f"hourly_counts.{_slot_key(hour)}"] = {
+            "$cond": [
+                {"$eq": [f"{slot}.hour", hour]},
+                {"hour": hour, "count": {"$add": [f"{slot}.count", count]}},
+                {
+                    "$cond": [
+                        {"$lt": [{"$ifNull": [f"{slot}.hour", -1]}, hour]},
+                        {"hour": hour, "count": count},
+                        slot
+                    ]
+                }
+            ]
+        }
+    update["updated_at"] = datetime.utcnow()
+
+    await db[LATEST_VITALS_COLLECTION].update_one(
+        {"_id": patient_id},
+        [{"$set": update}],
+        upsert=True
+    )
+
+
+async def get_latest_snapshot(patient_id: str, db=None) -> Optional[Dict[str, Any]]:
+    """
+    Get a patient's latest-vitals snapshot.
+
+    Returns:
+        Snapshot document, or None if the patient has no readings
+    """
+    db = db if db is not None else get_database()
+    return await db[LATEST_VITALS_COLLECTION].find_one({"_id": patient_id})
+
+
+async def get_latest_snapshots(patient_ids: List[str], db=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Get snapshots for several patients with a single $in query.
+
+    Returns:
+        Dict of patient id -> snapshot (patients without one are absent)
+    """
+    db = db if db is not None else get_database()
+    if not patient_ids:
+        return {}
+    cursor = db[LATEST_VITALS_COLLECTION].find({"_id": {"$in": patient_ids}})
+    return {snapshot["_id"]: snapshot async for snapshot in cursor}
+
+
+def snapshot_to_vitals(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a snapshot into a vitals document shape (_id = reading id)."""
+    vitals_data = {field: snapshot.get(field) for field in SNAPSHOT_FIELDS}
+    vitals_data["_id"] = snapshot["vital_id"]
+    return vitals_data
+
+
+async def rebuild_latest_vitals(patient_ids: Optional[List[str]] = None, db=None) -> int:
+    """
+    Rebuild snapshots from the raw vitals collection.
+
+    Args:
+        patient_ids: Limit the rebuild to these patients (default: all)
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Number of snapshots written
+    """
+    db = db if db is not None else get_database()
+    match = {"patient_id": {"$in": patient_ids}} if patient_ids else {}
+
+    # Latest reading per patient
+    latest_group = {"_id": "$patient_id", "vital_id": {"$first": "$_id"}}
+    for field in SNAPSHOT_FIELDS:
+        latest_group[field] = {"$first": f"${field}"}
+    latest = aggregate_readings(match, [
+        {"$sort": {"patient_id": 1, "measured_at": -1}},
+        {"$group": latest_group},
+    ], db)
+
+    # Hourly reading counts for the last 24 hours
+    now = datetime.utcnow()
+    current_hour = _hour_number(now)
+    window_start = EPOCH + timedelta(hours=current_hour - HOURLY_SLOTS + 1)
+    hourly = aggregate_readings({**match, "measured_at": {"$gte": window_start}}, [
+        {
+            "$group": {
+                "_id": {
+                    "patient_id": "$patient_id",
+                    "hour": {
+                        "$floor": {
+                            "$divide": [{"$subtract": ["$measured_at", EPOCH]}, 3600 * 1000]
+                        }
+                    }
+                },
+                "count": {"$sum": 1}
+            }
+        },
+    ], db)
+
+    hourly_counts: Dict[str, Dict[str, Dict[str, int]]] = {}
+    async for bucket in hourly:
+        hour = int(bucket["_id"]["hour"])
+        hourly_counts.setdefault(bucket["_id"]["patient_id"], {})[_slot_key(hour)] = {
+            "hour": hour,
+            "count": bucket["count"]
+        }
+
+    operations = []
+    written = 0
+    async for doc in latest:
+        patient_id = doc.pop("_id")
+        doc["vital_id"] = str(doc["vital_id"])
+        doc["hourly_counts"] = hourly_counts.get(patient_id, {})
+        doc["updated_at"] = now
+        operations.append(ReplaceOne({"_id": patient_id}, doc, upsert=True))
+        if len(operations) >= 1000:
+            await db[LATEST_VITALS_COLLECTION].bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+
+    if operations:
+        await db[LATEST_VITALS_COLLECTION].bulk_write(operations, ordered=False)
+        written += len(operations)
+
+    return written
@@ -0,0 +1,133 @@
+from app.core.config import settings
+from typing import Any, Dict, Iterable, Optional, Set
+import asyncio
+
+
+class Subscription:
+    """
+    A live-stream subscriber with its own bounded event queue.
+
+    When the queue is full the configured policy applies: "drop_oldest"
+    discards the oldest queued event to make room, "disconnect" closes
+    the subscription so the endpoint can hang up on the slow client.
+    """
+
+    def __init__(self, patient_ids: Iterable[str], maxsize: int, drop_policy: str):
+        self.patient_ids: Set[str] = set(patient_ids)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, event: Dict[str, Any]) -> bool:
+        """
+        Queue an event without blocking the publisher.
+
+        Returns:
+            True if the event was queued
+        """
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.drop_policy == "disconnect":
+                self.close()
+                return False
+            self.queue.get_nowait()
+            self.queue.put_nowait(event)
+            return True
+
+    def close(self) -> None:
+        """Mark closed and wake up a waiting consumer."""
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def next_event(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next event.
+
+        Returns:
+            Event dict, or None on timeout or when the subscription closed
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class StreamHub:
+    """
+    In-process pub/sub hub fanning out events by patient id.
+
+    Only subscribers connected to this worker process receive events
+    published here; see STREAM_SOURCE for multi-worker deployments.
+    """
+
+    def __init__(self, queue_size: int, drop_policy: str):
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, patient_ids: Iterable[str]) -> Subscription:
+        """Register a subscriber for events of the given patients."""
+        subscription = Subscription(patient_ids, self.queue_size, self.drop_policy)
+        for patient_id in subscription.patient_ids:
+            self._subscribers.setdefault(patient_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber from every patient it was registered for."""
+        self.dropped += subscription.dropped
+        subscription.dropped = 0
+        for patient_id in subscription.patient_ids:
+            subscribers = self._subscribers.get(patient_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[patient_id]
+
+    def has_subscribers(self, patient_id: str) -> bool:
+        return patient_id in self._subscribers
+
+    def publish(self, patient_id: str, event: Dict[str, Any]) -> int:
+        """
+        Fan an event out to every subscriber of a patient.
+
+        Returns:
+            Number of subscribers the event was queued for
+        """
+        self.published += 1
+        delivered = 0
+        for subscription in list(self._subscribers.get(patient_id, ())):
+            if subscription.offer(event):
+                delivered += 1
+        self.delivered += delivered
+        return delivered
+
+    def stats(self) -> Dict[str, Any]:
+        subscriptions = {sub for subs in self._subscribers.values() for sub in subs}
+        return {
+            "subscribers": len(subscriptions),
+            "patients": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped + sum(sub.dropped for sub in subscriptions),
+        }
+
+
+# Global hub for live vitals (and alert) events
+vitals_hub = StreamHub(
+    queue_size=settings.STREAM_QUEUE_SIZE,
+    drop_policy=settings.STREAM_DROP_POLICY
+)
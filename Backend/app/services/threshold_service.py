@@ -0,0 +1,100 @@
+from app.core.database import get_database, PATIENTS_COLLECTION
+from app.core.config import settings
+from app.core.cache import TTLCache, MISSING
+from pymongo import ReturnDocument
+from typing import Dict, Any, Optional
+from datetime import datetime
+
+# Patient fields holding alert thresholds
+THRESHOLD_FIELD_NAMES = [
+    "heart_rate_min",
+    "heart_rate_max",
+    "systolic_bp_min",
+    "systolic_bp_max",
+    "diastolic_bp_min",
+    "diastolic_bp_max",
+    "oxygen_saturation_min",
+    "temperature_min",
+    "temperature_max",
+    "respiratory_rate_min",
+    "respiratory_rate_max",
+]
+
+# Bumped on every threshold change; cached data derived from older
+# versions (e.g. compiled rule tables) is discarded
+VERSION_FIELD = "thresholds_version"
+
+_PROJECTION = {"_id": 0, "user_id": 1, VERSION_FIELD: 1, **{field: 1 for field in THRESHOLD_FIELD_NAMES}}
+
+# Threshold documents keyed by patient user id (None: patient has no profile)
+threshold_cache = TTLCache(
+    "thresholds",
+    maxsize=settings.THRESHOLD_CACHE_MAX_SIZE,
+    ttl=settings.THRESHOLD_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_patient_thresholds(patient_id: Optional[str] = None) -> None:
+    """
+    Drop cached thresholds of a patient (or of every patient).
+
+    Call after any write to a patient document that may change thresholds.
+    """
+    if patient_id:
+        threshold_cache.invalidate(patient_id)
+    else:
+        threshold_cache.clear()
+
+
+async def get_patient_thresholds(patient_id: str, db=None) -> Optional[Dict[str, Any]]:
+    """
+    Get a patient's alert thresholds, reading through the threshold cache.
+
+    Args:
+        patient_id: Patient user ID
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Dict with the threshold fields and thresholds_version (0 for patients
+        never updated), or None if the patient has no profile
+    """
+    thresholds = threshold_cache.get(patient_id)
+    if thresholds is not MISSING:
+        return thresholds
+
+    db = db if db is not None else get_database()
+    thresholds = await db[PATIENTS_COLLECTION].find_one({"user_id": patient_id}, _PROJECTION)
+    if thresholds is not None:
+        thresholds.setdefault(VERSION_FIELD, 0)
+    threshold_cache.set(patient_id, thresholds)
+    return thresholds
+
+
+async def update_patient_thresholds(
+    patient_id: str,
+    updates: Dict[str, Any],
+    db=None
+) -> Optional[Dict[str, Any]]:
+    """
+    Change some thresholds of a patient and bump the thresholds version.
+
+    Args:
+        patient_id: Patient user ID
+        updates: Threshold field -> new value
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Updated thresholds, or None if the patient has no profile
+    """
+    db = db if db is not None else get_database()
+    thresholds = await db[PATIENTS_COLLECTION].find_one_and_update(
+        {"user_id": patient_id},
+        {
+            "$set": {**updates, "updated_at": datetime.utcnow()},
+            "$inc": {VERSION_FIELD: 1}
+        },
+        projection=_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    invalidate_patient_thresholds(patient_id)
+    return thresholds
@@ -0,0 +1,216 @@
+from app.core.config import settings
+from app.core.cache import TTLCache, MISSING
+from app.core.database import get_database, USERS_COLLECTION, TOKEN_DENYLIST_COLLECTION
+from bson import ObjectId
+from pymongo import ReturnDocument
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import asyncio
+import uuid
+
+# Assigned patient lists keyed by caregiver/clinician id -> (assignments_version, patient ids)
+assignment_cache = TTLCache(
+    "assignments",
+    maxsize=settings.ASSIGNMENT_CACHE_MAX_SIZE,
+    ttl=settings.ASSIGNMENT_CACHE_TTL_SECONDS
+)
+
+
+def token_claims(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Access token payload for a user document.
+
+    Besides user_id and role, tokens carry what claims-mode authorization
+    needs without loading the user: email and name, the assignment
+    version (av), the user's token version (tv, for revoking all of a
+    user's tokens) and a token id (jti, for revoking one token).
+
+    Args:
+        user_data: User document (with _id)
+
+    Returns:
+        Claims for create_access_token
+    """
+    return {
+        "user_id": str(user_data["_id"]),
+        "role": user_data["role"],
+        "email": user_data["email"],
+        "name": user_data["full_name"],
+        "av": user_data.get("assignments_version", 0),
+        "tv": user_data.get("token_version", 0),
+        "jti": uuid.uuid4().hex,
+    }
+
+
+async def get_assigned_patients(user_id: str, min_version: int, db=None) -> List[str]:
+    """
+    Get a caregiver's or clinician's assigned patient ids.
+
+    A cached list is used when it is at least as new as the assignment
+    version in the caller's token; otherwise it is reloaded.
+
+    Args:
+        user_id: Caregiver/clinician user id
+        min_version: Assignment version claimed by the token (av)
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Assigned patient user ids
+    """
+    cached = assignment_cache.get(user_id)
+    if cached is not MISSING and cached[0] >= min_version:
+        return cached[1]
+
+    db = db if db is not None else get_database()
+    user_data = await db[USERS_COLLECTION].find_one(
+        {"_id": ObjectId(user_id)},
+        {"assigned_patients": 1, "assignments_version": 1}
+    )
+    if user_data is None:
+        return []
+    patients = user_data.get("assigned_patients", [])
+    assignment_cache.set(user_id, (user_data.get("assignments_version", 0), patients))
+    return patients
+
+
+def invalidate_assignments(user_id: Optional[str]) -> None:
+    """Drop a user's cached assigned patients (after changing them)."""
+    if user_id:
+        assignment_cache.invalidate(user_id)
+
+
+class TokenDenylist:
+    """
+    Revoked access tokens, mirrored from the token_denylist collection.
+
+    Entries revoke either one token (by jti) or all of a user's tokens
+    issued before a token version (tv). Each worker keeps the entries in
+    memory and polls the collection for new ones, so checking a token
+    costs no query; revocations made by another worker take effect within
+    TOKEN_DENYLIST_REFRESH_SECONDS. Entries expire with the tokens they
+    cover.
+    """
+
+    # Overlap between polls, absorbing clock skew between workers
+    POLL_OVERLAP = timedelta(seconds=30)
+
+    def __init__(self):
+        self._tokens: Dict[str, datetime] = {}
+        self._user_versions: Dict[str, int] = {}
+        self._last_poll: Optional[datetime] = None
+        self.rejected = 0
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """Check a decoded token against the denylist."""
+        jti = payload.get("jti")
+        revoked = (jti is not None and jti in self._tokens) or (
+            payload.get("tv", 0) < self._user_versions.get(payload.get("user_id"), 0)
+        )
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        if entry.get("jti"):
+            self._tokens[entry["jti"]] = entry["expires_at"]
+        elif entry.get("user_id"):
+            user_id = entry["user_id"]
+            self._user_versions[user_id] = max(self._user_versions.get(user_id, 0), entry["token_version"])
+
+    async def revoke_token(self, payload: Dict[str, Any], db=None) -> None:
+        """
+        Revoke a single token (e.g. on logout).
+
+        Args:
+            payload: Decoded token
+            db: Database instance (defaults to the application database)
+        """
+        if not payload.get("jti"):
+            return
+        db = db if db is not None else get_database()
+        entry = {
+            "jti": payload["jti"],
+            "user_id": payload.get("user_id"),
+            "expires_at": datetime.utcfromtimestamp(payload["exp"]),
+            "created_at": datetime.utcnow(),
+        }
+        await db[TOKEN_DENYLIST_COLLECTION].insert_one(entry)
+        self._apply(entry)
+
+    async def revoke_user_tokens(self, user_id: str, db=None) -> int:
+        """
+        Revoke every token issued to a user so far.
+
+        Bumps the user's token_version; tokens issued afterwards carry the
+        new version and stay valid.
+
+        Args:
+            user_id: User id
+            db: Database instance (defaults to the application database)
+
+        Returns:
+            The user's new token version
+        """
+        db = db if db is not None else get_database()
+        user_data = await db[USERS_COLLECTION].find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$inc": {"token_version": 1}},
+            projection={"token_version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        token_version = user_data["token_version"] if user_data else 1
+        now = datetime.utcnow()
+        entry = {
+            "user_id": user_id,
+            "token_version": token_version,
+            # Older tokens are expired by then anyway
+            "expires_at": now + timedelta(minutes=settings.JWT_EXPIRE_MINUTES),
+            "created_at": now,
+        }
+        await db[TOKEN_DENYLIST_COLLECTION].insert_one(entry)
+        self._apply(entry)
+        return token_version
+
+    async def refresh(self, db=None) -> int:
+        """
+        Load entries added since the last poll and forget expired ones.
+
+        Returns:
+            Number of entries read
+        """
+        db = db if db is not None else get_database()
+        now = datetime.utcnow()
+        query: Dict[str, Any] = {"expires_at": {"$gt": now}}
+        if self._last_poll is not None:
+            query["created_at"] = {"$gte": self._last_poll - self.POLL_OVERLAP}
+        self._last_poll = now
+
+        read = 0
+        async for entry in db[TOKEN_DENYLIST_COLLECTION].find(query):
+            self._apply(entry)
+            read += 1
+        self._tokens = {jti: expires_at for jti, expires_at in self._tokens.items() if expires_at > now}
+        return read
+
+    async def run(self, db) -> None:
+        """Poll for new entries until cancelled."""
+        while True:
+            try:
+                await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Token denylist refresh failed: {e}")
+            await asyncio.sleep(settings.TOKEN_DENYLIST_REFRESH_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked_tokens": len(self._tokens),
+            "revoked_users": len(self._user_versions),
+            "rejected": self.rejected,
+            "last_poll": self._last_poll,
+        }
+
+
+# Global denylist; polled by the application lifespan
+token_denylist = TokenDenylist()
@@ -0,0 +1,294 @@
+from app.services.vitals_repository import find_readings
+from app.models.vitals import VitalsTrend
+from app.services.rollup_service import plan_tier, load_rollups, merge_buckets, describe_counters
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
+import numpy as np
+
+# Vital signs covered by trend analytics
+VITAL_FIELDS = [
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "oxygen_saturation",
+    "temperature",
+    "respiratory_rate",
+]
+
+# Change over the analysed span below which a vital counts as "stable"
+TREND_TOLERANCE = {
+    "heart_rate": 5.0,
+    "systolic_bp": 5.0,
+    "diastolic_bp": 5.0,
+    "oxygen_saturation": 1.0,
+    "temperature": 0.3,
+    "respiratory_rate": 2.0,
+}
+
+BUCKET_SECONDS = {"hour": 3600, "day": 86400}
+
+PERCENTILES = (5, 50, 95)
+
+# Periods up to this many hours are computed from raw readings (exact
+# percentiles); longer periods are summarised from rollup buckets
+RAW_TRENDS_MAX_HOURS = 24
+
+# Rollup resolution used for long periods when no series is requested
+ROLLUP_TRENDS_RESOLUTION = 3600
+
+EPOCH = datetime(1970, 1, 1)
+
+
+async def load_readings(
+    patient_id: str,
+    start: datetime,
+    end: Optional[datetime] = None,
+    db=None
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Read a patient's readings in a time range as NumPy columns.
+
+    A single range scan over the patient/time index, projected to the
+    timestamp and the six vital fields.
+
+    Args:
+        patient_id: Patient user ID
+        start: Range start (inclusive)
+        end: Range end (exclusive, default: open)
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Tuple of (epoch seconds, {vital: values}) with NaN for missing values,
+        sorted by time
+    """
+    docs = await find_readings(patient_id, start, end, fields=["measured_at", *VITAL_FIELDS], db=db)
+
+    epoch_seconds = np.array(
+        [(doc["measured_at"] - EPOCH).total_seconds() for doc in docs],
+        dtype=np.float64
+    )
+    columns = {
+        field: np.array([doc.get(field) for doc in docs], dtype=np.float64)
+        for field in VITAL_FIELDS
+    }
+    return epoch_seconds, columns
+
+
+def classify_trend(vital_type: str, slope_per_hour: float, span_hours: float) -> str:
+    """
+    Classify a least-squares slope as increasing, decreasing or stable.
+
+    The projected change over the analysed span is compared with the
+    vital's tolerance from TREND_TOLERANCE.
+    """
+    change = slope_per_hour * span_hours
+    if abs(change) < TREND_TOLERANCE.get(vital_type, 0.0):
+        return "stable"
+    return "increasing" if change > 0 else "decreasing"
+
+
+def _least_squares_slope(x: np.ndarray, y: np.ndarray, weights: Optional[np.ndarray] = None) -> float:
+    """Slope of the (weighted) least-squares line through (x, y)."""
+    if weights is None:
+        weights = np.ones_like(x)
+    total = weights.sum()
+    if len(x) < 2 or total <= 0:
+        return 0.0
+    x_mean = (weights * x).sum() / total
+    y_mean = (weights * y).sum() / total
+    variance = (weights * (x - x_mean) ** 2).sum()
+    if variance <= 0:
+        return 0.0
+    return float((weights * (x - x_mean) * (y - y_mean)).sum() / variance)
+
+
+def _bucket_stats(
+    epoch_seconds: np.ndarray,
+    values: np.ndarray,
+    bucket_seconds: int
+) -> List[Dict[str, Any]]:
+    """Per-bucket count/average/min/max for time-sorted values without NaNs."""
+    bucket_ids = np.floor(epoch_seconds / bucket_seconds).astype(np.int64)
+    unique_ids, starts = np.unique(bucket_ids, return_index=True)
+    counts = np.diff(np.append(starts, len(values)))
+    sums = np.add.reduceat(values, starts)
+    minimums = np.minimum.reduceat(values, starts)
+    maximums = np.maximum.reduceat(values, starts)
+
+    return [
+        {
+            "start": EPOCH + timedelta(seconds=int(bucket_id) * bucket_seconds),
+            "count": int(count),
+            "average": float(total / count),
+            "min_value": float(minimum),
+            "max_value": float(maximum),
+        }
+        for bucket_id, count, total, minimum, maximum
+        in zip(unique_ids, counts, sums, minimums, maximums)
+    ]
+
+
+def compute_trends(
+    patient_id: str,
+    epoch_seconds: np.ndarray,
+    columns: Dict[str, np.ndarray],
+    period: str,
+    bucket: Optional[str] = None
+) -> List[VitalsTrend]:
+    """
+    Compute statistics and trend direction for every vital.
+
+    Args:
+        patient_id: Patient user ID
+        epoch_seconds: Reading timestamps (time-sorted)
+        columns: Values per vital, NaN where not measured
+        period: Period label ("24h", "7d", "30d")
+        bucket: Optional "hour" or "day" series for charting
+
+    Returns:
+        One VitalsTrend per vital with at least one reading
+    """
+    trends = []
+    hours = (epoch_seconds - epoch_seconds[0]) / 3600.0 if len(epoch_seconds) else epoch_seconds
+
+    for vital_type in VITAL_FIELDS:
+        values = columns[vital_type]
+        measured = ~np.isnan(values)
+        if not measured.any():
+            continue
+
+        y = values[measured]
+        x = hours[measured]
+        slope = _least_squares_slope(x, y)
+        span_hours = float(x[-1] - x[0])
+
+        trends.append(VitalsTrend(
+            patient_id=patient_id,
+            vital_type=vital_type,
+            average=float(y.mean()),
+            min_value=float(y.min()),
+            max_value=float(y.max()),
+            std_dev=float(y.std()),
+            percentiles={
+                f"p{p}": float(value)
+                for p, value in zip(PERCENTILES, np.percentile(y, PERCENTILES))
+            },
+            slope_per_hour=slope,
+            trend=classify_trend(vital_type, slope, span_hours),
+            data_points=int(len(y)),
+            period=period,
+            buckets=_bucket_stats(epoch_seconds[measured], y, BUCKET_SECONDS[bucket]) if bucket else None,
+        ))
+
+    return trends
+
+
+def compute_trends_from_buckets(
+    patient_id: str,
+    buckets: List[Dict[str, Any]],
+    period: str,
+    bucket_seconds: int,
+    include_series: bool = False
+) -> List[VitalsTrend]:
+    """
+    Compute trend statistics from rollup buckets instead of raw readings.
+
+    Mean, min, max and standard deviation are exact (they follow from the
+    bucket counters); the slope is fitted through bucket means weighted by
+    their reading counts. Percentiles cannot be derived from rollups and
+    are left empty.
+
+    Args:
+        patient_id: Patient user ID
+        buckets: Merged buckets from rollup_service.merge_buckets
+        period: Period label ("24h", "7d", "30d")
+        bucket_seconds: Size of the given buckets
+        include_series: Return the buckets as the charting series
+
+    Returns:
+        One VitalsTrend per vital with at least one reading
+    """
+    trends = []
+    for vital_type in VITAL_FIELDS:
+        measured = [bucket for bucket in buckets if vital_type in bucket["vitals"]]
+        if not measured:
+            continue
+
+        counters = {
+            "n": sum(bucket["vitals"][vital_type]["n"] for bucket in measured),
+            "sum": sum(bucket["vitals"][vital_type]["sum"] for bucket in measured),
+            "sumsq": sum(bucket["vitals"][vital_type]["sumsq"] for bucket in measured),
+            "min": min(bucket["vitals"][vital_type]["min"] for bucket in measured),
+            "max": max(bucket["vitals"][vital_type]["max"] for bucket in measured),
+        }
+        summary = describe_counters(counters)
+
+        midpoints = np.array(
+            [(bucket["start"] - EPOCH).total_seconds() + bucket_seconds / 2 for bucket in measured],
+            dtype=np.float64
+        )
+        x = (midpoints - midpoints[0]) / 3600.0
+        y = np.array([bucket["vitals"][vital_type]["sum"] / bucket["vitals"][vital_type]["n"] for bucket in measured])
+        weights = np.array([bucket["vitals"][vital_type]["n"] for bucket in measured], dtype=np.float64)
+        slope = _least_squares_slope(x, y, weights)
+        span_hours = float(x[-1] - x[0])
+
+        series = None
+        if include_series:
+            series = [
+                {"start": bucket["start"], **describe_counters(bucket["vitals"][vital_type])}
+                for bucket in measured
+            ]
+            for point in series:
+                point.pop("std_dev")
+
+        trends.append(VitalsTrend(
+            patient_id=patient_id,
+            vital_type=vital_type,
+            average=summary["average"],
+            min_value=summary["min_value"],
+            max_value=summary["max_value"],
+            std_dev=summary["std_dev"],
+            percentiles=None,
+            slope_per_hour=slope,
+            trend=classify_trend(vital_type, slope, span_hours),
+            data_points=int(counters["n"]),
+            period=period,
+            buckets=series,
+        ))
+
+    return trends
+
+
+async def get_vitals_trends(
+    patient_id: str,
+    period: str,
+    hours: int,
+    bucket: Optional[str] = None,
+    db=None
+) -> List[VitalsTrend]:
+    """
+    Trend analytics for a patient over the last `hours` hours.
+
+    Short periods are computed from raw readings. Longer ones are served
+    from the coarsest rollup tier matching the requested series bucket
+    (hourly when no series is requested), falling back to raw readings
+    when rollups are disabled.
+
+    Returns:
+        One VitalsTrend per measured vital (empty if no readings)
+    """
+    start = datetime.utcnow() - timedelta(hours=hours)
+
+    if hours > RAW_TRENDS_MAX_HOURS:
+        resolution = BUCKET_SECONDS[bucket] if bucket else ROLLUP_TRENDS_RESOLUTION
+        tier = plan_tier(resolution)
+        if tier is not None:
+            rollups = await load_rollups(patient_id, tier, start, db=db)
+            buckets = merge_buckets(rollups, resolution)
+            return compute_trends_from_buckets(patient_id, buckets, period, resolution, bucket is not None)
+
+    epoch_seconds, columns = await load_readings(patient_id, start, db=db)
+    if not len(epoch_seconds):
+        return []
+    return compute_trends(patient_id, epoch_seconds, columns, period, bucket)
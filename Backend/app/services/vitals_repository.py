@@ -0,0 +1,424 @@
+from app.core.database import get_database, VITALS_STORAGE_COLLECTIONS
+from app.core.config import settings
+from app.utils.pagination import keyset_filter
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+
+# Readings are grouped per patient and hour in the bucketed layout
+BUCKET_SECONDS = 3600
+
+# Reading fields stored as column arrays in the bucketed layout
+BUCKET_COLUMNS = [
+    "_id",
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "oxygen_saturation",
+    "temperature",
+    "respiratory_rate",
+    "measurement_type",
+    "device_id",
+    "is_anomaly",
+    "anomaly_type",
+    "notes",
+    "measured_at",
+    "created_at",
+]
+
+# Maximum concurrent find_one calls in the fallback latest-reading lookup
+LATEST_READINGS_CONCURRENCY = 16
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def vitals_collection_name() -> str:
+    """Name of the collection holding raw readings for the configured layout."""
+    return VITALS_STORAGE_COLLECTIONS[settings.VITALS_STORAGE_MODE]
+
+
+def _is_bucketed() -> bool:
+    return settings.VITALS_STORAGE_MODE == "bucketed"
+
+
+def _bucket_start(moment: datetime) -> datetime:
+    epoch = int((moment - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=epoch - epoch % BUCKET_SECONDS)
+
+
+def _bucket_filter(match: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate a reading filter into a (wider) filter on bucket documents."""
+    bucket_match = {}
+    if "patient_id" in match:
+        bucket_match["patient_id"] = match["patient_id"]
+    time_range = match.get("measured_at")
+    if isinstance(time_range, dict):
+        bucket_range = {}
+        if "$gte" in time_range:
+            bucket_range["$gte"] = _bucket_start(time_range["$gte"])
+        if "$lt" in time_range:
+            bucket_range["$lt"] = time_range["$lt"]
+        if "$lte" in time_range:
+            bucket_range["$lte"] = time_range["$lte"]
+        if bucket_range:
+            bucket_match["bucket_start"] = bucket_range
+    return bucket_match
+
+
+def _unroll_bucket(bucket: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Turn a bucket document back into one dict per reading."""
+    columns = bucket.get("columns", {})
+    readings = []
+    for index in range(bucket.get("count", 0)):
+        reading = {"patient_id": bucket["patient_id"]}
+        for field in BUCKET_COLUMNS:
+            values = columns.get(field)
+            reading[field] = values[index] if values is not None and index < len(values) else None
+        readings.append(reading)
+    return readings
+
+
+def _unroll_stages() -> List[Dict[str, Any]]:
+    """Aggregation stages turning bucket documents into reading documents."""
+    reading: Dict[str, Any] = {"patient_id": 1, "measured_at": "$columns.measured_at"}
+    for field in BUCKET_COLUMNS:
+        if field != "measured_at":
+            reading[field] = {"$arrayElemAt": [f"$columns.{field}", "$position"]}
+    return [
+        {"$unwind": {"path": "$columns.measured_at", "includeArrayIndex": "position"}},
+        {"$project": reading},
+    ]
+
+
+def _in_range(reading: Dict[str, Any], start: Optional[datetime], end: Optional[datetime]) -> bool:
+    measured_at = reading["measured_at"]
+    return (start is None or measured_at >= start) and (end is None or measured_at < end)
+
+
+async def ensure_vitals_collection(db=None) -> bool:
+    """
+    Create the time-series collection when the timeseries layout is used.
+
+    Other layouts use ordinary collections that MongoDB creates on first
+    write.
+
+    Returns:
+        True if the collection was created
+    """
+    if settings.VITALS_STORAGE_MODE != "timeseries":
+        return False
+    db = db if db is not None else get_database()
+
+    name = vitals_collection_name()
+    if name in await db.list_collection_names(filter={"name": name}):
+        return False
+    await db.create_collection(
+        name,
+        timeseries={
+            "timeField": "measured_at",
+            "metaField": "patient_id",
+            "granularity": settings.VITALS_TIMESERIES_GRANULARITY,
+        }
+    )
+    return True
+
+
+async def insert_readings(vitals_docs: List[Dict[str, Any]], db=None) -> Tuple[int, Optional[str]]:
+    """
+    Store readings in submission order.
+
+    Writing stops at the first failure, so the readings that were stored
+    are always a prefix of `vitals_docs`.
+
+    Args:
+        vitals_docs: Vitals documents with pre-assigned _id
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Tuple of (number of readings stored, error message or None)
+    """
+    if not vitals_docs:
+        return 0, None
+    db = db if db is not None else get_database()
+    collection = db[vitals_collection_name()]
+
+    if not _is_bucketed():
+        docs = vitals_docs
+        if settings.VITALS_STORAGE_MODE == "timeseries":
+            # Missing measurements are simply absent instead of stored as null
+            docs = [{key: value for key, value in doc.items() if value is not None} for doc in vitals_docs]
+        try:
+            await collection.insert_many(docs, ordered=True)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors") or [{}]
+            return e.details.get("nInserted", 0), write_errors[0].get("errmsg", "Write failed")
+        return len(vitals_docs), None
+
+    # One upsert per run of consecutive readings in the same bucket, so a
+    # failed write still leaves a stored prefix
+    runs: List[List[Dict[str, Any]]] = []
+    for doc in vitals_docs:
+        key = (doc["patient_id"], _bucket_start(doc["measured_at"]))
+        if runs and (runs[-1][0]["patient_id"], _bucket_start(runs[-1][0]["measured_at"])) == key:
+            runs[-1].append(doc)
+        else:
+            runs.append([doc])
+
+    operations = []
+    for run in runs:
+        patient_id = run[0]["patient_id"]
+        bucket_start = _bucket_start(run[0]["measured_at"])
+        times = [doc["measured_at"] for doc in run]
+        operations.append(UpdateOne(
+            {"_id": f"{patient_id}:{int((bucket_start - EPOCH).total_seconds())}"},
+            {
+                "$push": {
+                    f"columns.{field}": {"$each": [doc.get(field) for doc in run]}
+                    for field in BUCKET_COLUMNS
+                },
+                "$inc": {"count": len(run)},
+                "$min": {"min_measured_at": min(times)},
+                "$max": {"max_measured_at": max(times)},
+                "$setOnInsert": {"patient_id": patient_id, "bucket_start": bucket_start},
+            },
+            upsert=True
+        ))
+
+    try:
+        await collection.bulk_write(operations, ordered=True)
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors") or [{}]
+        failed_run = write_errors[0].get("index", 0)
+        return sum(len(run) for run in runs[:failed_run]), write_errors[0].get("errmsg", "Write failed")
+    return len(vitals_docs), None
+
+
+async def find_latest_reading(patient_id: str, db=None) -> Optional[Dict[str, Any]]:
+    """
+    Get a patient's most recent reading.
+
+    Returns:
+        Reading document, or None if the patient has no readings
+    """
+    db = db if db is not None else get_database()
+    collection = db[vitals_collection_name()]
+
+    if not _is_bucketed():
+        return await collection.find_one({"patient_id": patient_id}, sort=[("measured_at", -1)])
+
+    bucket = await collection.find_one({"patient_id": patient_id}, sort=[("bucket_start", -1)])
+    if not bucket:
+        return None
+    return max(_unroll_bucket(bucket), key=lambda reading: reading["measured_at"])
+
+
+async def find_readings(
+    patient_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    descending: bool = False,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    after: Optional[Tuple[datetime, Any]] = None,
+    db=None
+) -> List[Dict[str, Any]]:
+    """
+    Get a patient's readings in a time range, sorted by measured_at and _id.
+
+    Args:
+        patient_id: Patient user ID
+        start: Range start (inclusive, default: open)
+        end: Range end (exclusive, default: open)
+        descending: Newest first
+        limit: Maximum number of readings (default: all)
+        fields: Only return these fields (default: all)
+        after: Only return readings after this (measured_at, _id) key in
+            the sort order (keyset pagination)
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        List of reading documents
+    """
+    db = db if db is not None else get_database()
+    collection = db[vitals_collection_name()]
+    direction = -1 if descending else 1
+
+    match: Dict[str, Any] = {"patient_id": patient_id}
+    time_range = {}
+    if start is not None:
+        time_range["$gte"] = start
+    if end is not None:
+        time_range["$lt"] = end
+    if after is not None:
+        keyset = keyset_filter("measured_at", after, descending)
+        time_range.update(keyset["measured_at"])
+        match["$or"] = keyset["$or"]
+    if time_range:
+        match["measured_at"] = time_range
+
+    if not _is_bucketed():
+        projection = {field: 1 for field in fields} if fields else None
+        cursor = collection.find(match, projection).sort(
+            [("measured_at", direction), ("_id", direction)]
+        ).batch_size(5000)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=None)
+
+    # Buckets cover disjoint hours, so bucket order is reading order
+    readings: List[Dict[str, Any]] = []
+    cursor = collection.find(_bucket_filter(match)).sort("bucket_start", direction)
+    async for bucket in cursor:
+        in_range = [
+            reading for reading in _unroll_bucket(bucket)
+            if _in_range(reading, start, end) and _is_after(reading, after, descending)
+        ]
+        in_range.sort(key=lambda reading: (reading["measured_at"], reading["_id"]), reverse=descending)
+        readings.extend(in_range)
+        if limit and len(readings) >= limit:
+            readings = readings[:limit]
+            break
+
+    if fields:
+        readings = [{field: reading.get(field) for field in fields} for reading in readings]
+    return readings
+
+
+def _is_after(reading: Dict[str, Any], after: Optional[Tuple[datetime, Any]], descending: bool) -> bool:
+    if after is None:
+        return True
+    key = (reading["measured_at"], reading["_id"])
+    return key < after if descending else key > after
+
+
+def aggregate_readings(match: Dict[str, Any], stages: List[Dict[str, Any]], db=None):
+    """
+    Run an aggregation over reading documents, whatever the layout.
+
+    The pipeline starts with `match` applied to readings (patient_id and
+    measured_at ranges also narrow the bucket scan in the bucketed layout).
+
+    Returns:
+        Motor aggregation cursor
+    """
+    db = db if db is not None else get_database()
+    collection = db[vitals_collection_name()]
+
+    if not _is_bucketed():
+        return collection.aggregate([{"$match": match}, *stages], allowDiskUse=True)
+
+    pipeline = [{"$match": _bucket_filter(match)}, *_unroll_stages(), {"$match": match}, *stages]
+    return collection.aggregate(pipeline, allowDiskUse=True)
+
+
+async def count_readings(
+    patient_ids: List[str],
+    start: datetime,
+    anomalies_only: bool = False,
+    db=None
+) -> int:
+    """
+    Count readings of some patients measured since `start`.
+
+    Args:
+        patient_ids: Patient user IDs
+        start: Range start (inclusive)
+        anomalies_only: Only count readings flagged as anomalies
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Number of readings
+    """
+    db = db if db is not None else get_database()
+    match: Dict[str, Any] = {"patient_id": {"$in": patient_ids}, "measured_at": {"$gte": start}}
+    if anomalies_only:
+        match["is_anomaly"] = True
+
+    if not _is_bucketed():
+        return await db[vitals_collection_name()].count_documents(match)
+
+    result = await aggregate_readings(match, [{"$count": "count"}], db).to_list(length=1)
+    return result[0]["count"] if result else 0
+
+
+async def find_latest_readings(
+    patient_ids: List[str],
+    fields: List[str],
+    db=None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch the most recent reading for several patients.
+
+    Uses one aggregation ($sort + $group/$first on the patient/time index).
+    If the server rejects it, falls back to concurrent per-patient lookups
+    with bounded concurrency.
+
+    Args:
+        patient_ids: Patient user IDs
+        fields: Reading fields to return
+        db: Database instance (defaults to the application database)
+
+    Returns:
+        Dict of patient id -> latest reading fields (patients without
+        readings are absent)
+    """
+    db = db if db is not None else get_database()
+    if not patient_ids:
+        return {}
+    collection = db[vitals_collection_name()]
+
+    if _is_bucketed():
+        cursor = collection.aggregate([
+            {"$match": {"patient_id": {"$in": patient_ids}}},
+            {"$sort": {"patient_id": 1, "bucket_start": -1}},
+            {"$group": {"_id": "$patient_id", "bucket": {"$first": "$$ROOT"}}},
+        ])
+        latest = {}
+        async for doc in cursor:
+            reading = max(_unroll_bucket(doc["bucket"]), key=lambda r: r["measured_at"])
+            latest[doc["_id"]] = {"_id": doc["_id"], **{field: reading.get(field) for field in fields}}
+        return latest
+
+    group = {"_id": "$patient_id"}
+    for field in fields:
+        group[field] = {"$first": f"${field}"}
+
+    pipeline = [
+        {"$match": {"patient_id": {"$in": patient_ids}}},
+        {"$sort": {"patient_id": 1, "measured_at": -1}},
+        {"$group": group},
+    ]
+
+    try:
+        cursor = collection.aggregate(pipeline)
+        return {doc["_id"]: doc async for doc in cursor}
+    except OperationFailure:
+        return await _find_latest_readings_concurrent(patient_ids, fields, db)
+
+
+async def _find_latest_readings_concurrent(
+    patient_ids: List[str],
+    fields: List[str],
+    db
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch latest readings with one find_one per patient, run concurrently."""
+    semaphore = asyncio.Semaphore(LATEST_READINGS_CONCURRENCY)
+    projection = {field: 1 for field in fields}
+    collection = db[vitals_collection_name()]
+
+    async def fetch(patient_id: str):
+        async with semaphore:
+            return await collection.find_one(
+                {"patient_id": patient_id},
+                projection,
+                sort=[("measured_at", -1)],
+            )
+
+    results = await asyncio.gather(*(fetch(patient_id) for patient_id in patient_ids))
+    return {
+        patient_id: latest
+        for patient_id, latest in zip(patient_ids, results)
+        if latest
+    }
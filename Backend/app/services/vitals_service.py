@@ -1,7 +1,19 @@
 from app.models.vitals import VitalSigns
 from app.models.alert import Alert
-from typing import Tuple, List, Dict, Any
+from app.core.database import VITALS_COLLECTION, ALERTS_COLLECTION, ALERT_OUTBOX_COLLECTION
+from app.services.snapshot_service import update_latest_vitals, SNAPSHOT_FIELDS
+from app.services.rollup_service import record_rollups
+from app.services.stream_hub import vitals_hub
+from app.services.dashboard_cache import dashboard_cache
+from app.core.config import settings
+from app.core.metrics import READINGS_INGESTED
+from app.services.vitals_repository import insert_readings
+from app.services.rule_engine import compile_rule_table, get_rule_table
+from app.services.alert_dispatcher import alert_dispatcher, outbox_entry, deliver_alerts
+from bson import ObjectId
+from typing import Tuple, List, Dict, Any, Optional
 from datetime import datetime
+import asyncio
 
 
 async def check_vitals_anomaly(
@@ -11,6 +23,9 @@ async def check_vitals_anomaly(
     """
     Check if vital signs are outside normal thresholds.
     
+    Compiles the patient's thresholds on every call; the ingest paths use
+    the cached per-patient table from rule_engine.get_rule_table instead.
+    
     Args:
         vitals: VitalSigns object with measurements
         patient_data: Patient document with threshold settings
@@ -18,179 +33,233 @@ async def check_vitals_anomaly(
     Returns:
         Tuple of (is_anomaly, anomaly_type, list_of_alerts)
     """
-    is_anomaly = False
-    anomaly_type = None
-    alerts = []
+    return compile_rule_table(patient_data).evaluate(vitals)
+
+
+async def create_vital_alert(alert_data: Dict[str, Any], db):
+    """
+    Create and save a vital sign alert to database.
     
-    # Check heart rate
-    if vitals.heart_rate is not None:
-        hr_min = patient_data.get("heart_rate_min", 60)
-        hr_max = patient_data.get("heart_rate_max", 100)
-        
-        if vitals.heart_rate < hr_min:
-            is_anomaly = True
-            anomaly_type = "low"
-            alerts.append(create_alert_dict(
-                patient_id=vitals.patient_id,
-                vital_type="heart_rate",
-                vital_value=vitals.heart_rate,
-                threshold_crossed="below_min",
-                title="Low Heart Rate Detected",
-                message=f"Heart rate ({vitals.heart_rate} BPM) is below minimum threshold ({hr_min} BPM)",
-                alert_type="warning" if vitals.heart_rate >= (hr_min - 10) else "critical"
-            ))
-        elif vitals.heart_rate > hr_max:
-            is_anomaly = True
-            anomaly_type = "high"
-            alerts.append(create_alert_dict(
-                patient_id=vitals.patient_id,
-                vital_type="heart_rate",
-                vital_value=vitals.heart_rate,
-                threshold_crossed="above_max",
-                title="High Heart Rate Detected",
-                message=f"Heart rate ({vitals.heart_rate} BPM) is above maximum threshold ({hr_max} BPM)",
-                alert_type="warning" if vitals.heart_rate <= (hr_max + 20) else "critical"
-            ))
-    
-    # Check blood pressure
-    if vitals.systolic_bp is not None:
-        sys_min = patient_data.get("systolic_bp_min", 90)
-        sys_max = patient_data.get("systolic_bp_max", 140)
-        
-        if vitals.systolic_bp < sys_min:
-            is_anomaly = True
-            anomaly_type = "low"
-            alerts.append(create_alert_dict(
-                patient_id=vitals.patient_id,
-                vital_type="systolic_bp",
-                vital_value=vitals.systolic_bp,
-                threshold_crossed="below_min",
-                title="Low Blood Pressure Detected",
-                message=f"Systolic BP ({vitals.systolic_bp} mmHg) is below minimum threshold ({sys_min} mmHg)",
-                alert_type="warning"
-            ))
-        elif vitals.systolic_bp > sys_max:
-            is_anomaly = True
-            anomaly_type = "high"
-            alerts.append(create_alert_dict(
-                patient_id=vitals.patient_id,
-                vital_type="systolic_bp",
-                vital_value=vitals.systolic_bp,
-                threshold_crossed="above_max",
-                title="High Blood Pressure Detected",
-                message=f"Systolic BP ({vitals.systolic_bp} mmHg) is above maximum threshold ({sys_max} mmHg)",
-                alert_type="critical" if vitals.systolic_bp > 180 else "warning"
-            ))
-    
-    # Check oxygen saturation
-    if vitals.oxygen_saturation is not None:
-        o2_min = patient_data.get("oxygen_saturation_min", 95)
+    Args:
+        alert_data: Alert data dictionary
+        db: Database instance
+    
+    Returns:
+        Inserted alert ID
+    """
+    from app.core.database import ALERTS_COLLECTION
+    result = await db[ALERTS_COLLECTION].insert_one(alert_data)
+    return str(result.inserted_id)
+
+
+async def ingest_vitals_batch(
+    readings: List[VitalSigns],
+    patient_id: str,
+    db
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate and store a batch of readings for a single patient.
+    
+    The patient's compiled rule table is fetched once and evaluated over
+    the whole batch with NumPy; vitals are written with one ordered insert
+    by store_vitals, which stages the resulting alerts in the outbox for
+    the alert dispatcher (or delivers them itself when the dispatcher is
+    not running).
+    
+    Args:
+        readings: VitalSigns objects in submission order
+        patient_id: Patient ID all readings belong to
+        db: Database instance
+    
+    Returns:
+        One result dict per reading with id, is_anomaly, anomaly_type,
+        alerts_created and error (set when the reading was not stored)
+    """
+    if not readings:
+        return []
+    
+    # Evaluate thresholds and alert rules for the whole batch at once
+    rule_table = await get_rule_table(patient_id, db)
+    evaluations = rule_table.evaluate_batch(readings)
+    
+    vitals_docs = []
+    alerts_per_reading = []
+    for vitals, (is_anomaly, anomaly_type, alerts) in zip(readings, evaluations):
+        if len(rule_table):
+            vitals.is_anomaly = is_anomaly
+            vitals.anomaly_type = anomaly_type
         
-        if vitals.oxygen_saturation < o2_min:
-            is_anomaly = True
-            anomaly_type = "low"
-            alerts.append(create_alert_dict(
-                patient_id=vitals.patient_id,
-                vital_type="oxygen_saturation",
-                vital_value=vitals.oxygen_saturation,
-                threshold_crossed="below_min",
-                title="Low Oxygen Saturation Detected",
-                message=f"Oxygen saturation ({vitals.oxygen_saturation}%) is below minimum threshold ({o2_min}%)",
-                alert_type="critical" if vitals.oxygen_saturation < 90 else "warning"
-            ))
-    
-    # Check temperature
-    if vitals.temperature is not None:
-        temp_min = patient_data.get("temperature_min", 36.1)
-        temp_max = patient_data.get("temperature_max", 37.2)
+        # Pre-assign ids so alerts can reference their reading
+        vitals.id = str(ObjectId())
+        vitals_dict = vitals.model_dump(by_alias=True, exclude={"id"})
+        vitals_dict["_id"] = ObjectId(vitals.id)
+        vitals_docs.append(vitals_dict)
         
-        if vitals.temperature < temp_min:
-            is_anomaly = True
-            anomaly_type = "low"
-            alerts.append(create_alert_dict(
-                patient_id=vitals.patient_id,
-                vital_type="temperature",
-                vital_value=vitals.temperature,
-                threshold_crossed="below_min",
-                title="Low Body Temperature Detected",
-                message=f"Temperature ({vitals.temperature}°C) is below minimum threshold ({temp_min}°C)",
-                alert_type="warning"
-            ))
-        elif vitals.temperature > temp_max:
-            is_anomaly = True
-            anomaly_type = "high"
-            alerts.append(create_alert_dict(
-                patient_id=vitals.patient_id,
-                vital_type="temperature",
-                vital_value=vitals.temperature,
-                threshold_crossed="above_max",
-                title="High Body Temperature Detected",
-                message=f"Temperature ({vitals.temperature}°C) is above maximum threshold ({temp_max}°C)",
-                alert_type="critical" if vitals.temperature > 39 else "warning"
-            ))
-    
-    return is_anomaly, anomaly_type, alerts
-
-
-def create_alert_dict(
+        for alert in alerts:
+            alert["vital_reading_id"] = vitals.id
+        alerts_per_reading.append(alerts)
+    
+    # Insert vitals (writing stops at the first failure) and stage their alerts
+    alerts = [alert for alerts in alerts_per_reading for alert in alerts]
+    inserted, write_error = await store_vitals(vitals_docs, patient_id, alerts, db)
+    
+    await after_vitals_stored(vitals_docs[:inserted], db)
+    
+    results = []
+    for index, vitals in enumerate(readings):
+        if index < inserted:
+            results.append({
+                "id": vitals.id,
+                "is_anomaly": vitals.is_anomaly,
+                "anomaly_type": vitals.anomaly_type,
+                "alerts_created": len(alerts_per_reading[index]),
+                "error": None
+            })
+        else:
+            results.append({
+                "id": None,
+                "is_anomaly": vitals.is_anomaly,
+                "anomaly_type": vitals.anomaly_type,
+                "alerts_created": 0,
+                "error": write_error if index == inserted else "Not stored: an earlier reading failed to write"
+            })
+    
+    return results
+
+
+async def store_vitals(
+    vitals_docs: List[Dict[str, Any]],
     patient_id: str,
-    vital_type: str,
-    vital_value: float,
-    threshold_crossed: str,
-    title: str,
-    message: str,
-    alert_type: str = "warning"
-) -> Dict[str, Any]:
+    alerts: List[Dict[str, Any]],
+    db
+) -> Tuple[int, Optional[str]]:
     """
-    Create an alert dictionary for database insertion.
+    Write readings of one patient and dispatch the alerts they raised.
+    
+    With the alert dispatcher running, the alerts are staged in the outbox
+    concurrently with the vitals insert and stored by the dispatcher, so
+    the caller waits for one round trip however many alerts there are.
+    Otherwise the alerts are stored once the readings are written.
     
     Args:
-        patient_id: Patient ID
-        vital_type: Type of vital sign
-        vital_value: Measured value
-        threshold_crossed: "above_max" or "below_min"
-        title: Alert title
-        message: Alert message
-        alert_type: "critical", "warning", or "info"
+        vitals_docs: Vitals documents with pre-assigned _id
+        patient_id: Patient ID all readings belong to
+        alerts: Alert dicts with vital_reading_id set
+        db: Database instance
     
     Returns:
-        Alert dictionary ready for database insertion
-    """
-    severity_map = {
-        "critical": "high",
-        "warning": "medium",
-        "info": "low"
-    }
-    
-    return {
-        "patient_id": patient_id,
-        "alert_type": alert_type,
-        "severity": severity_map.get(alert_type, "medium"),
-        "title": title,
-        "message": message,
-        "vital_type": vital_type,
-        "vital_value": vital_value,
-        "threshold_crossed": threshold_crossed,
-        "is_read": False,
-        "is_resolved": False,
-        "notified_users": [],
-        "notification_sent": False,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    }
+        Tuple of (number of readings stored, error message or None)
+    """
+    if not alerts:
+        return await insert_readings(vitals_docs, db)
+    
+    entry = outbox_entry(patient_id, alerts)
+    if not alert_dispatcher.running:
+        inserted, write_error = await insert_readings(vitals_docs, db)
+        entry["alerts"] = _alerts_of_stored(alerts, vitals_docs[:inserted])
+        if entry["alerts"]:
+            await deliver_alerts([entry], db)
+        return inserted, write_error
+    
+    written, staged = await asyncio.gather(
+        insert_readings(vitals_docs, db),
+        db[ALERT_OUTBOX_COLLECTION].insert_one(entry),
+        return_exceptions=True
+    )
+    if isinstance(written, Exception):
+        # The request fails; withdraw the staged alerts with it
+        if not isinstance(staged, Exception):
+            await db[ALERT_OUTBOX_COLLECTION].delete_one({"_id": entry["_id"]})
+        raise written
+    inserted, write_error = written
+    
+    # Drop alerts of readings that were not stored
+    stored_alerts = _alerts_of_stored(alerts, vitals_docs[:inserted])
+    if isinstance(staged, Exception):
+        print(f"⚠️  Could not stage alerts in the outbox, storing them now: {staged}")
+        entry["alerts"] = stored_alerts
+        if stored_alerts:
+            await deliver_alerts([entry], db)
+        return inserted, write_error
+    if len(stored_alerts) < len(alerts):
+        entry["alerts"] = stored_alerts
+        if not stored_alerts:
+            await db[ALERT_OUTBOX_COLLECTION].delete_one({"_id": entry["_id"]})
+            return inserted, write_error
+        await db[ALERT_OUTBOX_COLLECTION].replace_one({"_id": entry["_id"]}, entry)
+    
+    alert_dispatcher.submit(entry)
+    return inserted, write_error
 
 
-async def create_vital_alert(alert_data: Dict[str, Any], db):
+def _alerts_of_stored(alerts: List[Dict[str, Any]], stored_docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    stored_ids = {str(doc["_id"]) for doc in stored_docs}
+    return [alert for alert in alerts if alert["vital_reading_id"] in stored_ids]
+
+
+async def after_vitals_stored(vitals_docs: List[Dict[str, Any]], db) -> None:
     """
-    Create and save a vital sign alert to database.
+    Update derived data for newly stored readings of one patient.
+    
+    Refreshes the latest-vitals snapshot and the rollup tiers concurrently,
+    then invalidates cached dashboards and notifies live-stream subscribers.
     
     Args:
-        alert_data: Alert data dictionary
+        vitals_docs: Stored vitals documents (with _id)
         db: Database instance
+    """
+    if not vitals_docs:
+        return
+    await asyncio.gather(
+        update_latest_vitals(vitals_docs, db),
+        record_rollups(vitals_docs, db)
+    )
+    dashboard_cache.mark_changed({doc["patient_id"] for doc in vitals_docs})
+    READINGS_INGESTED.inc(len(vitals_docs))
+    publish_vitals(vitals_docs)
+
+
+def vitals_event(vitals_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a JSON-ready live-stream event from a stored vitals document.
+    
+    Args:
+        vitals_doc: Vitals document with _id
     
     Returns:
-        Inserted alert ID
+        Event dict ({"type": "vitals", "data": {...}})
     """
-    from app.core.database import ALERTS_COLLECTION
-    result = await db[ALERTS_COLLECTION].insert_one(alert_data)
-    return str(result.inserted_id)
+    data = {"_id": str(vitals_doc["_id"])}
+    for field in SNAPSHOT_FIELDS:
+        value = vitals_doc.get(field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    return {"type": "vitals", "data": data}
+
+
+def publish_vitals(vitals_docs: List[Dict[str, Any]]) -> None:
+    """
+    Push stored readings to live-stream subscribers on this worker.
+    
+    Does nothing when readings are relayed from a change stream instead.
+    """
+    if settings.STREAM_SOURCE != "local":
+        return
+    for vitals_doc in vitals_docs:
+        if vitals_hub.has_subscribers(vitals_doc["patient_id"]):
+            vitals_hub.publish(vitals_doc["patient_id"], vitals_event(vitals_doc))
+
+
+async def relay_vitals_change_stream(db) -> None:
+    """
+    Publish every inserted reading to the live-stream hub.
+    
+    Used when STREAM_SOURCE is "change_stream" so that subscribers on any
+    worker see readings ingested by all workers. Only supported with the
+    standard storage layout. Runs until cancelled.
+    """
+    pipeline = [{"$match": {"operationType": "insert"}}]
+    async with db[VITALS_COLLECTION].watch(pipeline) as stream:
+        async for change in stream:
+            vitals_doc = change["fullDocument"]
+            if vitals_hub.has_subscribers(vitals_doc["patient_id"]):
+                vitals_hub.publish(vitals_doc["patient_id"], vitals_event(vitals_doc))
@@ -0,0 +1,86 @@
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from bson import ObjectId
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+import json
+
+try:
+    import orjson
+except ImportError:  # pip install orjson
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Encode values JSON has no type for (ObjectId, models, sets, ...)."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    return jsonable_encoder(obj)
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Serialize to compact JSON bytes.
+
+    Uses orjson when installed (datetimes become ISO 8601 strings, as with
+    jsonable_encoder) and the standard library otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendering raw documents directly.
+
+    Returning it from a route skips FastAPI's response_model validation
+    and jsonable_encoder pass, so use it for trusted database output that
+    already has the response shape (see document_rows).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def response_shape(model: Type[BaseModel]) -> List[Tuple[str, Any]]:
+    """
+    (key, default) pairs of a response model's fields, keyed by alias.
+
+    Args:
+        model: Pydantic response model
+
+    Returns:
+        One pair per field; required fields default to None
+    """
+    return [
+        (field.alias or name, None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items()
+    ]
+
+
+def document_rows(
+    documents: Iterable[Dict[str, Any]],
+    shape: List[Tuple[str, Any]],
+    fields: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Reduce raw documents to response rows without model validation.
+
+    Keeps the response model's fields (or the requested subset), fills in
+    the model defaults for absent ones and drops everything else. Values
+    are passed through as stored; ObjectIds and datetimes are converted
+    when the rows are rendered.
+
+    Args:
+        documents: Documents as returned by the driver
+        shape: Output of response_shape for the route's response model
+        fields: Only include these keys (e.g. from parse_fields)
+
+    Returns:
+        Rows ready for FastJSONResponse
+    """
+    if fields:
+        wanted = set(fields)
+        shape = [(key, default) for key, default in shape if key in wanted]
+    return [{key: document.get(key, default) for key, default in shape} for document in documents]
@@ -0,0 +1,95 @@
+from bson import ObjectId
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, document_id: Any) -> str:
+    """
+    Build an opaque cursor from the sort key of the last item of a page.
+
+    Args:
+        sort_value: Sort field value (e.g. created_at) of the last item
+        document_id: _id of the last item (tie-breaker)
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps({
+        "v": sort_value.isoformat(),
+        "id": str(document_id),
+        "oid": isinstance(document_id, ObjectId)
+    }, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any]:
+    """
+    Read the (sort value, _id) key back from a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_value = datetime.fromisoformat(payload["v"])
+        document_id = ObjectId(payload["id"]) if payload["oid"] else payload["id"]
+        return sort_value, document_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_filter(field: str, key: Tuple[datetime, Any], descending: bool = True) -> Dict[str, Any]:
+    """
+    Filter selecting the items after `key` in (field, _id) sort order.
+
+    The range on `field` stays a single bound so an index on
+    (..., field, _id) serves every page with the same cost.
+
+    Args:
+        field: Sort field
+        key: (sort value, _id) of the last item already returned
+        descending: Whether the listing is newest first
+
+    Returns:
+        Filter to merge into the listing query (uses `field` and $or)
+    """
+    sort_value, document_id = key
+    if descending:
+        return {
+            field: {"$lte": sort_value},
+            "$or": [{field: {"$lt": sort_value}}, {"_id": {"$lt": document_id}}]
+        }
+    return {
+        field: {"$gte": sort_value},
+        "$or": [{field: {"$gt": sort_value}}, {"_id": {"$gt": document_id}}]
+    }
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], always: Iterable[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated `fields` query parameter into a projection.
+
+    Args:
+        fields: Requested fields, e.g. "title,alert_type" (None: all fields)
+        allowed: Field names that may be requested
+        always: Fields included in every projection (e.g. _id, sort field)
+
+    Returns:
+        Field names to project, or None for full documents
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*always, *requested]))
@@ -0,0 +1,70 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+
+
+class QueryPlan:
+    """
+    A set of independent sub-queries run concurrently.
+
+    At most `concurrency` sub-queries run at the same time and each one
+    is cut off after its timeout. A sub-query that times out or fails
+    yields its default value and is listed in `failed`, so callers can
+    return partial data flagged as degraded instead of an error.
+
+    Example:
+        plan = QueryPlan(concurrency=4, timeout=2.0)
+        plan.add("alerts", lambda: get_alert_counts(query, db), default={})
+        results = await plan.run()
+    """
+
+    def __init__(self, concurrency: int, timeout: float):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.failed: List[str] = []
+        self._queries: Dict[str, tuple] = {}
+
+    def add(
+        self,
+        name: str,
+        query: Callable[[], Awaitable[Any]],
+        default: Any = None,
+        timeout: Optional[float] = None
+    ) -> None:
+        """
+        Add a sub-query.
+
+        Args:
+            name: Result key
+            query: Function returning the awaitable to run (called lazily)
+            default: Result used when the sub-query times out or fails
+            timeout: Override the plan's timeout (seconds)
+        """
+        self._queries[name] = (query, default, self.timeout if timeout is None else timeout)
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.failed)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run all sub-queries.
+
+        Returns:
+            Dict of name -> result (default for failed sub-queries)
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(name: str, query, default, timeout):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(query(), timeout)
+                except asyncio.TimeoutError:
+                    print(f"⚠️  Query '{name}' timed out after {timeout}s")
+                except Exception as e:
+                    print(f"⚠️  Query '{name}' failed: {e}")
+                self.failed.append(name)
+                return default
+
+        names = list(self._queries)
+        results = await asyncio.gather(*(run_one(name, *self._queries[name]) for name in names))
+        return dict(zip(names, results))
@@ -0,0 +1,331 @@
+"""
+Benchmark the API hot paths against a seeded dataset.
+
+Requests go through the ASGI app in-process (no network or server), so
+the figures cover routing, auth, validation, services and the database
+driver. The database is mongomock-motor by default (`pip install
+mongomock-motor`; standard vitals storage only) or a real mongod with
+--mongo-uri, which is the setting to use for numbers worth comparing.
+
+Two modes:
+  * micro (default): each scenario runs --requests times in a row after
+    a warm-up, one request at a time
+  * load (--load): --users virtual users issue a weighted mix of the
+    scenarios concurrently for --duration seconds
+
+Throughput and p50/p95/p99 latency are reported per scenario. Results
+can be saved with --json and compared with --baseline; the exit status
+is 1 when a scenario's p95 regressed by more than --max-regression.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_api [--patients N] [--readings N] [--requests N]
+    python -m benchmarks.bench_api --load --users 50 --duration 30
+    python -m benchmarks.bench_api --mongo-uri mongodb://localhost:27017 --json bench.json
+    python -m benchmarks.bench_api --baseline bench.json --max-regression 0.2
+"""
+from app.core import database
+from app.core.config import settings
+from app.core.database import USERS_COLLECTION, PATIENTS_COLLECTION
+from app.core.indexes import ensure_indexes
+from app.core.security import create_access_token
+from app.models.patient import Patient
+from app.models.user import User
+from app.models.vitals import VitalSigns
+from app.services.dashboard_cache import dashboard_cache
+from app.services.vitals_repository import ensure_vitals_collection
+from app.services.vitals_service import ingest_vitals_batch
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+
+# Readings written per ingest call while seeding
+SEED_BATCH_SIZE = 500
+
+
+@dataclass
+class Dataset:
+    """Seeded users and their bearer-token headers."""
+    patient_ids: List[str]
+    patient_headers: List[Dict[str, str]]
+    caregiver_headers: Dict[str, str]
+    clinician_headers: Dict[str, str]
+
+
+@dataclass
+class Scenario:
+    """One benchmarked request: who sends it and how it is built."""
+    name: str
+    method: str
+    role: str
+    weight: int
+    path: Callable[[Dataset, random.Random], str]
+    body: Optional[Callable[[random.Random], Dict[str, Any]]] = None
+
+
+@dataclass
+class Result:
+    """Latencies of one scenario."""
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        return {
+            "requests": len(ordered),
+            "errors": self.errors,
+            "throughput": round(len(ordered) / self.elapsed, 1) if self.elapsed else 0.0,
+            "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        }
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted values (0 when empty)."""
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def random_vitals(rng: random.Random, abnormal: float = 0.05) -> Dict[str, Any]:
+    """Vital sign measurements; a fraction `abnormal` is out of range."""
+    wide = rng.random() < abnormal
+    return {
+        "heart_rate": rng.randint(40, 150) if wide else rng.randint(62, 98),
+        "systolic_bp": rng.randint(80, 190) if wide else rng.randint(95, 135),
+        "diastolic_bp": rng.randint(50, 110) if wide else rng.randint(65, 85),
+        "oxygen_saturation": round(rng.uniform(86, 100), 1) if wide else round(rng.uniform(96, 100), 1),
+        "temperature": round(rng.uniform(35.5, 39.5), 1) if wide else round(rng.uniform(36.2, 37.1), 1),
+        "respiratory_rate": rng.randint(8, 26) if wide else rng.randint(13, 19),
+    }
+
+
+def _headers(user_id: str, role: str) -> Dict[str, str]:
+    token = create_access_token({"user_id": user_id, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _insert_user(db, email: str, full_name: str, role: str, assigned_patients: List[str]) -> str:
+    user = User(email=email, hashed_password="!", full_name=full_name, role=role, assigned_patients=assigned_patients)
+    result = await db[USERS_COLLECTION].insert_one(user.model_dump(by_alias=True, exclude={"id"}))
+    return str(result.inserted_id)
+
+
+async def seed(db, patients: int, readings: int, interval_minutes: float = 5, seed_value: int = 42) -> Dataset:
+    """
+    Create patients with reading histories, a caregiver and a clinician.
+
+    Readings are written through the regular ingest path, so snapshots,
+    rollups and alerts are produced as in production.
+
+    Args:
+        db: Database instance
+        patients: Number of patients
+        readings: Readings per patient, spaced interval_minutes apart up to now
+        interval_minutes: Spacing of readings
+        seed_value: Random seed
+
+    Returns:
+        Dataset with ids and auth headers
+    """
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    patient_ids = []
+    for index in range(patients):
+        patient_id = await _insert_user(db, f"bench-patient-{index}@example.com", f"Bench Patient {index}", "patient", [])
+        await db[PATIENTS_COLLECTION].insert_one(Patient(user_id=patient_id).model_dump(by_alias=True, exclude={"id"}))
+        patient_ids.append(patient_id)
+
+        batch = []
+        for offset in range(readings, 0, -1):
+            measured_at = now - timedelta(minutes=offset * interval_minutes)
+            batch.append(VitalSigns(patient_id=patient_id, measured_at=measured_at, **random_vitals(rng)))
+            if len(batch) == SEED_BATCH_SIZE:
+                await ingest_vitals_batch(batch, patient_id, db)
+                batch = []
+        if batch:
+            await ingest_vitals_batch(batch, patient_id, db)
+
+    caregiver_id = await _insert_user(db, "bench-caregiver@example.com", "Bench Caregiver", "caregiver", patient_ids)
+    clinician_id = await _insert_user(db, "bench-clinician@example.com", "Bench Clinician", "clinician", patient_ids)
+    return Dataset(
+        patient_ids=patient_ids,
+        patient_headers=[_headers(patient_id, "patient") for patient_id in patient_ids],
+        caregiver_headers=_headers(caregiver_id, "caregiver"),
+        clinician_headers=_headers(clinician_id, "clinician"),
+    )
+
+
+SCENARIOS = [
+    Scenario("submit_vitals", "POST", "patient", 40, lambda data, rng: "/vitals", body=random_vitals),
+    Scenario("vitals_history", "GET", "patient", 15, lambda data, rng: "/vitals/history?hours=24&limit=100"),
+    Scenario("alerts", "GET", "caregiver", 15, lambda data, rng: "/alerts?limit=50"),
+    Scenario("dashboard_patient", "GET", "patient", 10, lambda data, rng: "/dashboard/patient"),
+    Scenario("dashboard_caregiver", "GET", "caregiver", 8, lambda data, rng: "/dashboard/caregiver"),
+    Scenario("dashboard_clinician", "GET", "clinician", 7, lambda data, rng: "/dashboard/clinician"),
+    Scenario("patients_overview", "GET", "clinician", 5, lambda data, rng: "/users/patients/overview"),
+]
+
+
+async def _request(client, scenario: Scenario, data: Dataset, rng: random.Random, result: Result, cold: bool) -> None:
+    if scenario.role == "patient":
+        headers = rng.choice(data.patient_headers)
+    elif scenario.role == "caregiver":
+        headers = data.caregiver_headers
+    else:
+        headers = data.clinician_headers
+    body = scenario.body(rng) if scenario.body else None
+    if cold:
+        dashboard_cache.clear()
+
+    started = time.perf_counter()
+    response = await client.request(scenario.method, scenario.path(data, rng), headers=headers, json=body)
+    result.latencies.append(time.perf_counter() - started)
+    if response.status_code >= 400:
+        result.errors += 1
+
+
+async def run_micro(client, data: Dataset, scenarios: List[Scenario], requests: int, warmup: int, cold: bool = False) -> Dict[str, Result]:
+    """Run each scenario sequentially, one request at a time."""
+    rng = random.Random(7)
+    results = {}
+    for scenario in scenarios:
+        result = Result(scenario.name)
+        for _ in range(warmup):
+            await _request(client, scenario, data, rng, Result(scenario.name), cold)
+        started = time.perf_counter()
+        for _ in range(requests):
+            await _request(client, scenario, data, rng, result, cold)
+        result.elapsed = time.perf_counter() - started
+        results[scenario.name] = result
+    return results
+
+
+async def run_load(client, data: Dataset, scenarios: List[Scenario], users: int, duration: float, think_time: float = 0.0, cold: bool = False) -> Dict[str, Result]:
+    """Run a weighted scenario mix from concurrent virtual users."""
+    results = {scenario.name: Result(scenario.name) for scenario in scenarios}
+    weights = [scenario.weight for scenario in scenarios]
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user(index: int):
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(scenarios, weights)[0]
+            await _request(client, scenario, data, rng, results[scenario.name], cold)
+            if think_time:
+                await asyncio.sleep(rng.uniform(0, 2 * think_time))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(index) for index in range(users)))
+    elapsed = time.perf_counter() - started
+    for result in results.values():
+        result.elapsed = elapsed
+    return results
+
+
+def compare(summaries: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], max_regression: float) -> List[str]:
+    """Scenarios whose p95 grew by more than max_regression over the baseline."""
+    regressions = []
+    for name, summary in summaries.items():
+        previous = baseline.get(name)
+        if previous and previous["p95_ms"] and summary["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {summary['p95_ms']} ms")
+    return regressions
+
+
+async def _connect(mongo_uri: Optional[str]):
+    if mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        database.mongo_client = AsyncIOMotorClient(mongo_uri, **database.client_options())
+    else:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("mongomock-motor is not installed; pip install mongomock-motor or pass --mongo-uri")
+        database.mongo_client = AsyncMongoMockClient()
+    db = database.get_database()
+    await ensure_vitals_collection(db)
+    if mongo_uri:
+        await ensure_indexes(db)
+    return db
+
+
+async def run(args) -> Dict[str, Dict[str, Any]]:
+    from app.main import app
+    from httpx import AsyncClient
+
+    settings.MONGO_DB_NAME = args.database
+    db = await _connect(args.mongo_uri)
+    try:
+        started = time.perf_counter()
+        data = await seed(db, args.patients, args.readings)
+        print(f"Seeded {args.patients} patients x {args.readings} readings in {time.perf_counter() - started:.1f}s")
+
+        scenarios = [scenario for scenario in SCENARIOS if not args.only or scenario.name in args.only]
+        async with AsyncClient(app=app, base_url="http://bench") as client:
+            if args.load:
+                results = await run_load(client, data, scenarios, args.users, args.duration, args.think_time, args.cold)
+            else:
+                results = await run_micro(client, data, scenarios, args.requests, args.warmup, args.cold)
+    finally:
+        if args.mongo_uri and not args.keep:
+            await database.mongo_client.drop_database(args.database)
+        database.mongo_client.close()
+    return {name: result.summary() for name, result in results.items()}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=20)
+    parser.add_argument("--readings", type=int, default=288, help="Readings per patient (288 = one day at 5 min)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario (micro mode)")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--load", action="store_true", help="Concurrent weighted mix instead of one scenario at a time")
+    parser.add_argument("--users", type=int, default=20, help="Virtual users (load mode)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds (load mode)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a user's requests (load mode)")
+    parser.add_argument("--cold", action="store_true", help="Clear the dashboard cache before every request")
+    parser.add_argument("--only", nargs="*", help=f"Scenarios to run: {', '.join(s.name for s in SCENARIOS)}")
+    parser.add_argument("--mongo-uri", help="Use this mongod instead of mongomock-motor")
+    parser.add_argument("--database", default="hyperwatch_bench")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark database (--mongo-uri)")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against results written by --json")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed p95 increase over the baseline")
+    args = parser.parse_args(argv)
+
+    summaries = asyncio.run(run(args))
+
+    mode = f"load, {args.users} users, {args.duration:g}s" if args.load else f"micro, {args.requests} requests each"
+    print(f"{'mongod' if args.mongo_uri else 'mongomock'}, {mode}")
+    print(f"  {'scenario':<22}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for name, summary in summaries.items():
+        print(
+            f"  {name:<22}{summary['throughput']:>9}{summary['p50_ms']:>9}"
+            f"{summary['p95_ms']:>9}{summary['p99_ms']:>9}{summary['errors']:>8}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summaries, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"⚠️  Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
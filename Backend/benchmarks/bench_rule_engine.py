@@ -0,0 +1,211 @@
+"""
+Benchmark the compiled rule engine against the legacy if/elif cascade.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_rule_engine [--readings N] [--repeat N]
+"""
+from app.models.vitals import VitalSigns
+from app.services.alert_service import create_alert_dict
+from app.services.rule_engine import compile_rule_table
+from typing import Tuple, List, Dict, Any
+import argparse
+import asyncio
+import random
+import time
+
+
+# Verbatim copy of vitals_service.check_vitals_anomaly before the rule engine
+async def legacy_check_vitals_anomaly(
+    vitals: VitalSigns,
+    patient_data: Dict[str, Any]
+) -> Tuple[bool, str, List[Dict[str, Any]]]:
+    """
+    Check if vital signs are outside normal thresholds.
+    
+    Args:
+        vitals: VitalSigns object with measurements
+        patient_data: Patient document with threshold settings
+    
+    Returns:
+        Tuple of (is_anomaly, anomaly_type, list_of_alerts)
+    """
+    is_anomaly = False
+    anomaly_type = None
+    alerts = []
+    
+    # Check heart rate
+    if vitals.heart_rate is not None:
+        hr_min = patient_data.get("heart_rate_min", 60)
+        hr_max = patient_data.get("heart_rate_max", 100)
+        
+        if vitals.heart_rate < hr_min:
+            is_anomaly = True
+            anomaly_type = "low"
+            alerts.append(create_alert_dict(
+                patient_id=vitals.patient_id,
+                vital_type="heart_rate",
+                vital_value=vitals.heart_rate,
+                threshold_crossed="below_min",
+                title="Low Heart Rate Detected",
+                message=f"Heart rate ({vitals.heart_rate} BPM) is below minimum threshold ({hr_min} BPM)",
+                alert_type="warning" if vitals.heart_rate >= (hr_min - 10) else "critical"
+            ))
+        elif vitals.heart_rate > hr_max:
+            is_anomaly = True
+            anomaly_type = "high"
+            alerts.append(create_alert_dict(
+                patient_id=vitals.patient_id,
+                vital_type="heart_rate",
+                vital_value=vitals.heart_rate,
+                threshold_crossed="above_max",
+                title="High Heart Rate Detected",
+                message=f"Heart rate ({vitals.heart_rate} BPM) is above maximum threshold ({hr_max} BPM)",
+                alert_type="warning" if vitals.heart_rate <= (hr_max + 20) else "critical"
+            ))
+    
+    # Check blood pressure
+    if vitals.systolic_bp is not None:
+        sys_min = patient_data.get("systolic_bp_min", 90)
+        sys_max = patient_data.get("systolic_bp_max", 140)
+        
+        if vitals.systolic_bp < sys_min:
+            is_anomaly = True
+            anomaly_type = "low"
+            alerts.append(create_alert_dict(
+                patient_id=vitals.patient_id,
+                vital_type="systolic_bp",
+                vital_value=vitals.systolic_bp,
+                threshold_crossed="below_min",
+                title="Low Blood Pressure Detected",
+                message=f"Systolic BP ({vitals.systolic_bp} mmHg) is below minimum threshold ({sys_min} mmHg)",
+                alert_type="warning"
+            ))
+        elif vitals.systolic_bp > sys_max:
+            is_anomaly = True
+            anomaly_type = "high"
+            alerts.append(create_alert_dict(
+                patient_id=vitals.patient_id,
+                vital_type="systolic_bp",
+                vital_value=vitals.systolic_bp,
+                threshold_crossed="above_max",
+                title="High Blood Pressure Detected",
+                message=f"Systolic BP ({vitals.systolic_bp} mmHg) is above maximum threshold ({sys_max} mmHg)",
+                alert_type="critical" if vitals.systolic_bp > 180 else "warning"
+            ))
+    
+    # Check oxygen saturation
+    if vitals.oxygen_saturation is not None:
+        o2_min = patient_data.get("oxygen_saturation_min", 95)
+        
+        if vitals.oxygen_saturation < o2_min:
+            is_anomaly = True
+            anomaly_type = "low"
+            alerts.append(create_alert_dict(
+                patient_id=vitals.patient_id,
+                vital_type="oxygen_saturation",
+                vital_value=vitals.oxygen_saturation,
+                threshold_crossed="below_min",
+                title="Low Oxygen Saturation Detected",
+                message=f"Oxygen saturation ({vitals.oxygen_saturation}%) is below minimum threshold ({o2_min}%)",
+                alert_type="critical" if vitals.oxygen_saturation < 90 else "warning"
+            ))
+    
+    # Check temperature
+    if vitals.temperature is not None:
+        temp_min = patient_data.get("temperature_min", 36.1)
+        temp_max = patient_data.get("temperature_max", 37.2)
+        
+        if vitals.temperature < temp_min:
+            is_anomaly = True
+            anomaly_type = "low"
+            alerts.append(create_alert_dict(
+                patient_id=vitals.patient_id,
+                vital_type="temperature",
+                vital_value=vitals.temperature,
+                threshold_crossed="below_min",
+                title="Low Body Temperature Detected",
+                message=f"Temperature ({vitals.temperature}°C) is below minimum threshold ({temp_min}°C)",
+                alert_type="warning"
+            ))
+        elif vitals.temperature > temp_max:
+            is_anomaly = True
+            anomaly_type = "high"
+            alerts.append(create_alert_dict(
+                patient_id=vitals.patient_id,
+                vital_type="temperature",
+                vital_value=vitals.temperature,
+                threshold_crossed="above_max",
+                title="High Body Temperature Detected",
+                message=f"Temperature ({vitals.temperature}°C) is above maximum threshold ({temp_max}°C)",
+                alert_type="critical" if vitals.temperature > 39 else "warning"
+            ))
+    
+    return is_anomaly, anomaly_type, alerts
+
+
+def make_readings(count: int, abnormal: float, seed: int = 42) -> List[VitalSigns]:
+    """Random readings; a fraction `abnormal` is drawn from wide, alerting ranges."""
+    rng = random.Random(seed)
+    readings = []
+    for _ in range(count):
+        wide = rng.random() < abnormal
+        readings.append(VitalSigns(
+            patient_id="bench",
+            heart_rate=rng.randint(40, 150) if wide else rng.randint(62, 98),
+            systolic_bp=rng.randint(80, 190) if wide else rng.randint(95, 135),
+            diastolic_bp=rng.randint(50, 110) if wide else rng.randint(65, 85),
+            oxygen_saturation=round(rng.uniform(86, 100), 1) if wide else round(rng.uniform(96, 100), 1),
+            temperature=round(rng.uniform(35.5, 39.5), 1) if wide else round(rng.uniform(36.2, 37.1), 1),
+            respiratory_rate=rng.randint(8, 26) if wide else rng.randint(13, 19),
+        ))
+    return readings
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readings", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--abnormal", type=float, default=0.05, help="Fraction of out-of-range readings")
+    args = parser.parse_args(argv)
+
+    readings = make_readings(args.readings, args.abnormal)
+    patient_data = {"user_id": "bench"}
+    table = compile_rule_table(patient_data)
+    loop = asyncio.new_event_loop()
+
+    def legacy():
+        for vitals in readings:
+            loop.run_until_complete(legacy_check_vitals_anomaly(vitals, patient_data))
+
+    async def legacy_batch():
+        for vitals in readings:
+            await legacy_check_vitals_anomaly(vitals, patient_data)
+
+    results = {
+        "legacy (per call)": best_of(args.repeat, legacy),
+        "legacy (one loop)": best_of(args.repeat, lambda: loop.run_until_complete(legacy_batch())),
+        "compile per reading": best_of(args.repeat, lambda: [compile_rule_table(patient_data).evaluate(v) for v in readings]),
+        "cached table": best_of(args.repeat, lambda: [table.evaluate(v) for v in readings]),
+        "cached table, batch": best_of(args.repeat, lambda: table.evaluate_batch(readings)),
+    }
+    loop.close()
+
+    print(
+        f"{args.readings} readings, {args.abnormal:.0%} abnormal, best of {args.repeat} "
+        f"(legacy checks 4 vitals, engine 6)"
+    )
+    for name, seconds in results.items():
+        print(f"  {name:<22} {seconds * 1000:9.1f} ms  {seconds / args.readings * 1e6:7.2f} us/reading")
+
+
+if __name__ == "__main__":
+    main()
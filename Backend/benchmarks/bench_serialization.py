@@ -0,0 +1,114 @@
+"""
+Benchmark list-endpoint serialization: Pydantic response models vs raw JSON rows.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_serialization [--rows N] [--repeat N]
+
+Each path starts from BSON as the driver receives it, so the cost of
+decoding fields the response does not use is included: the model path
+decodes full documents, the raw path documents projected to the
+response fields.
+"""
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.schemas.vitals import VitalsResponse
+from app.schemas.alert import AlertResponse
+from app.services import data_generator
+from app.utils import json_response
+from app.utils.json_response import document_rows, dumps, response_shape
+from datetime import datetime, timedelta
+from itertools import cycle, islice
+from typing import Any, Dict, List, Type
+import argparse
+import json
+import bson
+import numpy as np
+import time
+
+
+def make_documents(rows: int, seed: int = 42):
+    """Stored vitals and alert documents for one synthetic patient."""
+    rng = np.random.default_rng(seed)
+    thresholds = data_generator.random_thresholds(rng)
+    baseline = data_generator.random_baseline(rng)
+    end = datetime(2024, 1, 31)
+    # One reading per minute, with frequent episodes so there are alerts to cycle through
+    measured_at, values = data_generator.generate_series(
+        baseline, end - timedelta(minutes=rows), end, 60, anomaly_rate=20, gap_rate=0, rng=rng
+    )
+    is_anomaly, is_high, crossings = data_generator.classify_readings(values, thresholds)
+    readings = data_generator.reading_docs("bench", "bench-device", measured_at, values, is_anomaly, is_high)
+    alerts = data_generator.episode_alerts(
+        "bench", measured_at, values, [doc["_id"] for doc in readings], thresholds, crossings, end, rng
+    )
+    return readings[:rows], list(islice(cycle(alerts), rows))
+
+
+def model_path(payload: bytes, model: Type[Any]) -> bytes:
+    """The route before: one model per document, then FastAPI's response handling."""
+    items = []
+    for document in bson.decode_all(payload):
+        document["_id"] = str(document["_id"])
+        items.append(model(**document))
+    # serialize_response: re-validate against response_model, dump, encode
+    adapter = TypeAdapter(List[model])
+    content = [item.model_dump(by_alias=True) for item in items]
+    content = adapter.dump_python(adapter.validate_python(content), mode="json", by_alias=True)
+    return json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+
+
+def raw_path(payload: bytes, shape) -> bytes:
+    """The route now: projected documents straight to JSON rows."""
+    return dumps(document_rows(bson.decode_all(payload), shape))
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="Documents per response")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    readings, alerts = make_documents(args.rows)
+    orjson = json_response.orjson
+    results: Dict[str, Dict[str, float]] = {}
+    for label, documents, model in (("vitals", readings, VitalsResponse), ("alerts", alerts, AlertResponse)):
+        shape = response_shape(model)
+        keys = [key for key, _ in shape]
+        full = b"".join(bson.encode(document) for document in documents)
+        projected = b"".join(bson.encode({key: document[key] for key in keys if key in document}) for document in documents)
+
+        timings = {
+            "response models": best_of(args.repeat, lambda: model_path(full, model)),
+            "raw rows": best_of(args.repeat, lambda: raw_path(projected, shape)),
+        }
+        if orjson is not None:
+            # Same rows through the standard library encoder (orjson not installed)
+            json_response.orjson = None
+            try:
+                timings["raw rows, stdlib json"] = best_of(args.repeat, lambda: raw_path(projected, shape))
+            finally:
+                json_response.orjson = orjson
+        results[f"{label} ({len(full) // len(documents)} -> {len(projected) // len(documents)} B/doc)"] = timings
+
+    print(f"{args.rows} rows per response, best of {args.repeat}, orjson {'on' if orjson else 'not installed'}")
+    for label, timings in results.items():
+        print(f"  {label}")
+        baseline = timings["response models"]
+        for name, seconds in timings.items():
+            print(
+                f"    {name:<22} {seconds * 1000:8.2f} ms  {args.rows / seconds:>10,.0f} rows/s"
+                f"  {baseline / seconds:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import pytest
+from bson import ObjectId
+from datetime import datetime
+from app.services.alert_service import bulk_alert_query
+
+
+def test_bulk_alert_query_is_limited_to_accessible_patients():
+    """Test bulk selections always carry the patient access filter."""
+    alert_id = ObjectId()
+    before = datetime(2024, 1, 1)
+    
+    query = bulk_alert_query(["p1", "p2"], alert_ids=[str(alert_id)], vital_type="heart_rate", before=before)
+    
+    assert query == {
+        "patient_id": {"$in": ["p1", "p2"]},
+        "_id": {"$in": [alert_id]},
+        "vital_type": "heart_rate",
+        "created_at": {"$lt": before},
+    }
+    with pytest.raises(ValueError):
+        bulk_alert_query(["p1"], alert_ids=["not-an-id"])
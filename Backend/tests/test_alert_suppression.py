@@ -0,0 +1,88 @@
+import copy
+import pytest
+from datetime import datetime, timedelta
+from app.services.alert_dispatcher import deliver_alerts, outbox_entry
+from app.services.alert_service import create_alert_dict
+from app.core.config import settings
+from app.services.alert_suppression import APPLIED_ENTRIES_KEPT, coalesce_alerts, open_alert_index
+
+START = datetime(2024, 1, 1, 12, 0)
+
+
+def _alert(value, threshold_crossed="above_max", alert_type="warning", minute=0):
+    alert = create_alert_dict("p1", "heart_rate", value, threshold_crossed, "Title", f"Value {value}", alert_type)
+    alert["created_at"] = START + timedelta(minutes=minute)
+    return alert
+
+
+def test_repeats_coalesce_with_count_and_peak():
+    """Test repeats of one key fold into the first alert with count, times and peak."""
+    alerts = coalesce_alerts([
+        _alert(110, minute=0),
+        _alert(50, "below_min", minute=1),
+        _alert(118, minute=2),
+        _alert(45, "below_min", minute=3),
+        _alert(112, minute=4),
+    ])
+    
+    high, low = alerts
+    assert high["occurrence_count"] == 3
+    assert (high["first_seen_at"], high["last_seen_at"]) == (START, START + timedelta(minutes=4))
+    assert high["peak_value"] == 118
+    assert high["vital_value"] == 112 and high["message"] == "Value 112"
+    assert low["occurrence_count"] == 2 and low["peak_value"] == 45
+
+
+def test_more_severe_repeat_is_not_suppressed():
+    """Test a critical repeat opens its own alert instead of joining a warning."""
+    alerts = coalesce_alerts([
+        _alert(110),
+        _alert(140, alert_type="critical", minute=1),
+        _alert(115, minute=2),
+    ])
+    
+    assert [(a["alert_type"], a["occurrence_count"]) for a in alerts] == [("warning", 1), ("critical", 2)]
+
+
+@pytest.mark.asyncio
+async def test_replayed_outbox_entries_are_folded_once():
+    """Test delivering the same outbox entry twice counts its repeats once."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    open_alert_index.clear()
+    first = outbox_entry("p1", [_alert(110)])
+    repeats = outbox_entry("p1", [_alert(118, minute=1), _alert(112, minute=2)])
+    later = outbox_entry("p1", [_alert(115, minute=3)])
+    
+    await deliver_alerts([first], db)
+    assert await deliver_alerts([copy.deepcopy(repeats)], db) == 2
+    # Crash before the outbox cleanup: the sweep delivers the entry again
+    assert await deliver_alerts([copy.deepcopy(repeats)], db) == 0
+    # Overlapping batch: only the new entry is counted
+    assert await deliver_alerts([copy.deepcopy(repeats), later], db) == 1
+    
+    alert = await db.alerts.find_one({})
+    assert await db.alerts.count_documents({}) == 1
+    assert alert["occurrence_count"] == 4 and alert["peak_value"] == 118
+    assert alert["vital_value"] == 115
+    open_alert_index.clear()
+
+
+@pytest.mark.asyncio
+async def test_alert_storm_keeps_bounded_state_and_rolls_over(monkeypatch):
+    """Test a long storm keeps a bounded entry list and opens a new alert after the maximum lifetime."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    open_alert_index.clear()
+    for minute in range(APPLIED_ENTRIES_KEPT + 20):
+        await deliver_alerts([outbox_entry("p1", [_alert(110 + minute % 7, minute=minute)])], db)
+    
+    alert = await db.alerts.find_one({})
+    assert await db.alerts.count_documents({}) == 1
+    assert alert["occurrence_count"] == APPLIED_ENTRIES_KEPT + 20
+    assert len(alert["outbox_ids"]) == APPLIED_ENTRIES_KEPT
+    
+    monkeypatch.setattr(settings, "ALERT_SUPPRESSION_MAX_SECONDS", 0)
+    await deliver_alerts([outbox_entry("p1", [_alert(111, minute=600)])], db)
+    assert await db.alerts.count_documents({}) == 2
+    open_alert_index.clear()
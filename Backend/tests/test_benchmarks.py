@@ -0,0 +1,33 @@
+import pytest
+from httpx import AsyncClient
+from app.core import database
+from app.main import app
+from benchmarks.bench_api import SCENARIOS, compare, percentile, run_micro, seed
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+def test_percentile_and_regression_check():
+    """Test nearest-rank percentiles and p95 regression detection."""
+    ordered = [i / 100 for i in range(1, 101)]
+    assert percentile(ordered, 50) == 0.5
+    assert percentile(ordered, 99) == 0.99
+    assert percentile([], 95) == 0.0
+    
+    baseline = {"alerts": {"p95_ms": 10.0}, "dashboard_patient": {"p95_ms": 2.0}}
+    current = {"alerts": {"p95_ms": 14.0}, "dashboard_patient": {"p95_ms": 2.1}}
+    assert compare(current, baseline, max_regression=0.25) == ["alerts: p95 10.0 ms -> 14.0 ms"]
+
+
+@pytest.mark.asyncio
+async def test_scenarios_run_without_errors(monkeypatch):
+    """Test every benchmark scenario succeeds against a small seeded dataset."""
+    monkeypatch.setattr(database, "mongo_client", mongomock_motor.AsyncMongoMockClient())
+    data = await seed(database.get_database(), patients=2, readings=20)
+    
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        results = await run_micro(client, data, SCENARIOS, requests=3, warmup=0)
+    
+    for name, result in results.items():
+        assert result.errors == 0, name
+        assert result.summary()["requests"] == 3
@@ -0,0 +1,46 @@
+import time
+from app.core.cache import TTLCache, MISSING
+
+
+def test_cache_hit_and_miss_counters():
+    """Test lookups are counted as hits or misses."""
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    assert cache.get("a") is MISSING
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_cache_evicts_least_recently_used():
+    """Test the oldest untouched entry is evicted when full."""
+    cache = TTLCache("test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_cache_entries_expire():
+    """Test entries are dropped after their time to live."""
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is MISSING
+
+
+def test_cache_invalidate():
+    """Test explicit invalidation removes an entry."""
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    cache.set("a", None)
+    assert cache.get("a") is None
+    cache.invalidate("a")
+    assert cache.get("a") is MISSING
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from app.services.dashboard_cache import DashboardCache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_build():
+    """Test identical concurrent requests coalesce and later requests hit the cache."""
+    cache = DashboardCache(maxsize=10, ttl=60)
+    builds = []
+    
+    async def build():
+        builds.append(1)
+        await asyncio.sleep(0.01)
+        return {"alerts": len(builds)}
+    
+    results = await asyncio.gather(*[cache.get_or_build("k", ["p1"], build) for _ in range(5)])
+    
+    assert len(builds) == 1
+    assert len({etag for etag, _ in results}) == 1
+    assert await cache.get_or_build("k", ["p1"], build) == results[0]
+    assert cache.coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_patient_change_invalidates_covering_dashboards():
+    """Test a change to a covered patient rebuilds the dashboard with a new ETag."""
+    cache = DashboardCache(maxsize=10, ttl=60)
+    counter = {"n": 0}
+    
+    async def build():
+        counter["n"] += 1
+        return {"n": counter["n"]}
+    
+    etag, _ = await cache.get_or_build("k", ["p1", "p2"], build)
+    cache.mark_changed(["p3"])
+    assert (await cache.get_or_build("k", ["p1", "p2"], build))[0] == etag
+    
+    cache.mark_changed(["p2"])
+    new_etag, body = await cache.get_or_build("k", ["p1", "p2"], build)
+    
+    assert new_etag != etag
+    assert body == b'{"n":2}'
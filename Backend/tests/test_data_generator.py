@@ -0,0 +1,85 @@
+import numpy as np
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.services.data_generator import (
+    classify_readings, episode_alerts, generate_series, random_baseline, random_thresholds, reading_docs
+)
+
+START = datetime(2024, 1, 1)
+
+
+def test_series_has_circadian_rhythm_and_correlated_vitals():
+    """Test heart rate is higher in the afternoon and moves with blood pressure."""
+    rng = np.random.default_rng(1)
+    measured_at, values = generate_series(random_baseline(rng), START, START + timedelta(days=14), 300, 0, 0, rng)
+    
+    assert len(measured_at) == 14 * 288
+    hours = measured_at.astype("datetime64[h]").astype(int) % 24
+    heart_rate = values["heart_rate"]
+    assert np.nanmean(heart_rate[(hours >= 14) & (hours < 18)]) > np.nanmean(heart_rate[(hours >= 2) & (hours < 6)]) + 5
+    present = ~np.isnan(heart_rate) & ~np.isnan(values["systolic_bp"])
+    assert np.corrcoef(heart_rate[present], values["systolic_bp"][present])[0, 1] > 0.3
+
+
+def test_device_gaps_remove_readings():
+    """Test device gaps leave stretches without readings."""
+    rng = np.random.default_rng(2)
+    measured_at, _ = generate_series(random_baseline(rng), START, START + timedelta(days=7), 300, 0, 1, rng)
+    
+    spacing = np.diff(measured_at).astype("timedelta64[s]").astype(int)
+    assert len(measured_at) < 7 * 288
+    assert spacing.max() >= 3600
+
+
+def test_anomaly_episodes_become_alerts_with_folded_repeats():
+    """Test out-of-range runs are flagged and produce one alert each."""
+    rng = np.random.default_rng(3)
+    thresholds = random_thresholds(rng)
+    measured_at, values = generate_series(random_baseline(rng), START, START + timedelta(days=7), 300, 2, 0, rng)
+    is_anomaly, is_high, crossings = classify_readings(values, thresholds)
+    docs = reading_docs("p1", "dev", measured_at, values, is_anomaly, is_high)
+    alerts = episode_alerts("p1", measured_at, values, [doc["_id"] for doc in docs], thresholds, crossings, datetime.utcnow(), rng)
+    
+    assert is_anomaly.any() and alerts
+    assert sum(alert["occurrence_count"] for alert in alerts) >= is_anomaly.sum()
+    flagged = [doc for doc in docs if doc["is_anomaly"]]
+    assert all(doc["anomaly_type"] in ("high", "low") for doc in flagged)
+    assert all(isinstance(doc["_id"], ObjectId) for doc in docs)
+    for alert in alerts:
+        assert alert["first_seen_at"] <= alert["last_seen_at"]
+        assert (alert["alert_type"], alert["severity"]) in (("warning", "medium"), ("critical", "high"))
+
+
+def test_alert_runs_continue_across_chunks():
+    """Test a run split between chunks yields the same alert, valued at its latest reading."""
+    rng = np.random.default_rng(4)
+    thresholds = random_thresholds(rng)
+    measured_at, values = generate_series(random_baseline(rng), START, START + timedelta(days=3), 300, 4, 0, rng)
+    is_anomaly, is_high, crossings = classify_readings(values, thresholds)
+    ids = [ObjectId() for _ in measured_at]
+    whole = episode_alerts("p1", measured_at, values, ids, thresholds, crossings, datetime.utcnow(), rng)
+    
+    # Split inside the longest run
+    longest = max(whole, key=lambda alert: alert["occurrence_count"])
+    first = ids.index(ObjectId(longest["vital_reading_id"])) - 1
+    split = [{field: (below[:first], above[:first]) for field, (below, above) in crossings.items()},
+             {field: (below[first:], above[first:]) for field, (below, above) in crossings.items()}]
+    open_runs = {}
+    chunks = episode_alerts(
+        "p1", measured_at[:first], {f: v[:first] for f, v in values.items()}, ids[:first],
+        thresholds, split[0], datetime.utcnow(), rng, open_runs, more=True
+    )
+    assert open_runs
+    chunks += episode_alerts(
+        "p1", measured_at[first:], {f: v[first:] for f, v in values.items()}, ids[first:],
+        thresholds, split[1], datetime.utcnow(), rng, open_runs
+    )
+    
+    summary = lambda alerts: sorted(
+        (a["vital_type"], a["threshold_crossed"], a["first_seen_at"], a["last_seen_at"], a["occurrence_count"],
+         a["peak_value"], a["vital_value"], a["vital_reading_id"], a["message"], a["alert_type"])
+        for a in alerts
+    )
+    assert summary(chunks) == summary(whole)
+    index = ids.index(ObjectId(longest["vital_reading_id"]))
+    assert longest["vital_value"] == values[longest["vital_type"]][index]
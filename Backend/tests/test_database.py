@@ -0,0 +1,28 @@
+from app.core.config import settings
+from app.core.database import client_options, read_preference_for
+
+
+def test_client_options_follow_settings(monkeypatch):
+    """Test pool size, wait queue timeout and compressors come from settings."""
+    monkeypatch.setattr(settings, "MONGO_MAX_POOL_SIZE", 50)
+    monkeypatch.setattr(settings, "MONGO_COMPRESSORS", "zstd, zlib")
+    monkeypatch.setattr(settings, "MONGO_WAIT_QUEUE_TIMEOUT_MS", None)
+    
+    options = client_options()
+    
+    assert options["maxPoolSize"] == 50
+    assert options["compressors"] == ["zstd", "zlib"]
+    assert "zlibCompressionLevel" in options
+    assert "waitQueueTimeoutMS" not in options
+
+
+def test_read_preference_per_query_class(monkeypatch):
+    """Test only configured query classes are routed away from the primary."""
+    monkeypatch.setattr(settings, "MONGO_READ_PREFERENCE_DASHBOARD", "secondaryPreferred")
+    monkeypatch.setattr(settings, "MONGO_MAX_STALENESS_SECONDS", 120)
+    
+    preference = read_preference_for("dashboard")
+    
+    assert preference.mongos_mode == "secondaryPreferred"
+    assert preference.max_staleness == 120
+    assert read_preference_for("default") is None
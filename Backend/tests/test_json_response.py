@@ -0,0 +1,52 @@
+import json
+from bson import ObjectId
+from datetime import datetime
+from app.schemas.alert import AlertResponse
+from app.utils.json_response import FastJSONResponse, document_rows, dumps, response_shape
+
+ALERT_SHAPE = response_shape(AlertResponse)
+
+
+def make_alert(**overrides):
+    alert = {
+        "_id": ObjectId(),
+        "patient_id": "p1",
+        "alert_type": "warning",
+        "severity": "medium",
+        "title": "High Heart Rate Detected",
+        "message": "Heart rate (120 BPM) is above maximum threshold (100 BPM)",
+        "vital_type": "heart_rate",
+        "vital_value": 120.0,
+        "is_read": False,
+        "is_resolved": False,
+        "created_at": datetime(2024, 5, 1, 8, 30, 15, 123000),
+        "updated_at": datetime(2024, 5, 1, 8, 30, 15, 123000),
+    }
+    alert.update(overrides)
+    return alert
+
+
+def test_rows_render_like_response_model():
+    """Test raw rows serialize to the same JSON as the validated response model."""
+    alert = make_alert(read_at=None)
+
+    expected = json.loads(AlertResponse(**{**alert, "_id": str(alert["_id"])}).model_dump_json(by_alias=True))
+    rows = document_rows([alert], ALERT_SHAPE)
+
+    assert "updated_at" not in rows[0]
+    assert rows[0]["occurrence_count"] == 1
+    assert json.loads(FastJSONResponse(rows).body) == [expected]
+
+
+def test_rows_keep_requested_fields():
+    """Test a field projection limits rows to those fields."""
+    alert = make_alert()
+
+    rows = document_rows([alert], ALERT_SHAPE, ["_id", "created_at", "title"])
+
+    assert list(rows[0]) == ["_id", "title", "created_at"]
+    assert json.loads(dumps(rows)) == [{
+        "_id": str(alert["_id"]),
+        "title": alert["title"],
+        "created_at": "2024-05-01T08:30:15.123000",
+    }]
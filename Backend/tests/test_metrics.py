@@ -0,0 +1,41 @@
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.core.metrics import Counter, Histogram, Registry, HTTP_REQUESTS
+
+
+def test_render_text_format():
+    """Test counters and histograms render in the Prometheus text format."""
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests", ["route"]))
+    latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    
+    requests.inc(route='/a"b')
+    requests.inc(2, route='/a"b')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/a\\"b"} 3' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.55" in lines
+    assert "latency_seconds_count 3" in lines
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template():
+    """Test the middleware counts requests per route and /metrics exposes them."""
+    before = HTTP_REQUESTS.value(method="GET", route="/", status="200")
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.get("/")
+        response = await client.get("/metrics")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert HTTP_REQUESTS.value(method="GET", route="/", status="200") == before + 1
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert 'cache_hit_ratio{cache="dashboard"}' in response.text
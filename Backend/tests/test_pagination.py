@@ -0,0 +1,37 @@
+import pytest
+from bson import ObjectId
+from datetime import datetime
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_filter, parse_fields
+
+
+def test_cursor_round_trip():
+    """Test a cursor decodes back to the sort value and _id it was built from."""
+    key = (datetime(2024, 5, 1, 8, 30, 15, 123000), ObjectId())
+    
+    cursor = encode_cursor(*key)
+    
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_keyset_filter_bounds_sort_field_once():
+    """Test the keyset filter keeps a single range on the sort field plus an _id tie-breaker."""
+    moment, document_id = datetime(2024, 5, 1), ObjectId()
+    
+    assert keyset_filter("created_at", (moment, document_id)) == {
+        "created_at": {"$lte": moment},
+        "$or": [{"created_at": {"$lt": moment}}, {"_id": {"$lt": document_id}}]
+    }
+    assert keyset_filter("created_at", (moment, document_id), descending=False)["created_at"] == {"$gte": moment}
+
+
+def test_parse_fields():
+    """Test field projections always include the required fields and reject unknown ones."""
+    allowed = ["_id", "title", "message", "created_at"]
+    
+    assert parse_fields(None, allowed, ["_id"]) is None
+    assert parse_fields("title, created_at", allowed, ["_id", "created_at"]) == ["_id", "created_at", "title"]
+    with pytest.raises(ValueError):
+        parse_fields("title,secret", allowed, ["_id"])
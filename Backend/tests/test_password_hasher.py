@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from app.core.config import settings
+from app.core.password_hasher import PasswordHasher
+from app.core.security import verify_password
+
+
+@pytest.mark.asyncio
+async def test_hashing_does_not_block_the_event_loop():
+    """Test the loop keeps running while bcrypt hashes on a worker thread."""
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    ticks = 0
+    
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+    
+    task = asyncio.create_task(ticker())
+    hashed = await hasher.hash("s3cret!")
+    task.cancel()
+    hasher.shutdown()
+    
+    assert verify_password("s3cret!", hashed)
+    assert ticks >= 5
+    assert hasher.stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_calls_beyond_the_queue_are_rejected():
+    """Test a saturated hasher answers 503 with Retry-After instead of queueing."""
+    hasher = PasswordHasher(workers=1, max_queue=0)
+    first = asyncio.create_task(hasher.hash("one"))
+    await asyncio.sleep(0)
+    
+    with pytest.raises(HTTPException) as exc:
+        await hasher.hash("two")
+    await first
+    hasher.shutdown()
+    
+    assert exc.value.status_code == 503
+    assert "Retry-After" in exc.value.headers
+    assert hasher.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_outdated_hash_is_replaced_on_verify():
+    """Test a hash with other bcrypt rounds verifies and comes back rehashed."""
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("s3cret!")
+    
+    ok, new_hash = await hasher.verify_and_update("s3cret!", old_hash)
+    wrong, no_hash = await hasher.verify_and_update("wrong", old_hash)
+    hasher.shutdown()
+    
+    assert ok and new_hash.startswith(f"$2b${settings.PASSWORD_HASH_ROUNDS:02d}$")
+    assert verify_password("s3cret!", new_hash)
+    assert not wrong and no_hash is None
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from app.utils.query_plan import QueryPlan
+
+
+@pytest.mark.asyncio
+async def test_sub_queries_run_concurrently_and_slow_ones_degrade():
+    """Test independent sub-queries overlap and a timed-out one falls back to its default."""
+    async def value(result, delay):
+        await asyncio.sleep(delay)
+        return result
+    
+    plan = QueryPlan(concurrency=4, timeout=0.2)
+    plan.add("a", lambda: value(1, 0.05))
+    plan.add("b", lambda: value(2, 0.05))
+    plan.add("slow", lambda: value(3, 1), default=0)
+    
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    results = await plan.run()
+    
+    assert results == {"a": 1, "b": 2, "slow": 0}
+    assert plan.degraded and plan.failed == ["slow"]
+    assert loop.time() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    """Test no more than `concurrency` sub-queries run at once."""
+    running = {"now": 0, "peak": 0}
+    
+    async def tracked():
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+    
+    plan = QueryPlan(concurrency=2, timeout=1)
+    for index in range(6):
+        plan.add(f"q{index}", tracked)
+    await plan.run()
+    
+    assert running["peak"] == 2 and not plan.degraded
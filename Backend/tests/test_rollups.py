@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from app.services.rollup_service import fold_readings, merge_buckets, describe_counters, plan_tier
+from app.services.trends_service import compute_trends_from_buckets
+
+START = datetime(2024, 1, 1)
+
+
+def _rollups(readings, bucket_seconds):
+    """Fold readings and shape them like stored rollup documents."""
+    return [
+        {"bucket_start": START + timedelta(seconds=epoch - 1704067200), "count": bucket["count"], **bucket["vitals"]}
+        for (_, epoch), bucket in sorted(fold_readings(readings, bucket_seconds).items())
+    ]
+
+
+def test_plan_tier_picks_coarsest_dividing_tier():
+    """Test the planner only uses tiers that divide the resolution."""
+    assert plan_tier(60) == "1m"
+    assert plan_tier(900) == "1m"
+    assert plan_tier(3600) == "1h"
+    assert plan_tier(21600) == "1h"
+    assert plan_tier(86400) == "1d"
+    assert plan_tier(30) is None
+
+
+def test_merged_rollups_match_raw_statistics():
+    """Test minute buckets merged to hours give the same stats as the raw readings."""
+    readings = [
+        {"patient_id": "p1", "measured_at": START + timedelta(minutes=7 * i), "heart_rate": 60 + i % 13}
+        for i in range(40)
+    ]
+    hourly = merge_buckets(_rollups(readings, 60), 3600)
+    
+    assert [bucket["count"] for bucket in hourly] == [9, 9, 8, 9, 5]
+    merged = hourly[1]["vitals"]["heart_rate"]
+    raw = [r["heart_rate"] for r in readings if r["measured_at"].hour == 1]
+    stats = describe_counters(merged)
+    assert stats["count"] == len(raw)
+    assert stats["average"] == sum(raw) / len(raw)
+    assert stats["min_value"] == min(raw) and stats["max_value"] == max(raw)
+
+
+def test_trends_from_buckets_weighted_slope():
+    """Test rollup-based trends on a steadily rising heart rate."""
+    readings = [
+        {"patient_id": "p1", "measured_at": START + timedelta(hours=i), "heart_rate": 70 + 2 * i, "temperature": 36.6}
+        for i in range(24)
+    ]
+    buckets = merge_buckets(_rollups(readings, 3600), 3600)
+    
+    trends = {t.vital_type: t for t in compute_trends_from_buckets("p1", buckets, "7d", 3600, include_series=True)}
+    
+    heart_rate = trends["heart_rate"]
+    assert heart_rate.data_points == 24
+    assert abs(heart_rate.slope_per_hour - 2.0) < 1e-9
+    assert heart_rate.trend == "increasing"
+    assert heart_rate.percentiles is None
+    assert len(heart_rate.buckets) == 24
+    assert trends["temperature"].trend == "stable"
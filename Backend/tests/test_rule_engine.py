@@ -0,0 +1,76 @@
+from app.models.vitals import VitalSigns
+from app.services.rule_engine import compile_rule_table
+
+PATIENT = {"user_id": "p1", "heart_rate_min": 60, "heart_rate_max": 100}
+
+
+def _reading(**values):
+    return VitalSigns(patient_id="p1", **values)
+
+
+def test_threshold_alerts_keep_legacy_wording_and_escalation():
+    """Test heart rate alerts match the previous titles, messages and severities."""
+    table = compile_rule_table(PATIENT)
+    
+    is_anomaly, anomaly_type, alerts = table.evaluate(_reading(heart_rate=45))
+    
+    assert is_anomaly and anomaly_type == "low"
+    (alert,) = alerts
+    assert alert["title"] == "Low Heart Rate Detected"
+    assert alert["message"] == "Heart rate (45 BPM) is below minimum threshold (60 BPM)"
+    assert alert["alert_type"] == "critical"
+    assert alert["threshold_crossed"] == "below_min"
+    assert table.evaluate(_reading(heart_rate=55))[2][0]["alert_type"] == "warning"
+    assert table.evaluate(_reading(heart_rate=120))[2][0]["alert_type"] == "warning"
+    assert table.evaluate(_reading(heart_rate=121))[2][0]["alert_type"] == "critical"
+    assert table.evaluate(_reading(heart_rate=80)) == (False, None, [])
+    assert table.evaluate(_reading(heart_rate=60)) == table.evaluate(_reading(heart_rate=100)) == (False, None, [])
+
+
+def test_diastolic_and_respiratory_rate_are_checked():
+    """Test the vitals the old cascade ignored now raise alerts."""
+    table = compile_rule_table(PATIENT)
+    
+    _, anomaly_type, alerts = table.evaluate(_reading(diastolic_bp=125, respiratory_rate=10))
+    
+    assert [a["vital_type"] for a in alerts] == ["diastolic_bp", "respiratory_rate"]
+    assert alerts[0]["alert_type"] == "critical"
+    assert alerts[1]["alert_type"] == "warning"
+    assert anomaly_type == "low"
+
+
+def test_alert_rule_conditions():
+    """Test above/below/between/outside alert rules compile into the table."""
+    rules = [
+        {"vital_type": "temperature", "condition": "above", "threshold_value": 36.9, "alert_severity": "low"},
+        {"vital_type": "heart_rate", "condition": "between", "threshold_min": 90, "threshold_max": 95},
+        {"vital_type": "oxygen_saturation", "condition": "outside", "threshold_min": 97, "threshold_max": 99},
+        {"vital_type": "heart_rate", "condition": "below", "threshold_value": 70, "is_active": False},
+    ]
+    table = compile_rule_table(None, rules)
+    
+    _, _, alerts = table.evaluate(_reading(temperature=37.0, heart_rate=92, oxygen_saturation=99.5))
+    
+    assert [(a["vital_type"], a["threshold_crossed"]) for a in alerts] == [
+        ("heart_rate", "within_range"),
+        ("oxygen_saturation", "above_max"),
+        ("temperature", "above_max"),
+    ]
+    assert alerts[2]["alert_type"] == "info"
+    assert table.evaluate(_reading(heart_rate=65, oxygen_saturation=98)) == (False, None, [])
+
+
+def test_batch_evaluation_matches_single_readings():
+    """Test the NumPy batch path gives the same results as one-by-one evaluation."""
+    rules = [{"vital_type": "heart_rate", "condition": "between", "threshold_min": 95, "threshold_max": 99}]
+    table = compile_rule_table(PATIENT, rules)
+    readings = [
+        _reading(heart_rate=hr, systolic_bp=sbp, temperature=temp)
+        for hr, sbp, temp in [(80, 120, 36.6), (45, 190, None), (None, 85, 39.5), (97, None, 36.0), (130, 141, 37.3)]
+    ]
+    
+    def strip(result):
+        is_anomaly, anomaly_type, alerts = result
+        return is_anomaly, anomaly_type, [(a["title"], a["message"], a["alert_type"]) for a in alerts]
+    
+    assert [strip(r) for r in table.evaluate_batch(readings)] == [strip(table.evaluate(r)) for r in readings]
@@ -0,0 +1,57 @@
+import pytest
+from app.api import deps
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.services.token_service import TokenDenylist, token_claims
+from bson import ObjectId
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+@pytest.mark.asyncio
+async def test_claims_tokens_authorize_from_the_assignment_cache(monkeypatch):
+    """Test claims-mode auth reloads assignments only when the token is newer."""
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    monkeypatch.setattr("app.services.token_service.get_database", lambda *a: db)
+    monkeypatch.setattr(settings, "AUTH_TOKEN_MODE", "claims")
+    user_id = ObjectId()
+    user_data = {
+        "_id": user_id, "email": "cg@example.com", "full_name": "Care Giver", "role": "caregiver",
+        "hashed_password": "x", "assigned_patients": ["p1"], "assignments_version": 1
+    }
+    await db.users.insert_one(user_data)
+    token = create_access_token(token_claims(user_data))
+    
+    user = await deps.authenticate_token(token)
+    assert user.assigned_patients == ["p1"] and user.full_name == "Care Giver"
+    
+    # A change on another worker is not seen until a newer token arrives
+    await db.users.update_one({"_id": user_id}, {"$push": {"assigned_patients": "p2"}, "$inc": {"assignments_version": 1}})
+    assert (await deps.authenticate_token(token)).assigned_patients == ["p1"]
+    newer = create_access_token(token_claims(await db.users.find_one({"_id": user_id})))
+    assert (await deps.authenticate_token(newer)).assigned_patients == ["p1", "p2"]
+    deps.invalidate_cached_user(str(user_id))
+
+
+@pytest.mark.asyncio
+async def test_denylist_revokes_tokens_and_syncs_between_workers():
+    """Test single-token and all-token revocation, and polling by another worker."""
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    user_id = ObjectId()
+    user_data = {"_id": user_id, "email": "p@example.com", "full_name": "Pat", "role": "patient", "token_version": 0}
+    await db.users.insert_one(user_data)
+    first = {**token_claims(user_data), "exp": 4102444800}
+    second = {**token_claims(user_data), "exp": 4102444800}
+    
+    local, other = TokenDenylist(), TokenDenylist()
+    await other.refresh(db)
+    await local.revoke_token(first, db)
+    assert local.is_revoked(first) and not local.is_revoked(second)
+    assert not other.is_revoked(first)
+    
+    await local.revoke_user_tokens(str(user_id), db)
+    assert local.is_revoked(second)
+    assert not local.is_revoked({**second, "tv": 1})
+    
+    assert await other.refresh(db) == 2
+    assert other.is_revoked(first) and other.is_revoked(second)
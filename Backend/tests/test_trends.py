@@ -0,0 +1,45 @@
+import numpy as np
+from app.services.trends_service import compute_trends, classify_trend, VITAL_FIELDS
+
+
+def _columns(length, **values):
+    """Build NaN-filled vital columns with the given series set."""
+    columns = {field: np.full(length, np.nan) for field in VITAL_FIELDS}
+    for field, series in values.items():
+        columns[field] = np.asarray(series, dtype=np.float64)
+    return columns
+
+
+def test_compute_trends_statistics_and_direction():
+    """Test statistics and slope for a steadily rising heart rate."""
+    epoch_seconds = np.arange(10, dtype=np.float64) * 3600
+    columns = _columns(10, heart_rate=np.arange(70, 80), temperature=[36.6] * 10)
+    
+    trends = {t.vital_type: t for t in compute_trends("p1", epoch_seconds, columns, "24h")}
+    
+    assert set(trends) == {"heart_rate", "temperature"}
+    heart_rate = trends["heart_rate"]
+    assert heart_rate.average == 74.5
+    assert heart_rate.min_value == 70 and heart_rate.max_value == 79
+    assert heart_rate.data_points == 10
+    assert abs(heart_rate.slope_per_hour - 1.0) < 1e-9
+    assert heart_rate.trend == "increasing"
+    assert heart_rate.percentiles["p50"] == 74.5
+    assert trends["temperature"].trend == "stable"
+
+
+def test_compute_trends_buckets_skip_missing_values():
+    """Test hourly buckets only count readings where the vital was measured."""
+    epoch_seconds = np.array([0, 600, 3600, 4200], dtype=np.float64)
+    columns = _columns(4, heart_rate=[60, np.nan, 80, 90])
+    
+    (trend,) = compute_trends("p1", epoch_seconds, columns, "24h", bucket="hour")
+    
+    assert [b["count"] for b in trend.buckets] == [1, 2]
+    assert [b["average"] for b in trend.buckets] == [60, 85]
+
+
+def test_classify_trend_tolerance():
+    """Test small changes over the span are classified as stable."""
+    assert classify_trend("temperature", 0.01, 10) == "stable"
+    assert classify_trend("temperature", -0.1, 10) == "decreasing"
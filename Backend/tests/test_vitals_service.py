@@ -0,0 +1,27 @@
+import pytest
+from bson import ObjectId
+from datetime import datetime
+from app.services import vitals_service
+from app.services.alert_dispatcher import AlertDispatcher
+from app.services.alert_service import create_alert_dict
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+@pytest.mark.asyncio
+async def test_failed_vitals_insert_leaves_no_outbox_entry(monkeypatch):
+    """Test alerts staged alongside a failing vitals insert are withdrawn."""
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    reading = {"_id": ObjectId(), "patient_id": "p1", "heart_rate": 150, "measured_at": datetime.utcnow()}
+    alert = create_alert_dict("p1", "heart_rate", 150, "above_max", "High Heart Rate Detected", "Heart rate (150 BPM)", "critical")
+    alert["vital_reading_id"] = str(reading["_id"])
+    
+    async def failing_insert(docs, db):
+        raise ConnectionError("connection reset")
+    
+    monkeypatch.setattr(vitals_service, "insert_readings", failing_insert)
+    monkeypatch.setattr(AlertDispatcher, "running", True)
+    with pytest.raises(ConnectionError):
+        await vitals_service.store_vitals([reading], "p1", [alert], db)
+    
+    assert await db.alert_outbox.count_documents({}) == 0